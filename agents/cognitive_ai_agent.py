@@ -1,15 +1,33 @@
 import heapq
 import random
 from collections import deque
+from time import perf_counter
 from core import config
+from game import profiler
+from agents.dstar_lite import DStarLite
+from game.bitboard import bitboard
+from game.blockers import BlockedCells
+from game.snake_body import SnakeBody
 
 GRID_SIZE = config.GRID_SIZE
+RISK_RADIUS = 6  # risk_score ignores obstacles and bodies further away than this
+
+
+def death_cause(new_head, body, obstacles):
+    """Classify a fatal move; a clamped move onto the own head means the wall was hit"""
+    if new_head == body[0]:
+        return "wall"
+    if new_head in body:
+        return "self"
+    if new_head in obstacles:
+        return "obstacle"
+    return "snake"
 
 
 class CognitiveAIAgent:
     def __init__(self, id, start_pos=(10, 10), color=(200, 0, 0), cooperative=False, personality=None):
         self.id = id
-        self.body = [start_pos]
+        self.body = SnakeBody([start_pos])
         self.alive = True
         self.score = 0
         self.direction = "LEFT"
@@ -23,13 +41,47 @@ class CognitiveAIAgent:
         self.personality = personality or {"fear": 0.6, "hunger": 1.0, "aggression": 0.4, "curiosity": 0.3}
 
         self.intent = None
+        self.death_cause = None
         self.planned_path = []
+        self.target = None      # food the planned path leads to
+        self.planner = None     # incremental D* Lite search towards self.target
+        self.planner_sync = None  # Blockers version and own cells the planner was last repaired against
         self.last_perception = {"food": [], "snakes": [], "obstacles": [], "shared_danger": []}
+        self.noise = random     # decision jitter; the environment swaps in a seeded Random when deciding in parallel
+
+    # -------------------------
+    # Snapshot (Environment.snapshot/restore)
+    # -------------------------
+    def snapshot(self):
+        # last_perception is replaced, never mutated, so it can be shared; cooperative agents read it next tick
+        return (tuple(self.body), self.alive, self.score, self.direction, self.death_cause, tuple(self.memory),
+                tuple(self.planned_path), self.target, self.intent,
+                self.planner.copy() if self.planner else None, self.last_perception)
+
+    def restore(self, state):
+        (body, self.alive, self.score, self.direction, self.death_cause, memory,
+         path, self.target, self.intent, planner, self.last_perception) = state
+        self.body = SnakeBody(body)
+        self.memory = deque(memory, maxlen=self.memory.maxlen)
+        self.planned_path = list(path)
+        self.planner = planner.copy() if planner else None
+        self.planner_sync = None  # the next repair diffs the whole blocked set
 
     # -------------------------
     # Perception
     # -------------------------
     def perceive(self, food_positions, other_snakes, obstacles, env):
+        spatial = getattr(env, "spatial", None)
+        if spatial is not None:
+            # window query on the environment's spatial index
+            head, r = self.body[0], self.sensing_range
+            self.last_perception = {
+                "food": [c for c, _ in spatial.query("food", head, r)],
+                "snakes": [c for c, s in spatial.query("snake", head, r) if s is not self and getattr(s, "alive", True)],
+                "obstacles": [c for c, _ in spatial.query("obstacle", head, r)],
+                "shared_danger": [c for c, _ in spatial.query("danger", head, r)],
+            }
+            return
         hx, hy = self.body[0]
         visible_food = [
             p for p in food_positions if abs(p[0] - hx) <= self.sensing_range and abs(p[1] - hy) <= self.sensing_range
@@ -65,6 +117,8 @@ class CognitiveAIAgent:
     # A* pathfinding
     # -------------------------
     def astar(self, start, goal, blocked_set):
+        if goal != start and goal in blocked_set:
+            return []  # never enterable: don't flood the whole reachable area to find that out
         open_heap = []
         heapq.heappush(open_heap, (self.heuristic(start, goal), 0, start))
         came_from = {}
@@ -77,6 +131,7 @@ class CognitiveAIAgent:
                 continue
             closed.add(current)
             if current == goal:
+                if profiler.active: profiler.active.count('astar.expanded', len(closed))
                 path = []
                 node = current
                 while node != start:
@@ -92,37 +147,129 @@ class CognitiveAIAgent:
                     came_from[neigh] = current
                     gscore[neigh] = tentative_g
                     heapq.heappush(open_heap, (tentative_g + self.heuristic(neigh, goal), tentative_g, neigh))
+        if profiler.active: profiler.active.count('astar.expanded', len(closed))
         return []
 
+    # -------------------------
+    # Path from the shared distance fields
+    # -------------------------
+    def field_path(self, start, goal, blocked_set, fields, horizon=None):
+        """
+        Shortest path start -> goal read from the environment's shared BFS field.
+        Returns [] when the goal is unreachable, or None when the field's path runs
+        through a cell this agent treats as blocked (memory, or a snake that moved
+        earlier this tick) so the caller has to fall back to astar(). With a
+        horizon only the first horizon cells are checked: further on, the planned
+        path is re-checked step by step and repaired when something is in the way.
+
+        So the path is not always the one astar(start, goal, blocked_set) would
+        find. The field sees the tick-start board and not this agent's memory:
+        past the horizon the path may cross remembered cells and be shorter, and
+        it never uses cells that snakes moved off earlier this tick, so it may be
+        longer. decide() scores foods by this length.
+        """
+        field = fields.get(goal)
+        if field is None:
+            return []
+        dist, nxt = field
+        best = -1
+        for neigh, _dir in self.neighbors(start):
+            i = fields.index(neigh)
+            if dist[i] >= 0 and neigh not in blocked_set and (best < 0 or dist[i] < dist[best]):
+                best = i
+        if best < 0:
+            return []
+        path = [fields.cell(best)]
+        i = best
+        while dist[i] > 0:
+            i = nxt[i]
+            cell = fields.cell(i)
+            if (horizon is None or len(path) < horizon) and cell in blocked_set:
+                return None
+            path.append(cell)
+        return path
+
+    # -------------------------
+    # Incremental replanning
+    # -------------------------
+    def repair_path(self, head, blocked_set, food_positions):
+        """
+        Path to the current target after the planned one got blocked. The D* Lite
+        search towards the target is kept between ticks, so only the cells that
+        changed since the last repair are re-examined.
+        """
+        if self.target is None or self.target not in food_positions:
+            self.planner = None
+            return []
+        if self.planner is None or self.planner.goal != self.target:
+            self.planner = DStarLite(self.target, head, blocked_set, GRID_SIZE)
+        else:
+            self.planner.update(head, *self.blocked_changes(blocked_set))
+        self.planner_sync = self.sync_point(blocked_set)
+        return self.planner.path()
+
+    def sync_point(self, blocked_set):
+        """What blocked_changes needs next time: the Blockers version and this snake's own cells now"""
+        if not isinstance(blocked_set, BlockedCells):
+            return None
+        return blocked_set.blockers.version(), blocked_set.memory | blocked_set.own
+
+    def blocked_changes(self, blocked_set):
+        """
+        (added, removed) cells between the planner's blocked set and blocked_set.
+        For a BlockedCells view only the cells the Blockers journal lists since
+        the last repair, plus this snake's memory and own body then and now, can
+        differ; otherwise (plain sets, or after a restore) the whole set is diffed.
+        """
+        known = self.planner.blocked
+        sync = self.planner_sync
+        changes = None
+        if sync is not None and isinstance(blocked_set, BlockedCells):
+            changes = blocked_set.blockers.changes_since(sync[0])
+        if changes is None:
+            blocked = set(blocked_set)
+            return blocked - known, known - blocked
+        added, removed = [], []
+        for c in set(changes).union(sync[1], blocked_set.memory, blocked_set.own):
+            now = c in blocked_set
+            if now != (c in known):
+                (added if now else removed).append(c)
+        return added, removed
+
     # -------------------------
     # Flood-fill reachable count
     # -------------------------
     def flood_fill_size(self, start, blocked_set, limit=400):
-        q = [start]
-        seen = {start}
-        idx = 0
-        while idx < len(q) and len(seen) < limit:
-            pos = q[idx]
-            idx += 1
-            for neigh, _d in self.neighbors(pos):
-                if neigh in seen or neigh in blocked_set:
-                    continue
-                seen.add(neigh)
-                q.append(neigh)
-        return len(seen)
+        """Cells reachable from start; blocked_set may be a set of cells or a Bitboard mask"""
+        board = bitboard(GRID_SIZE)
+        if not isinstance(blocked_set, int):
+            blocked_set = board.mask(blocked_set)
+        size = board.reachable_count(start, blocked_set, limit)
+        if profiler.active: profiler.active.count('flood.cells', size)
+        return size
 
     # -------------------------
     # Risk scoring
     # -------------------------
     def risk_score(self, cell, other_snakes, obstacles, env):
-        ox_dist = min([abs(cell[0] - o[0]) + abs(cell[1] - o[1]) for o in obstacles] + [999])
-        snake_seg_dists = [abs(cell[0] - seg[0]) + abs(cell[1] - seg[1]) for s in other_snakes for seg in getattr(s, "body", [])]
-        nearest_snake = min(snake_seg_dists) if snake_seg_dists else 999
+        field = getattr(env, "risk_field", None)
+        if field is not None and field.covers(self):
+            # shared per-tick distance maps, own body excluded by the field
+            ox_dist = field.obstacle_dist(cell)
+            nearest_snake = field.snake_dist(cell, self)
+            nearest_head = field.head_dist(cell, self)
+        elif getattr(env, "spatial", None) is not None:
+            # only things within RISK_RADIUS add risk, so a window query finds the same nearest ones
+            ox_dist, nearest_snake, nearest_head = self.nearby_dists(cell, env.spatial, RISK_RADIUS)
+        else:
+            ox_dist = min([abs(cell[0] - o[0]) + abs(cell[1] - o[1]) for o in obstacles] + [999])
+            snake_seg_dists = [abs(cell[0] - seg[0]) + abs(cell[1] - seg[1]) for s in other_snakes for seg in getattr(s, "body", [])]
+            nearest_snake = min(snake_seg_dists) if snake_seg_dists else 999
+            enemy_heads = [s.body[0] for s in other_snakes if getattr(s, "body", [])]
+            head_dists = [abs(cell[0] - h[0]) + abs(cell[1] - h[1]) for h in enemy_heads] if enemy_heads else [999]
+            nearest_head = min(head_dists)
         shared = getattr(env, "shared_dangers", set())
         shared_pen = 0 if tuple(cell) not in shared else 5.0
-        enemy_heads = [s.body[0] for s in other_snakes if getattr(s, "body", [])]
-        head_dists = [abs(cell[0] - h[0]) + abs(cell[1] - h[1]) for h in enemy_heads] if enemy_heads else [999]
-        nearest_head = min(head_dists)
         r = 0.0
         r += 0 if ox_dist > 6 else (6 - ox_dist) * 0.5
         r += 0 if nearest_snake > 6 else (6 - nearest_snake) * 0.8
@@ -130,48 +277,72 @@ class CognitiveAIAgent:
         r += shared_pen
         return r
 
+    def nearby_dists(self, cell, spatial, radius):
+        """Distances from cell to the nearest obstacle, other snake segment and other snake head (999 past radius)"""
+        x, y = cell
+        ox_dist = nearest_snake = nearest_head = 999
+        for o, _ in spatial.query("obstacle", cell, radius):
+            ox_dist = min(ox_dist, abs(x - o[0]) + abs(y - o[1]))
+        for seg, s in spatial.query("snake", cell, radius):
+            if s is not self:
+                d = abs(x - seg[0]) + abs(y - seg[1])
+                nearest_snake = min(nearest_snake, d)
+                if seg == s.body[0]:
+                    nearest_head = min(nearest_head, d)
+        return ox_dist, nearest_snake, nearest_head
+
     # -------------------------
     # Safe neighbor moves
     # -------------------------
-    def safe_moves(self, other_snakes, obstacles):
+    def safe_moves(self, other_snakes, obstacles, env=None):
         head = self.body[0]
-        safe = []
-        for neigh, dirc in self.neighbors(head):
-            collision = neigh in obstacles or neigh in self.body or any(neigh in getattr(s, "body", []) for s in other_snakes)
-            if not collision:
-                safe.append((neigh, dirc))
-        return safe
+        blockers = getattr(env, "blockers", None)
+        if blockers is not None:
+            return [(neigh, dirc) for neigh, dirc in self.neighbors(head) if neigh not in blockers.counts]
+        board = bitboard(GRID_SIZE)
+        occupied = board.mask(obstacles) | board.mask(self.body)
+        for s in other_snakes:
+            occupied |= board.mask(getattr(s, "body", []))
+        return [(neigh, dirc) for neigh, dirc in self.neighbors(head) if not occupied & board.bit(neigh)]
 
     # -------------------------
     # Decision-making
     # -------------------------
+    def blocked_cells(self, other_snakes, obstacles, env):
+        """(cells, mask) this snake must not enter: obstacles, other snakes' bodies and its own recent positions"""
+        blockers = getattr(env, "blockers", None)
+        if blockers is not None:
+            view = blockers.view(self)  # shared per-tick index, no per-agent copy of every body
+            return view, view.mask()
+        blocked_set = set(obstacles) | set(self.memory) | set(seg for s in other_snakes for seg in getattr(s, "body", []))
+        return blocked_set, bitboard(GRID_SIZE).mask(blocked_set)
+
     def decide(self, food_positions, food_types, other_snakes, obstacles, env):
         head = self.body[0]
 
-        # Follow planned path if valid
+        blocked_set, blocked_bits = self.blocked_cells(other_snakes, obstacles, env)
+
+        # Follow planned path if valid, otherwise repair it around the cells that changed
         if self.planned_path:
-            next_pos = self.planned_path[0]
-            blocked = set(obstacles) | set(self.memory) | set(seg for s in other_snakes for seg in getattr(s, "body", []))
-            if next_pos not in blocked:
+            if self.planned_path[0] in blocked_set:
+                self.planned_path = self.repair_path(head, blocked_set, food_positions)
+            if self.planned_path:
                 next_step = self.planned_path.pop(0)
                 dx = next_step[0] - head[0]; dy = next_step[1] - head[1]
                 if dx == 1: return "RIGHT"
                 if dx == -1: return "LEFT"
                 if dy == 1: return "DOWN"
                 if dy == -1: return "UP"
-            else:
                 self.planned_path = []
 
-        blocked_set = set(obstacles) | set(self.memory) | set(seg for s in other_snakes for seg in getattr(s, "body", []))
-
         if not food_positions:
-            safe = self.safe_moves(other_snakes, obstacles)
+            safe = self.safe_moves(other_snakes, obstacles, env)
             if not safe:
                 return self.direction
             best_dir = safe[0][1]
             best_sz = -1
             for np, dirc in safe:
-                sz = self.flood_fill_size(np, blocked_set)
+                sz = self.flood_fill_size(np, blocked_bits)
                 if sz > best_sz:
                     best_sz = sz
                     best_dir = dirc
@@ -186,15 +357,21 @@ class CognitiveAIAgent:
                         coop_targets.add(f)
 
         # Evaluate foods
+        fields = getattr(env, "distance_fields", None)
+        board = bitboard(GRID_SIZE)
         best_move = None
         best_score = -1e9
         for food in food_positions:
-            path = self.astar(head, food, blocked_set)
+            # beyond what it can sense, the tick-start field is good enough: other snakes will have moved on
+            path = self.field_path(head, food, blocked_set, fields, self.sensing_range) if fields is not None else None
+            if path is None:
+                # a cut-off food would make A* expand everything reachable; the bitboard rules it out in a few shifts
+                path = self.astar(head, food, blocked_set) if board.is_reachable(head, food, blocked_bits) else []
             if not path:
                 continue
             next_cell = path[0]
             risk = self.risk_score(next_cell, other_snakes, obstacles, env)
-            space = self.flood_fill_size(next_cell, blocked_set)
+            space = self.flood_fill_size(next_cell, blocked_bits)
             dist = len(path)
             ftype = food_types.get(food, "normal")
             fval = 3.0 if ftype=="bonus" else (-2.0 if ftype=="poison" else 1.0)
@@ -204,7 +381,7 @@ class CognitiveAIAgent:
             curiosity = self.personality.get("curiosity",0.3)
             coop_pen = -1.5 if food in coop_targets else 0.0
             utility = (hunger*(fval/(1+dist))) + (curiosity*(space/(GRID_SIZE*GRID_SIZE))) - (fear*risk) + (aggression*(1/(1+dist))) + coop_pen
-            utility += random.uniform(-0.01,0.01)
+            utility += self.noise.uniform(-0.01,0.01)
             if utility > best_score:
                 best_score = utility
                 best_move = (path, next_cell)
@@ -212,19 +389,20 @@ class CognitiveAIAgent:
         if best_move:
             path, next_cell = best_move
             self.planned_path = path[1:] if len(path)>1 else []
+            self.target = path[-1]
             dx = next_cell[0] - head[0]; dy = next_cell[1] - head[1]
             if dx == 1: return "RIGHT"
             if dx == -1: return "LEFT"
             if dy == 1: return "DOWN"
             if dy == -1: return "UP"
 
-        safe = self.safe_moves(other_snakes, obstacles)
+        safe = self.safe_moves(other_snakes, obstacles, env)
         if safe:
             best_dir = safe[0][1]; best_val = -1e9
             for np, dirc in safe:
-                sz = self.flood_fill_size(np, blocked_set)
+                sz = self.flood_fill_size(np, blocked_bits)
                 r = self.risk_score(np, other_snakes, obstacles, env)
-                val = (self.personality.get("curiosity",0.3)*sz) - (self.personality.get("fear",0.6)*r) + random.uniform(-0.01,0.01)
+                val = (self.personality.get("curiosity",0.3)*sz) - (self.personality.get("fear",0.6)*r) + self.noise.uniform(-0.01,0.01)
                 if val > best_val:
                     best_val = val
                     best_dir = dirc
@@ -239,8 +417,18 @@ class CognitiveAIAgent:
         if not self.alive:
             return []
 
+        prof = profiler.active
+        if prof: t = perf_counter()
         self.perceive(food_positions, other_snakes, obstacles, env)
+        if prof: t = prof.lap('ai.perceive', t)
         chosen_dir = self.decide(food_positions, food_types, other_snakes, obstacles, env)
+        if prof: prof.lap('ai.decide', t)
+        return self.act(chosen_dir, food_positions, food_types, other_snakes, obstacles, env)
+
+    def act(self, chosen_dir, food_positions, food_types, other_snakes, obstacles, env):
+        """Move one cell towards chosen_dir: collide, grow or slide; returns the step's events"""
+        prof = profiler.active
+        if prof: t = perf_counter()
         self.intent = chosen_dir
 
         dir_to_delta = {"UP": (0,-1),"DOWN":(0,1),"LEFT":(-1,0),"RIGHT":(1,0)}
@@ -249,11 +437,18 @@ class CognitiveAIAgent:
         new_head = (max(0,min(GRID_SIZE-1,new_head[0])), max(0,min(GRID_SIZE-1,new_head[1])))
 
         # collision
-        if new_head in self.body or new_head in obstacles or any(new_head in getattr(s,"body",[]) for s in other_snakes):
+        blockers = getattr(env, "blockers", None)
+        if blockers is not None:
+            collided = new_head in blockers.counts  # own body, obstacles and every other snake
+        else:
+            collided = new_head in self.body or new_head in obstacles or any(new_head in getattr(s,"body",[]) for s in other_snakes)
+        if collided:
             self.alive = False
+            self.death_cause = death_cause(new_head, self.body, obstacles)
+            if prof: prof.lap('ai.move', t)
             return []
 
-        self.body.insert(0,new_head)
+        self.body.push_head(new_head)
         ate=False
         eaten_type=None
         if new_head in food_positions:
@@ -266,10 +461,11 @@ class CognitiveAIAgent:
             else:
                 self.score+=1
         else:
-            self.body.pop()
+            self.body.pop_tail()
 
         self.memory.append(new_head)
         events=[]
         if ate:
             events.append(("ate",self.id,new_head,eaten_type))
+        if prof: prof.lap('ai.move', t)
         return events
@@ -1,20 +1,27 @@
 import random
 from collections import deque
+from time import perf_counter
 from core import config
+from agents.cognitive_ai_agent import death_cause
+from game import profiler
+from game.bitboard import bitboard
+from game.snake_body import SnakeBody
 
 GRID_SIZE = config.GRID_SIZE
+RISK_RADIUS = 5  # risk_score ignores obstacles and bodies further away than this
 
 
 class CooperativeAIAgent:
     def __init__(self, id, start_pos=(10,10), color=(50,150,255)):
         self.id = id
-        self.body = [start_pos]
+        self.body = SnakeBody([start_pos])
         self.direction = "LEFT"
         self.alive = True
         self.score = 0
         self.color = color
         self.memory = deque(maxlen=20)
         self.intent = None
+        self.death_cause = None
         self.cooperative = True  # This agent always cooperates
         self.sensing_range = config.BASE_SENSING_RANGE
 
@@ -28,11 +35,36 @@ class CooperativeAIAgent:
 
         # Store last perception
         self.last_perception = {"food":[], "snakes":[], "obstacles":[], "shared_danger":[]}
+        self.noise = random  # decision jitter; a seeded Random while the environment decides in parallel
+
+    # -----------------------------
+    # Snapshot (Environment.snapshot/restore)
+    # -----------------------------
+    def snapshot(self):
+        return (tuple(self.body), self.alive, self.score, self.direction, self.death_cause, tuple(self.memory),
+                self.intent, self.last_perception)
+
+    def restore(self, state):
+        body, self.alive, self.score, self.direction, self.death_cause, memory, self.intent, self.last_perception = state
+        self.body = SnakeBody(body)
+        self.memory = deque(memory, maxlen=self.memory.maxlen)
 
     # -----------------------------
     # Perception
     # -----------------------------
     def perceive(self, food_positions, other_snakes, obstacles, env):
+        spatial = getattr(env, "spatial", None)
+        if spatial is not None:
+            # Window query on the environment's spatial index
+            head, r = self.body[0], self.sensing_range
+            self.last_perception = {
+                "food": [c for c, _ in spatial.query("food", head, r)],
+                "snakes": [c for c, s in spatial.query("snake", head, r) if s is not self],
+                "obstacles": [c for c, _ in spatial.query("obstacle", head, r)],
+                "shared_danger": [c for c, _ in spatial.query("danger", head, r)]
+            }
+            return
+
         hx, hy = self.body[0]
 
         visible_food = [p for p in food_positions
@@ -70,12 +102,26 @@ class CooperativeAIAgent:
                 yield (nx,ny), dirc
 
     def risk_score(self, pos, obstacles, other_snakes, env):
-        # Danger from obstacles
-        obstacle_dist = min([abs(pos[0]-o[0])+abs(pos[1]-o[1]) for o in obstacles] + [999])
+        field = getattr(env, "risk_field", None)
+        if field is not None and field.covers(self):
+            # Shared per-tick distance maps (own body excluded by the field)
+            obstacle_dist = field.obstacle_dist(pos)
+            nearest_snake = field.snake_dist(pos, self)
+        elif getattr(env, "spatial", None) is not None:
+            # Nothing further than RISK_RADIUS adds risk, so a window query finds the same nearest ones
+            obstacle_dist = nearest_snake = 999
+            for o, _ in env.spatial.query("obstacle", pos, RISK_RADIUS):
+                obstacle_dist = min(obstacle_dist, abs(pos[0]-o[0])+abs(pos[1]-o[1]))
+            for seg, s in env.spatial.query("snake", pos, RISK_RADIUS):
+                if s is not self:
+                    nearest_snake = min(nearest_snake, abs(pos[0]-seg[0])+abs(pos[1]-seg[1]))
+        else:
+            # Danger from obstacles
+            obstacle_dist = min([abs(pos[0]-o[0])+abs(pos[1]-o[1]) for o in obstacles] + [999])
 
-        # Danger from snake bodies
-        snake_dists = [abs(pos[0]-seg[0])+abs(pos[1]-seg[1]) for s in other_snakes for seg in s.body]
-        nearest_snake = min(snake_dists) if snake_dists else 999
+            # Danger from snake bodies
+            snake_dists = [abs(pos[0]-seg[0])+abs(pos[1]-seg[1]) for s in other_snakes for seg in s.body]
+            nearest_snake = min(snake_dists) if snake_dists else 999
 
         # Shared danger broadcast
         shared = getattr(env, "shared_dangers", set())
@@ -88,30 +134,35 @@ class CooperativeAIAgent:
 
         return risk
 
-    def safe_moves(self, other_snakes, obstacles):
-        safe = []
-        head = self.body[0]
-        for neigh, dirc in self.neighbors(head):
-            if neigh in obstacles:
-                continue
-            if neigh in self.body:
-                continue
-            if any(neigh in s.body for s in other_snakes):
-                continue
-            safe.append((neigh, dirc))
-        return safe
+    def occupied_bits(self, other_snakes, obstacles, env=None):
+        blockers = getattr(env, "blockers", None)
+        if blockers is not None:
+            return blockers.bits  # obstacles and every body, own included
+        board = bitboard(GRID_SIZE)
+        occupied = board.mask(obstacles) | board.mask(self.body)
+        for s in other_snakes:
+            occupied |= board.mask(s.body)
+        return occupied
+
+    def safe_moves(self, other_snakes, obstacles, occupied=None):
+        board = bitboard(GRID_SIZE)
+        if occupied is None:
+            occupied = self.occupied_bits(other_snakes, obstacles)
+        return [(neigh, dirc) for neigh, dirc in self.neighbors(self.body[0]) if not occupied & board.bit(neigh)]
 
     # -----------------------------
     # Cooperative decision making
     # -----------------------------
-    def decide(self, food_positions, food_types, other_snakes, obstacles, env):
-        head = self.body[0]
-
-        # Cooperative food sharing — avoid food another teammate sees
-        coop_targets = set()
+    def coop_targets(self, env):
+        """Food some other cooperative agent currently sees (only asked when a neighbour cell holds food)"""
+        targets = set()
         for agent in env.ai_list:
             if agent is not self and agent.cooperative:
-                coop_targets.update(agent.last_perception.get("food", []))
+                targets.update(agent.last_perception.get("food", []))
+        return targets
+
+    def decide(self, food_positions, food_types, other_snakes, obstacles, env):
+        head = self.body[0]
 
         best_move = None
         best_score = -999
@@ -129,15 +180,15 @@ class CooperativeAIAgent:
                 else:
                     food_bonus = 1
 
-                # Cooperation penalty
-                if neigh in coop_targets:
+                # Cooperation penalty: avoid food another teammate sees
+                if neigh in self.coop_targets(env):
                     food_bonus -= 1.5
 
             # Utility
             score = (
                 food_bonus * self.personality["hunger"]
                 - risk * self.personality["fear"]
-                + random.uniform(-0.02, 0.02)
+                + self.noise.uniform(-0.02, 0.02)
             )
 
             if score > best_score:
@@ -147,10 +198,12 @@ class CooperativeAIAgent:
         if best_move:
             return best_move
 
-        # If no good moves → choose safest among safe moves
-        safe = self.safe_moves(other_snakes, obstacles)
+        # If no good moves → choose the safe move with the most room
+        occupied = self.occupied_bits(other_snakes, obstacles, env)
+        safe = self.safe_moves(other_snakes, obstacles, occupied)
         if safe:
-            return safe[0][1]
+            board = bitboard(GRID_SIZE)
+            return max(safe, key=lambda m: board.reachable_count(m[0], occupied))[1]
 
         return self.direction
 
@@ -169,11 +222,22 @@ class CooperativeAIAgent:
         if not self.alive:
             return []
 
+        prof = profiler.active
+        if prof: t = perf_counter()
+
         # Perception
         self.perceive(food_positions, other_snakes, obstacles, env)
+        if prof: t = prof.lap('ai.perceive', t)
 
         # Decide next direction
         chosen = self.decide(food_positions, food_types, other_snakes, obstacles, env)
+        if prof: prof.lap('ai.decide', t)
+        return self.act(chosen, food_positions, food_types, other_snakes, obstacles, env)
+
+    def act(self, chosen, food_positions, food_types, other_snakes, obstacles, env):
+        """Take the decided move (and warn the others if crowded); returns the step's events"""
+        prof = profiler.active
+        if prof: t = perf_counter()
         self.direction = chosen
         self.maybe_broadcast_danger(env)
 
@@ -195,16 +259,23 @@ class CooperativeAIAgent:
         )
 
         # Collision detection
-        if (
-            new_head in obstacles
-            or new_head in self.body
-            or any(new_head in s.body for s in other_snakes)
-        ):
+        blockers = getattr(env, "blockers", None)
+        if blockers is not None:
+            collided = new_head in blockers.counts  # obstacles, own body and every other snake
+        else:
+            collided = (
+                new_head in obstacles
+                or new_head in self.body
+                or any(new_head in s.body for s in other_snakes)
+            )
+        if collided:
             self.alive = False
+            self.death_cause = death_cause(new_head, self.body, obstacles)
             env.log_event("collision", "coop_agent_died", self.id, new_head)
+            if prof: prof.lap('ai.move', t)
             return []
 
-        self.body.insert(0, new_head)
+        self.body.push_head(new_head)
 
         # Food eating
         events = []
@@ -221,7 +292,8 @@ class CooperativeAIAgent:
             env.log_event("eat", "coop_agent_ate", self.id, new_head)
 
         else:
-            self.body.pop()
+            self.body.pop_tail()
 
         self.memory.append(new_head)
+        if prof: prof.lap('ai.move', t)
         return events
@@ -0,0 +1,157 @@
+import heapq
+from core import config
+from game import profiler
+
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    Incremental grid planner (D* Lite, Koenig & Likhachev 2002).
+
+    Searches backwards from a fixed goal (the food) to a moving start (the
+    snake's head) and keeps g/rhs values between ticks. update() takes the new
+    head and the cells that became blocked or free since the last call and
+    repairs the search around them only; path() then walks the g-values.
+    Entering a blocked cell costs infinity, everything else 1, so the start
+    cell itself may be blocked (the head is always in memory).
+    """
+
+    def __init__(self, goal, start, blocked, size=None):
+        self.size = size or config.GRID_SIZE
+        self.goal = goal
+        self.start = start
+        self.last_start = start
+        self.blocked = set(blocked)
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.open = []          # heap of (key, cell), stale entries skipped on pop
+        self.open_key = {goal: self.key(goal)}
+        heapq.heappush(self.open, (self.open_key[goal], goal))
+        self.expanded = 0
+        self.compute()
+
+    # -------------------------
+    # Grid helpers
+    # -------------------------
+    def neighbors(self, pos):
+        x, y = pos
+        for nx, ny in ((x, y-1), (x, y+1), (x-1, y), (x+1, y)):
+            if 0 <= nx < self.size and 0 <= ny < self.size:
+                yield (nx, ny)
+
+    def heuristic(self, a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def key(self, s):
+        m = min(self.g.get(s, INF), self.rhs.get(s, INF))
+        return (m + self.heuristic(self.start, s) + self.km, m)
+
+    # -------------------------
+    # Core D* Lite
+    # -------------------------
+    def update_vertex(self, u):
+        if u != self.goal:
+            best = INF
+            for v in self.neighbors(u):
+                if v not in self.blocked:
+                    gv = self.g.get(v, INF) + 1
+                    if gv < best:
+                        best = gv
+            self.rhs[u] = best
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            k = self.key(u)
+            self.open_key[u] = k
+            heapq.heappush(self.open, (k, u))
+        else:
+            self.open_key.pop(u, None)
+
+    def top(self):
+        while self.open:
+            k, u = self.open[0]
+            if self.open_key.get(u) == k:
+                return k, u
+            heapq.heappop(self.open)
+        return (INF, INF), None
+
+    def compute(self):
+        expanded = self.expanded
+        self._compute()
+        if profiler.active: profiler.active.count('dstar.expanded', self.expanded - expanded)
+
+    def _compute(self):
+        while True:
+            k_old, u = self.top()
+            if u is None:
+                break
+            g_start = self.g.get(self.start, INF)
+            if not (k_old < self.key(self.start) or self.rhs.get(self.start, INF) != g_start):
+                break
+            k_new = self.key(u)
+            if k_old < k_new:
+                self.open_key[u] = k_new
+                heapq.heappush(self.open, (k_new, u))
+                continue
+            heapq.heappop(self.open)
+            del self.open_key[u]
+            self.expanded += 1
+            if self.g.get(u, INF) > self.rhs.get(u, INF):
+                self.g[u] = self.rhs[u]
+                for s in self.neighbors(u):
+                    self.update_vertex(s)
+            else:
+                self.g[u] = INF
+                self.update_vertex(u)
+                for s in self.neighbors(u):
+                    self.update_vertex(s)
+
+    # -------------------------
+    # Incremental interface
+    # -------------------------
+    def copy(self):
+        """Independent planner in the same search state (used by Environment.snapshot)"""
+        c = DStarLite.__new__(DStarLite)
+        c.__dict__.update(self.__dict__)
+        c.blocked = set(self.blocked)
+        c.g = dict(self.g)
+        c.rhs = dict(self.rhs)
+        c.open = list(self.open)
+        c.open_key = dict(self.open_key)
+        return c
+
+    def update(self, start, added=(), removed=()):
+        """Move the start to the new head and apply the cells that became blocked (added) or free (removed)"""
+        if start != self.start:
+            self.km += self.heuristic(self.last_start, start)
+            self.last_start = start
+            self.start = start
+        self.blocked.update(added)
+        self.blocked.difference_update(removed)
+        # sorted: set order depends on history; keep replans reproducible after a copy
+        for c in sorted(set(added) | set(removed)):
+            # entering c changed cost, so only c's neighbours see a different rhs
+            for s in self.neighbors(c):
+                self.update_vertex(s)
+        self.compute()
+
+    def path(self):
+        """Cells from the start (exclusive) to the goal, or [] when the goal is cut off"""
+        if self.g.get(self.start, INF) == INF:
+            return []
+        path = []
+        cur = self.start
+        for _ in range(self.size * self.size):
+            if cur == self.goal:
+                return path
+            nxt, best = None, INF
+            for v in self.neighbors(cur):
+                if v not in self.blocked:
+                    gv = self.g.get(v, INF) + 1
+                    if gv < best:
+                        nxt, best = v, gv
+            if nxt is None or best == INF:
+                return []
+            path.append(nxt)
+            cur = nxt
+        return []
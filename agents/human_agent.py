@@ -1,26 +1,65 @@
-import pygame
-from core.config import GRID_SIZE
+import time
+from collections import deque
+from core.config import GRID_SIZE, INPUT_QUEUE_SIZE
+from game.snake_body import SnakeBody
+
+OPPOSITE = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+KEY_DIRECTIONS = {'up': 'UP', 'down': 'DOWN', 'left': 'LEFT', 'right': 'RIGHT'}  # by pygame key name
 
 class HumanAgent:
     def __init__(self, id, start_pos=(5,5), color=(0,200,0)):
         self.id = id
-        self.body = [start_pos]           # Snake segments
+        self.body = SnakeBody([start_pos])           # Snake segments
         self.alive = True
         self.score = 0
         self.direction = 'RIGHT'
         self.color = color
+        self.death_cause = None
+        self.pending = deque()     # (time pressed, direction) key turns not applied yet, one per tick
+        self.input_latency = None  # seconds between the last applied key press and its tick
 
     def handle_event(self, event):
-        if event.type != pygame.KEYDOWN:
-            return
-        if event.key == pygame.K_UP and self.direction != 'DOWN':
-            self.direction = 'UP'
-        elif event.key == pygame.K_DOWN and self.direction != 'UP':
-            self.direction = 'DOWN'
-        elif event.key == pygame.K_LEFT and self.direction != 'RIGHT':
-            self.direction = 'LEFT'
-        elif event.key == pygame.K_RIGHT and self.direction != 'LEFT':
-            self.direction = 'RIGHT'
+        """Queue an arrow key press; apply_turn() takes effect on the next tick"""
+        import pygame  # only the game window has events; simulations never import pygame
+        if event.type == pygame.KEYDOWN:
+            direction = KEY_DIRECTIONS.get(pygame.key.name(event.key))
+            if direction:
+                self.queue_turn(direction)
+
+    def queue_turn(self, direction, now=None):
+        """
+        Queue a turn checked against the last queued direction, so UP then LEFT
+        within one tick are two turns. Repeats, reversals and presses beyond
+        INPUT_QUEUE_SIZE are dropped.
+        """
+        last = self.pending[-1][1] if self.pending else self.direction
+        if direction == last or direction == OPPOSITE.get(last) or len(self.pending) >= INPUT_QUEUE_SIZE:
+            return False
+        self.pending.append((time.perf_counter() if now is None else now, direction))
+        return True
+
+    def apply_turn(self, now=None):
+        """Take the oldest queued turn, if any; called once per simulation step before it runs"""
+        if not self.pending:
+            return None
+        pressed, direction = self.pending.popleft()
+        self.turn(direction)
+        self.input_latency = (time.perf_counter() if now is None else now) - pressed
+        return direction
+
+    def turn(self, direction):
+        """Change direction unless it would reverse the snake onto itself"""
+        if direction != OPPOSITE.get(self.direction):
+            self.direction = direction
+
+    def snapshot(self):
+        """Immutable copy of the mutable state (Environment.snapshot)"""
+        return (tuple(self.body), self.alive, self.score, self.direction, self.death_cause)
+
+    def restore(self, state):
+        body, self.alive, self.score, self.direction, self.death_cause = state
+        self.body = SnakeBody(body)
+        self.pending = deque()  # key presses belong to the live game (fork() shares the old deque)
 
     def next_position(self):
         x, y = self.body[0]
@@ -42,10 +81,11 @@ class HumanAgent:
         # Check collisions with self or obstacles
         if new_head in self.body or new_head in obstacles:
             self.alive = False
+            self.death_cause = 'wall' if new_head == self.body[0] else 'obstacle' if new_head in obstacles else 'self'
             return
 
         # Add new head
-        self.body.insert(0, new_head)
+        self.body.push_head(new_head)
 
         # Handle food
         if new_head in food_positions:
@@ -65,4 +105,4 @@ class HumanAgent:
         # Adjust snake length based on score
         target_length = max(1, self.score + 1)  # minimum length = 1
         while len(self.body) > target_length:
-            self.body.pop()
+            self.body.pop_tail()
@@ -0,0 +1,183 @@
+import math, time
+import numpy as np
+from agents.cognitive_ai_agent import CognitiveAIAgent
+from game.vec_env import VecEnvironment, DIRECTIONS
+
+ALL_ACTIONS = (0, 1, 2, 3)
+
+
+class Node:
+    """Open-loop search node: statistics of an action sequence, not of a fixed board"""
+    __slots__ = ('children', 'visits', 'total')
+
+    def __init__(self):
+        self.children = [None, None, None, None]   # indexed like DIRECTIONS
+        self.visits = 0
+        self.total = 0.0
+
+    def copy(self):
+        """Independent copy of this subtree"""
+        c = Node()
+        c.children = [ch.copy() if ch else None for ch in self.children]
+        c.visits, c.total = self.visits, self.total
+        return c
+
+    def select(self, actions, c, rng):
+        """Action to follow: an untried one if there is any, otherwise the best UCT score"""
+        untried = [a for a in actions if self.children[a] is None]
+        if untried:
+            a = untried[int(rng.integers(len(untried)))]
+            self.children[a] = Node()
+            return a, True
+        log_n = math.log(max(self.visits, 1))
+        best, best_a = -math.inf, actions[0]
+        for a in actions:
+            ch = self.children[a]
+            u = ch.total / ch.visits + c * math.sqrt(log_n / ch.visits)
+            if u > best:
+                best, best_a = u, a
+        return best_a, False
+
+
+class MCTSAgent(CognitiveAIAgent):
+    """
+    Snake that picks its move by Monte Carlo Tree Search.
+
+    Rollouts run on a VecEnvironment loaded with the current board, so a batch
+    of `batch` rollouts advances in one vectorized step per tick. The first
+    tree_depth moves of our snake follow the tree (UCT, open loop), the rest of
+    the horizon and every opponent use a cheap food-greedy safe policy. A
+    rollout is worth its discounted score gain minus death_penalty if the snake
+    dies. Each tick searches until `rollouts` rollouts are done or time_budget
+    seconds have passed, and the subtree of the chosen move is kept for the next
+    tick. Movement, scoring and collisions are CognitiveAIAgent's.
+
+    The defaults simulate about 120-140k board steps/s on one core with five
+    snakes on the 20x20 board (benchmarks/run.py, mcts_search). Smaller batches
+    give the tree more feedback between batches but pay numpy's per-call cost on
+    fewer boards: batch=128 runs at roughly 95k steps/s.
+    """
+
+    def __init__(self, id, start_pos=(10, 10), color=(200, 120, 0), rollouts=512, time_budget=None, batch=256,
+                 horizon=10, tree_depth=3, exploration=1.0, discount=0.8, death_penalty=10.0, greedy_eps=0.25, seed=None,
+                 **kwargs):
+        super().__init__(id, start_pos, color, **kwargs)
+        self.rollouts = rollouts
+        self.time_budget = time_budget
+        self.batch = batch
+        self.horizon = horizon
+        self.tree_depth = tree_depth
+        self.exploration = exploration
+        self.discount = discount
+        self.death_penalty = death_penalty
+        self.greedy_eps = greedy_eps
+        self.rng = np.random.default_rng(seed)
+        self.model = None        # VecEnvironment reused while snake/obstacle counts stay the same
+        self.root = None
+        self.root_step = None    # env.step_count at which self.root is valid
+        self.simulated_steps = 0
+
+    def snapshot(self):
+        # the rng and the kept subtree steer the next search, so a restored or forked copy must get its own
+        return super().snapshot() + (self.rng.bit_generator.state, self.root.copy() if self.root else None, self.root_step)
+
+    def restore(self, state):
+        super().restore(state[:-3])
+        rng, root, self.root_step = state[-3:]
+        self.rng = np.random.default_rng()
+        self.rng.bit_generator.state = rng
+        self.root = root.copy() if root else None
+        self.model = None  # fork() copies the agent, so the old model may still be in use by the original
+
+    # -------------------------
+    # Forward model
+    # -------------------------
+    def load_model(self, env):
+        """Load the current board into the forward model with this snake as snake 0"""
+        others = [s for s in [env.human] + env.ai_list if s is not self and len(s.body)]
+        snakes = [(list(self.body), True, self.score)] + [(list(s.body), s.alive, s.score) for s in others]
+        obstacles = [o.position for o in env.obstacle_agents]
+        m = self.model
+        if m is None or m.num_snakes != len(snakes) or m.num_obstacles != len(obstacles):
+            m = self.model = VecEnvironment(self.batch, len(snakes), len(obstacles), seed=0,
+                                            max_steps=2**30, start_positions=[(0, 0)] * len(snakes),
+                                            auto_reset=False)  # a finished rollout must stay finished
+        # reseeded from self.rng on every load, so the agent's rng state alone decides the rollouts
+        m.rng = np.random.default_rng(int(self.rng.integers(2**63)))
+        m.load(snakes, [(f.position, f.type, getattr(f, 'lifetime', None)) for f in env.food_agents], obstacles,
+               env.step_count, env.obstacle_move_counter)
+        return m
+
+    # -------------------------
+    # Search
+    # -------------------------
+    def run_batch(self, model, state, root, root_actions):
+        """One batch of rollouts from the root state; updates the tree in place"""
+        model.set_state(state)
+        n = model.num_envs
+        plans = np.full((n, self.tree_depth), -1, dtype=np.int64)
+        paths = []
+        for b in range(n):
+            node, path = root, []
+            root.visits += 1
+            for depth in range(self.tree_depth):
+                a, expanded = node.select(root_actions if depth == 0 else ALL_ACTIONS, self.exploration, self.rng)
+                node = node.children[a]
+                node.visits += 1   # counted now so the rest of the batch spreads out (virtual loss)
+                plans[b, depth] = a
+                path.append(node)
+                if expanded:
+                    break
+            paths.append(path)
+
+        value = np.zeros(n)
+        live = np.ones(n, dtype=bool)
+        disc = 1.0
+        for t in range(self.horizon):
+            actions = model.greedy_safe_actions(self.greedy_eps)
+            if t < self.tree_depth:
+                planned = plans[:, t]
+                follow = planned >= 0
+                actions[follow, 0] = planned[follow]
+            rewards, _, _ = model.step(actions)
+            self.simulated_steps += n
+            value += disc * np.where(live, rewards[:, 0], 0)
+            died = live & ~model.alive[:, 0]
+            value[died] -= disc * self.death_penalty
+            live &= ~died
+            if not live.any():
+                break
+            disc *= self.discount
+
+        for b, path in enumerate(paths):
+            v = float(value[b])
+            root.total += v
+            for node in path:
+                node.total += v
+
+    def search(self, env):
+        """Run the per-tick budget and return the root with its statistics"""
+        model = self.load_model(env)
+        state = model.get_state()
+        safe = model.safe_actions()[0, 0]
+        root_actions = tuple(a for a in ALL_ACTIONS if safe[a]) or ALL_ACTIONS
+
+        root = self.root if self.root is not None and self.root_step == env.step_count else Node()
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        done = 0
+        while done < self.rollouts and (deadline is None or time.perf_counter() < deadline):
+            self.run_batch(model, state, root, root_actions)
+            done += model.num_envs
+        return root, root_actions
+
+    # -------------------------
+    # Decision-making
+    # -------------------------
+    def decide(self, food_positions, food_types, other_snakes, obstacles, env):
+        if not hasattr(env, 'food_agents'):
+            return super().decide(food_positions, food_types, other_snakes, obstacles, env)
+        root, root_actions = self.search(env)
+        best = max(root_actions, key=lambda a: root.children[a].visits if root.children[a] else -1)
+        self.root = root.children[best]
+        self.root_step = env.step_count + 1
+        return DIRECTIONS[best]
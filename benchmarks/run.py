@@ -0,0 +1,347 @@
+# benchmarks/run.py
+"""
+Performance baseline for AI think time, step throughput and rendering.
+
+    python -m benchmarks.run --out benchmarks/baseline.json
+    python -m benchmarks.run --quick --compare benchmarks/baseline.json
+
+Every case builds a fixed-seed board: snakes laid out as random self-avoiding
+walks of the given length, the level-3 obstacles and food. The timed calls are
+CognitiveAIAgent.astar / flood_fill_size / risk_score / decide,
+CooperativeAIAgent.decide, Environment.step and Environment.draw into an
+offscreen surface, both as a full repaint and as the frame after a step, once
+with the whole board in the window and once through a VIEW-cell camera
+viewport. Agent methods run over grid x snake length; step and draw run over
+grid x AI count. On the SCALE_GRID board env_step_many steps SCALE_AIS AIs
+with short snakes, and the driver reports how step time grows with the snake
+count (the exponent of a log-log fit; 1.0 is linear). env_step_parallel steps
+the same boards with the AIs deciding on SCALE_WORKERS threads. On the
+MCTS_GRID board mcts_search times one MCTSAgent search with its default
+rollout settings and records the simulated board steps per second, which the
+driver checks against MCTS_TARGET.
+
+GRID_SIZE is read at import time, so each grid size runs in its own worker
+process with SNAKE_GRID_SIZE set. Results are JSON; --compare matches cases
+against a stored run by (name, grid, length, ais) and exits with status 1
+when a median got slower by more than --threshold.
+
+Timings only compare on the machine that produced them, so baseline.json is
+not checked in: record it locally (e.g. on the main branch) before comparing.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse, json, math, platform, random, subprocess, sys, time
+
+GRIDS = (20, 50, 100, 200)
+LENGTHS = (4, 16, 64)
+AI_COUNTS = (1, 3, 8)
+AGENT_AIS = 3      # AI count of the agent-method cases
+STEP_LENGTH = 16   # snake length of the step/draw cases
+VIEW = 20          # window width in cells of the viewport draw cases
+SCALE_GRID = 100   # board of the snake-count scaling cases
+SCALE_AIS = (25, 50, 100, 200)
+SCALE_LENGTH = 4
+SCALE_WORKERS = 4  # decide threads of the env_step_parallel cases
+MCTS_GRID = 20     # board of the mcts_search case
+MCTS_TARGET = 100_000  # forward-model steps/s one search should sustain on a core
+SEED = 1234
+
+
+# -------------------------
+# Timing
+# -------------------------
+def measure(fn, setup=None, min_time=0.2, min_reps=5, max_reps=2000):
+    """Per-call seconds of fn(); setup() runs untimed before every call"""
+    samples = []
+    total = 0.0
+    while len(samples) < min_reps or (total < min_time and len(samples) < max_reps):
+        if setup:
+            setup()
+        t = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t
+        samples.append(dt)
+        total += dt
+    samples.sort()
+    return {'median_us': round(samples[len(samples) // 2] * 1e6, 2), 'min_us': round(samples[0] * 1e6, 2),
+            'reps': len(samples)}
+
+
+# -------------------------
+# Fixed-seed boards (worker side)
+# -------------------------
+def walk(rng, taken, length, size, tries=200):
+    """Random self-avoiding walk of `length` free cells, head first"""
+    for _ in range(tries):
+        cell = (rng.randrange(size), rng.randrange(size))
+        if cell in taken:
+            continue
+        body = [cell]
+        seen = {cell}
+        while len(body) < length:
+            x, y = body[-1]
+            options = [(x + dx, y + dy) for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0))]
+            options = [c for c in options if 0 <= c[0] < size and 0 <= c[1] < size and c not in taken and c not in seen]
+            if not options:
+                break
+            nxt = rng.choice(options)
+            body.append(nxt)
+            seen.add(nxt)
+        if len(body) == length:
+            taken.update(body)
+            return body
+    raise RuntimeError(f"no room for a snake of length {length}")
+
+
+def build_env(num_ai, length, seed=SEED, cls=None, decide_workers=0):
+    from core.config import GRID_SIZE
+    from agents.human_agent import HumanAgent
+    from agents.cognitive_ai_agent import CognitiveAIAgent
+    from game.environment import Environment
+
+    random.seed(seed)
+    cls = cls or CognitiveAIAgent
+    human = HumanAgent(0, (0, 0))
+    ai_list = [cls(i + 1, ((i + 1) % GRID_SIZE, (i + 1) // GRID_SIZE)) for i in range(num_ai)]
+    env = Environment(human, ai_list, seed=seed, headless=True, decide_workers=decide_workers)
+    env.spawn_for_level(3)
+
+    rng = random.Random(seed)
+    taken = {f.position for f in env.food_agents} | {o.position for o in env.obstacle_agents}
+    snap = env.snapshot()
+    snakes = [(tuple(walk(rng, taken, length, GRID_SIZE)),) + s[1:] for s in snap.snakes]
+    # the snapshot's free list still holds the cells the walked bodies now cover
+    free = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if (x, y) not in taken]
+    env.restore(snap._replace(snakes=snakes, free_cells=free))
+    assert len(env.occupancy.free) == (env.occupancy.counts == 0).sum()
+    for ai in ai_list:  # remember the walked body rather than the constructor's start cell
+        ai.memory.clear()
+        ai.memory.extend(reversed(list(ai.body)[:ai.memory.maxlen]))
+    return env
+
+
+def agent_args(env, ai):
+    foods = [f.position for f in env.food_agents]
+    types = {f.position: f.type for f in env.food_agents}
+    others = [env.human] + [a for a in env.ai_list if a is not ai]
+    obstacles = [o.position for o in env.obstacle_agents]
+    return foods, types, others, obstacles
+
+
+def agent_cases(grid, length, quick):
+    env = build_env(AGENT_AIS, length)
+    env.build_fields()
+    ai = env.ai_list[0]
+    foods, types, others, obstacles = agent_args(env, ai)
+    head = ai.body[0]
+    occupied = {(int(x), int(y)) for x, y in zip(*(env.occupancy.counts > 0).nonzero())}
+    blocked = occupied - {head} - set(foods)
+    goal = max(foods, key=lambda f: abs(f[0] - head[0]) + abs(f[1] - head[1]))
+    neighbour = next((c for c, _ in ai.neighbors(head) if c not in blocked), head)
+    min_time = 0.05 if quick else 0.2
+    snap = env.snapshot()
+
+    def fresh_decide():
+        env.restore(snap)
+        env.build_fields()
+        ai.perceive(foods, others, obstacles, env)
+
+    cases = {
+        'astar': measure(lambda: ai.astar(head, goal, blocked), min_time=min_time),
+        'flood_fill_size': measure(lambda: ai.flood_fill_size(neighbour, blocked), min_time=min_time),
+        'risk_score': measure(lambda: ai.risk_score(neighbour, others, obstacles, env), min_time=min_time),
+        'decide': measure(lambda: ai.decide(foods, types, others, obstacles, env), fresh_decide, min_time=min_time),
+    }
+
+    from agents.cooperative_agent import CooperativeAIAgent
+    coop = build_env(AGENT_AIS, length, cls=CooperativeAIAgent)
+    cai = coop.ai_list[0]
+    cfoods, ctypes, cothers, cobstacles = agent_args(coop, cai)
+    csnap = coop.snapshot()
+
+    def fresh_coop():
+        coop.restore(csnap)
+        cai.perceive(cfoods, cothers, cobstacles, coop)
+
+    cases['coop_decide'] = measure(lambda: cai.decide(cfoods, ctypes, cothers, cobstacles, coop), fresh_coop,
+                                   min_time=min_time)
+    return [dict(name=name, grid=grid, length=length, ais=AGENT_AIS, **r) for name, r in cases.items()]
+
+
+def env_cases(grid, num_ai, quick):
+    import pygame
+    from core.config import CELL_SIZE
+    from game.renderer import Renderer
+    pygame.font.init()
+    env = build_env(num_ai, STEP_LENGTH)
+    env.font = pygame.font.Font(None, 18)
+    level = 3
+    snap = env.snapshot()
+    min_time = 0.05 if quick else 0.2
+    screen = pygame.Surface((grid * CELL_SIZE, grid * CELL_SIZE))
+
+    def fresh():
+        env.restore(snap)
+
+    def stepped():
+        env.restore(snap)
+        env.draw(screen, level)
+        env.step(level)
+
+    def repaint():
+        env.draw(screen, level)
+        env.renderer.invalidate()
+
+    cases = {
+        'env_step': measure(lambda: env.step(level), fresh, min_time=min_time),
+        'draw_full': measure(lambda: env.draw(screen, level), repaint, min_time=min_time),
+        'draw_frame': measure(lambda: env.draw(screen, level), stepped, min_time=min_time),
+    }
+    if grid > VIEW:
+        env.renderer = Renderer(env.font, VIEW, VIEW)
+        screen = pygame.Surface((VIEW * CELL_SIZE, VIEW * CELL_SIZE))
+        cases['draw_view_full'] = measure(lambda: env.draw(screen, level), repaint, min_time=min_time)
+        cases['draw_view_frame'] = measure(lambda: env.draw(screen, level), stepped, min_time=min_time)
+    return [dict(name=name, grid=grid, length=STEP_LENGTH, ais=num_ai, **r) for name, r in cases.items()]
+
+
+def scale_cases(grid, quick):
+    level = 3
+    results = []
+    for num_ai in SCALE_AIS:
+        env = build_env(num_ai, SCALE_LENGTH)
+        snap = env.snapshot()
+        r = measure(lambda: env.step(level), lambda: env.restore(snap), min_time=0.2 if quick else 1.0)
+        results.append(dict(name='env_step_many', grid=grid, length=SCALE_LENGTH, ais=num_ai, **r))
+        env = build_env(num_ai, SCALE_LENGTH, decide_workers=SCALE_WORKERS)
+        r = measure(lambda: env.step(level), lambda: env.restore(snap), min_time=0.2 if quick else 1.0)
+        results.append(dict(name='env_step_parallel', grid=grid, length=SCALE_LENGTH, ais=num_ai, **r))
+    return results
+
+
+def mcts_cases(grid, quick):
+    from agents.mcts_agent import MCTSAgent
+    env = build_env(AGENT_AIS, SCALE_LENGTH, cls=MCTSAgent)
+    ai = env.ai_list[0]
+    ai.search(env)  # builds the forward model
+    steps, start = ai.simulated_steps, time.perf_counter()
+    r = measure(lambda: ai.search(env), min_time=0.5 if quick else 2.0)
+    r['steps_per_s'] = round((ai.simulated_steps - steps) / (time.perf_counter() - start))
+    return [dict(name='mcts_search', grid=grid, length=SCALE_LENGTH, ais=AGENT_AIS, **r)]
+
+
+def worker(grid, quick):
+    results = []
+    for length in LENGTHS:
+        if (AGENT_AIS + 1) * length <= grid * grid // 3:
+            results += agent_cases(grid, length, quick)
+    for num_ai in AI_COUNTS:
+        if (num_ai + 1) * STEP_LENGTH <= grid * grid // 3:
+            results += env_cases(grid, num_ai, quick)
+    if grid == SCALE_GRID:
+        results += scale_cases(grid, quick)
+    if grid == MCTS_GRID:
+        results += mcts_cases(grid, quick)
+    return results
+
+
+# -------------------------
+# Driver
+# -------------------------
+def run(grids, quick):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for grid in grids:
+        env = dict(os.environ, SNAKE_GRID_SIZE=str(grid), SNAKE_CELL_SIZE=str(max(3, 600 // grid)),
+                   SNAKE_VIEW_CELLS=str(grid), SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+        cmd = [sys.executable, '-m', 'benchmarks.run', '--worker', str(grid)] + (['--quick'] if quick else [])
+        proc = subprocess.run(cmd, cwd=root, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"grid {grid} worker failed:\n{proc.stderr}")
+        results += json.loads(proc.stdout)
+        print(f"grid {grid}: {len(results)} cases so far", file=sys.stderr)
+    return {'meta': {'python': platform.python_version(), 'machine': platform.machine(), 'platform': platform.platform(),
+                     'quick': quick, 'seed': SEED, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def scaling(results):
+    """Exponent of step time against snake count (log-log least squares over env_step_many), or None"""
+    points = [(math.log(r['ais'] + 1), math.log(r['median_us'])) for r in results if r['name'] == 'env_step_many']
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    return sum((x - mx) * (y - my) for x, y in points) / sum((x - mx) ** 2 for x, _ in points)
+
+
+def case_key(r):
+    return (r['name'], r['grid'], r['length'], r['ais'])
+
+
+def compare(current, baseline, threshold):
+    """Print new/old median ratios; returns the regressed cases"""
+    old = {case_key(r): r for r in baseline['results']}
+    regressions = []
+    print(f"{'case':<34}{'old us':>12}{'new us':>12}{'ratio':>8}")
+    for r in current['results']:
+        b = old.get(case_key(r))
+        if b is None:
+            continue
+        ratio = r['median_us'] / max(b['median_us'], 1e-9)
+        flag = 'REGRESSION' if ratio > 1 + threshold else 'faster' if ratio < 1 / (1 + threshold) else ''
+        label = f"{r['name']} g{r['grid']} l{r['length']} a{r['ais']}"
+        print(f"{label:<34}{b['median_us']:>12.1f}{r['median_us']:>12.1f}{ratio:>8.2f}  {flag}")
+        if flag == 'REGRESSION':
+            regressions.append(r)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Time AI, step and draw hot paths.')
+    parser.add_argument('--grids', default=','.join(map(str, GRIDS)), help='comma-separated grid sizes')
+    parser.add_argument('--quick', action='store_true', help='shorter timing loops (noisier)')
+    parser.add_argument('--out', default=None, help='write the results JSON here (default: stdout unless comparing)')
+    parser.add_argument('--compare', default=None, help='baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed median slowdown before flagging')
+    parser.add_argument('--worker', type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker is not None:
+        json.dump(worker(args.worker, args.quick), sys.stdout)
+        return
+    current = run([int(g) for g in args.grids.split(',')], args.quick)
+    exponent = scaling(current['results'])
+    if exponent is not None:
+        per_snake = ', '.join(f"{r['ais']}: {r['median_us'] / (r['ais'] + 1):.0f}us"
+                              for r in current['results'] if r['name'] == 'env_step_many')
+        print(f"env_step per snake ({per_snake}); time ~ snakes^{exponent:.2f}", file=sys.stderr)
+        serial = {r['ais']: r['median_us'] for r in current['results'] if r['name'] == 'env_step_many'}
+        speedup = ', '.join(f"{r['ais']}: {serial[r['ais']] / r['median_us']:.2f}x"
+                            for r in current['results'] if r['name'] == 'env_step_parallel')
+        print(f"env_step with {SCALE_WORKERS} decide threads ({speedup})", file=sys.stderr)
+    slow_mcts = [r for r in current['results'] if r['name'] == 'mcts_search' and r['steps_per_s'] < MCTS_TARGET]
+    for r in current['results']:
+        if r['name'] == 'mcts_search':
+            flag = '  BELOW TARGET' if r in slow_mcts else ''
+            print(f"mcts_search: {r['steps_per_s']} simulated steps/s (target {MCTS_TARGET}){flag}", file=sys.stderr)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1)
+    elif not args.compare:
+        json.dump(current, sys.stdout, indent=1)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+        if regressions or slow_mcts:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
 # core/config.py
+import os
 
-GRID_SIZE = 20
-CELL_SIZE = 30
-WINDOW_WIDTH = GRID_SIZE * CELL_SIZE
-WINDOW_HEIGHT = GRID_SIZE * CELL_SIZE
+# SNAKE_GRID_SIZE / SNAKE_CELL_SIZE / SNAKE_VIEW_CELLS / SNAKE_DECIDE_WORKERS override the settings below per process
+# (benchmarks run one size per worker)
+GRID_SIZE = int(os.environ.get('SNAKE_GRID_SIZE', 20))
+CELL_SIZE = int(os.environ.get('SNAKE_CELL_SIZE', 30))
+# cells across the window; the camera scrolls arenas larger than this
+VIEW_CELLS = min(GRID_SIZE, int(os.environ.get('SNAKE_VIEW_CELLS', 20)))
+WINDOW_WIDTH = VIEW_CELLS * CELL_SIZE
+WINDOW_HEIGHT = VIEW_CELLS * CELL_SIZE
+MINIMAP_SIZE = 150  # pixels; shown when the arena is larger than the window
 
-BASE_FPS = 5
+BASE_FPS = 5                # simulation ticks per second at level 1
 FPS_INCREMENT = 1
+RENDER_FPS = 60             # input polling and drawing, independent of the tick rate
+MAX_TICKS_PER_FRAME = 5     # catch-up limit after a stall, instead of fast-forwarding the game
+INPUT_QUEUE_SIZE = 3        # key turns buffered for the human, applied one per tick
 LEVEL_UP_SCORE = 5
 
+# AI decision workers: 0 moves the AIs one after another, each seeing the moves before it;
+# n >= 1 decides them all against the tick-start board on n threads, then moves them. Only faster
+# on a free-threaded build or with numpy-heavy agents (MCTS), and the AIs play worse on the stale board
+DECIDE_WORKERS = int(os.environ.get('SNAKE_DECIDE_WORKERS', 0))
+
 BASE_SENSING_RANGE = 3
 BASE_SMARTNESS = 1
 
@@ -21,3 +35,7 @@ FONT_NAME = 'Arial'
 BUTTERFLY_MODE = True        # enable butterfly perturbation experiment
 BUTTERFLY_STEP = 30         # step when tiny perturbation happens (1-based)
 EVENT_LOG_PATH = "events/log.csv"  # events log to record runs
+EVENT_LOG_BUFFER = 512              # events kept in memory before a batched write
+EVENT_LOG_MAX_BYTES = 5_000_000     # rotate events/log.csv -> log.csv.1 ... past this size
+EVENT_LOG_BACKUPS = 5
+REPLAY_DIR = "replays"              # one recording per game, replayable with python -m game.replay
@@ -0,0 +1,103 @@
+# game/bitboard.py
+from core.config import GRID_SIZE
+
+_BOARDS = {}
+BIT_TABLE_MAX_SIZE = 100  # larger boards compute cell bits on demand
+
+
+def bitboard(size=GRID_SIZE):
+    """Shared Bitboard for a board size"""
+    if size not in _BOARDS:
+        _BOARDS[size] = Bitboard(size)
+    return _BOARDS[size]
+
+
+class Bitboard:
+    """
+    Grid sets as Python ints: cell (x, y) is bit y*stride + x.
+
+    Each row carries one spare guard bit (stride = size + 1) that is never part
+    of the board, so shifting by 1 cannot wrap a cell into the next row and a
+    flood fill step is four shifts and a mask over the whole board at once.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 1
+        row = (1 << size) - 1
+        self.board = sum(row << (y * self.stride) for y in range(size))
+        self.nbytes = (size * self.stride + 7) // 8
+        # one int per cell is fastest but takes O(size**4) bits: gigabytes on a 1000x1000 board
+        self.bits = {(x, y): 1 << (y * self.stride + x) for x in range(size) for y in range(size)} \
+            if size <= BIT_TABLE_MAX_SIZE else None
+
+    def bit(self, cell):
+        if self.bits is not None:
+            return self.bits.get(cell, 0)
+        x, y = cell
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return 1 << (y * self.stride + x)
+        return 0
+
+    def mask(self, cells):
+        """Bits of every in-board cell in cells"""
+        bits = self.bits
+        if bits is not None:
+            m = 0
+            for c in cells:
+                m |= bits.get(c, 0)
+            return m
+        size, stride = self.size, self.stride
+        buf = bytearray(self.nbytes)  # OR-ing big ints cell by cell would be O(cells * board)
+        for x, y in cells:
+            if 0 <= x < size and 0 <= y < size:
+                i = y * stride + x
+                buf[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(buf, 'little')
+
+    def cells(self, m):
+        """Decode a mask back into (x, y) cells"""
+        out = []
+        while m:
+            low = m & -m
+            i = low.bit_length() - 1
+            y, x = divmod(i, self.stride)
+            out.append((x, y))
+            m ^= low
+        return out
+
+    def grow(self, m, free):
+        """m plus its 4-neighbours that are in free"""
+        s = self.stride
+        return m | (((m << 1) | (m >> 1) | (m << s) | (m >> s)) & free)
+
+    def flood(self, start, blocked, limit=None):
+        """
+        Mask of cells reachable from start without entering blocked (start
+        itself always counts). Stops early once limit cells are reached.
+        """
+        free = self.board & ~blocked
+        reach = self.bit(start)
+        while True:
+            nxt = self.grow(reach, free)
+            if nxt == reach:
+                return reach
+            reach = nxt
+            if limit is not None and reach.bit_count() >= limit:
+                return reach
+
+    def reachable_count(self, start, blocked, limit=None):
+        n = self.flood(start, blocked, limit).bit_count()
+        return n if limit is None else min(n, limit)
+
+    def is_reachable(self, start, goal, blocked):
+        """True if goal can be reached from start; stops as soon as it is"""
+        free = self.board & ~blocked
+        goal_bit = self.bit(goal)
+        reach = self.bit(start)
+        while not reach & goal_bit:
+            nxt = self.grow(reach, free)
+            if nxt == reach:
+                return False
+            reach = nxt
+        return True
@@ -0,0 +1,125 @@
+# game/blockers.py
+from itertools import count
+from core.config import GRID_SIZE
+from game.bitboard import bitboard
+
+JOURNAL_MAX = 1 << 16  # change records kept for incremental planners; older ones force a full resync
+_EPOCHS = count()
+
+
+class Blockers:
+    """
+    Live multiset of the cells snake segments and obstacles stand on, with the
+    same cells as a Bitboard mask.
+
+    The environment keeps it in step with the occupancy grid (food excluded),
+    so during the AI phase it already reflects the snakes that moved earlier in
+    the tick. An agent asks for its view instead of collecting every other
+    snake's body into a set of its own, which made a tick O(snakes^2).
+
+    Every cell that becomes blocked or free is appended to a journal, so an
+    incremental planner can ask what changed since its last repair
+    (changes_since) instead of diffing the whole board. load() and clear()
+    start a new epoch, which invalidates every version handed out before.
+    """
+
+    def __init__(self, size=GRID_SIZE):
+        self.board = bitboard(size)
+        self.counts = {}  # cell -> segments/obstacles on it
+        self.bits = 0
+        self._reset_journal()
+
+    def add(self, cell):
+        n = self.counts.get(cell, 0)
+        self.counts[cell] = n + 1
+        if n == 0:
+            self.bits |= self.board.bit(cell)
+            self._changed(cell)
+
+    def remove(self, cell):
+        n = self.counts.get(cell, 0)
+        if n > 1:
+            self.counts[cell] = n - 1
+        elif n == 1:
+            del self.counts[cell]
+            self.bits &= ~self.board.bit(cell)
+            self._changed(cell)
+
+    def load(self, cells):
+        """Reset to the given cells (repeats count twice) in one go"""
+        counts = self.counts = {}
+        for c in cells:
+            counts[c] = counts.get(c, 0) + 1
+        self.bits = self.board.mask(counts)
+        self._reset_journal()
+
+    def clear(self):
+        self.counts = {}
+        self.bits = 0
+        self._reset_journal()
+
+    # -------------------------
+    # Change journal
+    # -------------------------
+    def _reset_journal(self):
+        self.epoch = next(_EPOCHS)  # unique across instances, so a fork's versions never match the original's
+        self.journal = []
+        self.journal_base = 0       # version of journal[0]
+
+    def _changed(self, cell):
+        journal = self.journal
+        journal.append(cell)
+        if len(journal) > JOURNAL_MAX:
+            drop = len(journal) // 2
+            del journal[:drop]
+            self.journal_base += drop
+
+    def version(self):
+        """(epoch, position) token for changes_since"""
+        return self.epoch, self.journal_base + len(self.journal)
+
+    def changes_since(self, version):
+        """Cells whose blocked state may have changed since version, or None when that is no longer known"""
+        if version is None:
+            return None
+        epoch, pos = version
+        if epoch != self.epoch or pos < self.journal_base:
+            return None
+        return self.journal[pos - self.journal_base:]
+
+    def view(self, agent):
+        return BlockedCells(self, agent)
+
+
+class BlockedCells:
+    """
+    The cells one snake must not enter: obstacles, every other snake's body and
+    its own recent positions (agent.memory), for the agent's current turn.
+    Membership is O(1) and building it or its mask() only touches the snake's
+    own cells; iterating lists every blocked cell on the board, which only the
+    whole-board planners need.
+    """
+
+    __slots__ = ('blockers', 'counts', 'memory', 'own')
+
+    def __init__(self, blockers, agent):
+        self.blockers = blockers
+        self.counts = counts = blockers.counts
+        self.memory = set(agent.memory)
+        body = agent.body
+        self.own = {c for c in set(body) if counts.get(c, 0) <= body.count(c)}  # cells only this snake covers
+
+    def __contains__(self, cell):
+        return cell in self.memory or (cell in self.counts and cell not in self.own)
+
+    def __iter__(self):
+        memory, own = self.memory, self.own
+        yield from memory
+        for c in self.counts:
+            if c not in own and c not in memory:
+                yield c
+
+    def mask(self):
+        """Bitboard mask of the blocked cells"""
+        board = self.blockers.board
+        return (self.blockers.bits & ~board.mask(self.own)) | board.mask(self.memory)
@@ -0,0 +1,54 @@
+# game/decide_pool.py
+from concurrent.futures import ThreadPoolExecutor
+
+_POOLS = {}
+
+
+def decide_pool(workers):
+    """Shared DecidePool for a worker count; episodes and forks reuse its threads"""
+    if workers not in _POOLS:
+        _POOLS[workers] = DecidePool(workers)
+    return _POOLS[workers]
+
+
+class DecidePool:
+    """
+    Runs the perceive/decide half of every AI's turn on worker threads.
+
+    The caller guarantees the board does not change while it runs: every agent
+    sees the tick as it stood when the AI phase began and only writes its own
+    state (perception, planned path, D* Lite search). Agents are handed out as
+    one contiguous slice per worker, and every agent has already perceived
+    before any of them decides, because cooperative agents read each other's
+    perception.
+
+    Threads, not processes: the planners live on the agent objects and would
+    have to be pickled both ways every tick. Under the GIL only numpy work (the
+    fields, MCTS rollouts) overlaps; a free-threaded build runs the pure Python
+    planners in parallel too. workers=1 runs the same two phases inline.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='decide') if workers > 1 else None
+
+    def map(self, fn, items):
+        """fn(slice) for one slice of items per worker; the slices' result lists joined in order"""
+        if self.executor is None or len(items) < 2:
+            return fn(items)
+        size = -(-len(items) // self.workers)
+        slices = [items[i:i + size] for i in range(0, len(items), size)]
+        return [r for part in self.executor.map(fn, slices) for r in part]
+
+    def decide(self, turns, food_positions, food_types, obstacles, env):
+        """Directions for turns, a list of (agent, other_snakes) pairs, in the same order"""
+        def perceive(part):
+            for ai, others in part:
+                ai.perceive(food_positions, others, obstacles, env)
+            return []
+
+        def decide(part):
+            return [ai.decide(food_positions, food_types, others, obstacles, env) for ai, others in part]
+
+        self.map(perceive, turns)
+        return self.map(decide, turns)
@@ -0,0 +1,86 @@
+# game/distance_field.py
+import numpy as np
+from game import profiler
+
+
+class DistanceFields:
+    """
+    BFS distance and next-step fields towards each food, shared by every agent for one tick.
+
+    Built from the environment's occupancy grid at the start of the AI phase:
+    snake bodies (own body included) and obstacles block, food cells do not.
+    Each field is computed on first request, so a tick pays one BFS per food
+    that somebody actually asks about instead of one A* per agent per food.
+    dist[i] is the number of moves from cell i to the food (< 0 = unreachable)
+    and nxt[i] is the neighbour one step closer to it.
+
+    Cells are flat indices into the board padded with a blocked border, so the
+    neighbours of i are always i-1, i+1, i-stride and i+stride. When `heads` is
+    given the BFS stops after the layer in which every free neighbour of those
+    cells got its distance, which is all an agent starting a path there reads;
+    on large arenas that keeps the cost near the snakes, not the whole board.
+    """
+
+    def __init__(self, food_positions, occupancy, heads=None):
+        self.size = occupancy.size
+        self.stride = self.size + 2
+        counts = occupancy.counts.copy()
+        for x, y in food_positions:
+            counts[x, y] -= 1
+        # starting dist for every BFS: -2 on blocked cells and the border, -1 on free ones
+        start = np.full((self.stride, self.stride), -2, dtype=np.int8)
+        start[1:-1, 1:-1] = -1 - (counts > 0)
+        self.start = start.ravel().tolist()
+        self.foods = set(food_positions)
+        self.fields = {}
+        self.targets = None
+        if heads is not None:
+            s = self.stride
+            self.targets = {m for c in map(self.index, heads) for m in (c - 1, c + 1, c - s, c + s)
+                            if self.start[m] == -1}
+
+    def index(self, cell):
+        return (cell[0] + 1)*self.stride + cell[1] + 1
+
+    def cell(self, i):
+        x, y = divmod(i, self.stride)
+        return x - 1, y - 1
+
+    def get(self, food):
+        """(dist, nxt) lists for food, or None if the food cell itself is blocked"""
+        if food not in self.fields:
+            self.fields[food] = self._bfs(food) if food in self.foods else None
+        return self.fields[food]
+
+    def _bfs(self, food):
+        s = self.stride
+        src = self.index(food)
+        dist = self.start.copy()
+        if dist[src] != -1:
+            return None
+        waiting = None if self.targets is None else list(self.targets)  # targets without a distance yet
+        nxt = [-1]*len(dist)
+        dist[src] = 0
+        queue = [src]
+        push = queue.append
+        layer = 0
+        for c in queue:  # the list grows while we walk it
+            d = dist[c] + 1
+            if d != layer:  # a new BFS layer: every distance below it is final
+                if waiting is not None:
+                    while waiting and dist[waiting[-1]] >= 0:
+                        waiting.pop()
+                    if not waiting:
+                        break
+                layer = d
+            # unrolled: the padded border means no bounds checks and no neighbour table
+            m = c - 1
+            if dist[m] == -1: dist[m] = d; nxt[m] = c; push(m)
+            m = c + 1
+            if dist[m] == -1: dist[m] = d; nxt[m] = c; push(m)
+            m = c - s
+            if dist[m] == -1: dist[m] = d; nxt[m] = c; push(m)
+            m = c + s
+            if dist[m] == -1: dist[m] = d; nxt[m] = c; push(m)
+        if profiler.active: profiler.active.count('bfs.cells', len(queue))
+        return dist, nxt
@@ -1,33 +1,75 @@
 # game/environment.py
-import pygame, random, math, csv, os
-from core.config import GRID_SIZE, CELL_SIZE, FOOD_PULSE_SPEED, FOOD_PULSE_AMPLITUDE, FONT_NAME, EVENT_LOG_PATH
+import random, csv, os, copy
+from collections import deque, namedtuple
+from time import perf_counter
+from core.config import GRID_SIZE, FOOD_PULSE_SPEED, EVENT_LOG_PATH, DECIDE_WORKERS
 from agents.food_and_obstacle_agents import FoodAgent, BonusAgent, PoisonAgent, ObstacleAgent
+from game.occupancy import OccupancyGrid
+from game.distance_field import DistanceFields
+from game.risk_field import RiskField
+from game.spatial_hash import SpatialHash
+from game.blockers import Blockers
+from game.decide_pool import decide_pool
+from game.event_log import FIELDS, event_row
+from game import profiler
+
+RISK_FIELD_MIN_CELLS = GRID_SIZE * GRID_SIZE // 4
+RISK_FIELD_MAX_SNAKES = 16  # the maps cost O(snakes * board); past this the agents' local queries are cheaper
+FOOD_CLASSES = {'normal': FoodAgent, 'bonus': BonusAgent, 'poison': PoisonAgent}
+DELTAS = {'UP': (0, -1), 'DOWN': (0, 1), 'LEFT': (-1, 0), 'RIGHT': (1, 0)}
+SWERVE_ROOM_LIMIT = 400  # flood fill cap when a simultaneous-move conflict picks a new direction
+
+# Full game state as plain tuples: snakes holds one agent.snapshot() per snake (human first),
+# food (type, position, lifetime) triples, free_cells the occupancy free-list order and rng
+# the random module state, so a restored game draws the same spawns as the original.
+EnvSnapshot = namedtuple('EnvSnapshot', ['step_count', 'obstacle_move_counter', 'pulse_offset', 'snakes',
+                                         'food', 'obstacles', 'dangers', 'free_cells', 'rng'])
+
+class OtherSnakes:
+    """Every snake but one, as the agents' other_snakes argument; O(1) to build, iterates like the list it replaces"""
+    __slots__ = ('snakes', 'me')
+
+    def __init__(self, snakes, me):
+        self.snakes = snakes
+        self.me = me
+
+    def __iter__(self):
+        me = self.me
+        return (s for s in self.snakes if s is not me)
+
+    def __len__(self):
+        return len(self.snakes) - (self.me in self.snakes)
 
-def load_sound(path):
-    try:
-        s = pygame.mixer.Sound(path)
-        s.set_volume(0.5)
-        return s
-    except Exception:
-        return None
 
 class Environment:
-    def __init__(self, human, ai_list, seed=None):
+    def __init__(self, human, ai_list, seed=None, headless=False, event_writer=None, decide_workers=DECIDE_WORKERS):
         self.human = human
         self.ai_list = ai_list
         self.food_agents = []
         self.obstacle_agents = []
         self.pulse_offset = 0.0
-        self.font = pygame.font.SysFont(FONT_NAME, 18)
-        self.eat_sound = load_sound('assets/sounds/eat.wav')
-        self.levelup_sound = load_sound('assets/sounds/levelup.wav')
-        self.gameover_sound = load_sound('assets/sounds/gameover.wav')
+        self.headless = headless  # never plays sounds (batch simulation runs)
+        # font and sounds are loaded with the renderer on the first draw(): simulations never touch pygame
+        self.font = None
+        self.eat_sound = self.levelup_sound = self.gameover_sound = None
+        self.renderer = None
         self.shared_dangers = set()
         self.event_log = []
+        self.event_writer = event_writer  # streams events instead of keeping them in event_log
         self.step_count = 0
         self.seed = seed
         if seed is not None:
             random.seed(seed)
+        self.occupancy = OccupancyGrid()
+        self.spatial = SpatialHash()  # bucketed index behind agents' perceive()
+        self.blockers = Blockers()    # snake and obstacle cells, what agents may not move into
+        self.snake_cells = {}  # agent -> deque of the cells registered in self.occupancy
+        self.distance_fields = None  # shared per-tick BFS fields towards each food
+        self.risk_field = None       # shared per-tick obstacle/body/head distance maps
+        # AIs decide one after another (None) or all at once against the tick-start board
+        self.decide_pool = decide_pool(decide_workers) if decide_workers > 0 else None
+        for agent in [self.human] + self.ai_list:
+            self.register_snake(agent)
         self.spawn_food_initial()
         if not os.path.exists('events'):
             os.makedirs('events')
@@ -38,11 +80,18 @@ class Environment:
     # Event log & broadcast
     # -------------------------
     def log_event(self, kind, action, agent_id, pos=None, extra=None):
-        self.event_log.append({'step': self.step_count, 'kind': kind, 'action': action, 'agent': agent_id, 'pos': pos, 'extra': extra})
+        ev = {'step': self.step_count, 'kind': kind, 'action': action, 'agent': agent_id, 'pos': pos, 'extra': extra}
+        if self.event_writer is not None:
+            self.event_writer.write(ev)
+        else:
+            self.event_log.append(ev)
 
     def broadcast(self, msg):
         if msg['type'] == 'danger':
-            self.shared_dangers.add(tuple(msg['pos']))
+            pos = tuple(msg['pos'])
+            if pos not in self.shared_dangers:
+                self.shared_dangers.add(pos)
+                self.spatial.add('danger', pos)
             self.log_event('broadcast', 'danger_broadcast', msg.get('from'), tuple(msg.get('pos')))
 
     # -------------------------
@@ -50,94 +99,258 @@ class Environment:
     # -------------------------
     def spawn_food_initial(self):
         """Spawn 3 foods at the start (mix of normal, bonus, poison)"""
+        for f in self.food_agents:
+            self.untrack('food', f.position)
         self.food_agents = []
         while len(self.food_agents) < 3:
-            self.spawn_food(1)
+            if not self.spawn_food(1):
+                break
 
     def spawn_food(self, count=1):
+        """Spawn up to count foods on free cells; returns how many were placed"""
+        placed = 0
         for _ in range(count):
-            tries = 0
-            while True:
-                p = (random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1))
-                if p not in self.all_occupied():
-                    r = random.random()
-                    if r < 0.7:
-                        f = FoodAgent(p)
-                        f.type = 'normal'
-                    elif r < 0.9:
-                        f = BonusAgent(p)
-                        f.type = 'bonus'
-                        f.lifetime = 300  # bonus disappears after 300 steps
-                    else:
-                        f = PoisonAgent(p)
-                        f.type = 'poison'
-                    self.food_agents.append(f)
-                    self.log_event('spawn','food_spawned', None, p, extra={'type': f.type})
-                    break
-                tries += 1
-                if tries > 200: break
+            p = self.occupancy.sample_free()
+            if p is None:
+                break
+            r = random.random()
+            if r < 0.7:
+                f = FoodAgent(p)
+                f.type = 'normal'
+            elif r < 0.9:
+                f = BonusAgent(p)
+                f.type = 'bonus'
+                f.lifetime = 300  # bonus disappears after 300 steps
+            else:
+                f = PoisonAgent(p)
+                f.type = 'poison'
+            self.food_agents.append(f)
+            self.track('food', p)
+            self.log_event('spawn','food_spawned', None, p, extra={'type': f.type})
+            placed += 1
+        return placed
+
+    def remove_food(self, food):
+        if food in self.food_agents:
+            self.food_agents.remove(food)
+            self.untrack('food', food.position)
 
     def spawn_obstacles(self, count=3):
-        added = 0
-        attempts = 0
-        while added < count and attempts < 300:
-            p = (random.randint(0, GRID_SIZE-1), random.randint(0, GRID_SIZE-1))
-            if p not in self.all_occupied():
-                self.obstacle_agents.append(ObstacleAgent(p))
-                added += 1
-                self.log_event('spawn','obstacle_spawned', None, p)
-            attempts += 1
+        for _ in range(count):
+            p = self.occupancy.sample_free()
+            if p is None:
+                break
+            self.obstacle_agents.append(ObstacleAgent(p))
+            self.track('obstacle', p)
+            self.log_event('spawn','obstacle_spawned', None, p)
+
+    def spawn_for_level(self, level):
+        """Extra obstacles/food added when the game reaches a new level"""
+        if level == 2:
+            self.spawn_obstacles(2)
+        elif level == 3:
+            self.spawn_obstacles(3)
+            self.spawn_food(1)
+        elif level >= 4:
+            self.spawn_obstacles(4)
+            self.spawn_food(2)
+
+    # -------------------------
+    # Occupancy bookkeeping
+    # -------------------------
+    def track(self, kind, cell, owner=None):
+        """Record an entity in the occupancy grid and the perception index"""
+        self.occupancy.add(cell)
+        self.spatial.add(kind, cell, owner)
+        if kind != 'food':
+            self.blockers.add(cell)
+
+    def untrack(self, kind, cell, owner=None):
+        self.occupancy.remove(cell)
+        self.spatial.remove(kind, cell, owner)
+        if kind != 'food':
+            self.blockers.remove(cell)
+
+    def register_snake(self, agent):
+        cells = deque(agent.body)
+        for c in cells:
+            self.track('snake', c, agent)
+        self.snake_cells[agent] = cells
+
+    def sync_snake(self, agent):
+        """
+        Bring the occupancy grid and spatial index in line with agent.body after it stepped.
+        Bodies only grow at the head and shrink at the tail, so this is O(cells changed).
+        """
+        cells = self.snake_cells[agent]
+        body = agent.body
+        if body and (not cells or body[0] != cells[0]):
+            cells.appendleft(body[0])
+            self.track('snake', body[0], agent)
+        while len(cells) > len(body):
+            self.untrack('snake', cells.pop(), agent)
+        if len(cells) != len(body):
+            # body was edited some other way: re-register from scratch
+            for c in cells:
+                self.untrack('snake', c, agent)
+            self.register_snake(agent)
+
+    def rebuild_occupancy(self):
+        """Recompute grid and spatial index from scratch (after editing bodies/food/obstacles directly)"""
+        self.occupancy.clear()
+        self.spatial.clear()
+        self.blockers.clear()
+        for agent in [self.human] + self.ai_list:
+            self.register_snake(agent)
+        for o in self.obstacle_agents:
+            self.track('obstacle', o.position)
+        for f in self.food_agents:
+            self.track('food', f.position)
+        for d in self.shared_dangers:
+            self.spatial.add('danger', d)
 
     # -------------------------
-    # Helpers
+    # Snapshot / restore / fork
     # -------------------------
-    def all_occupied(self):
-        occ = []
-        occ += list(self.human.body)
-        for a in self.ai_list:
-            occ += list(a.body)
+    def snapshot(self):
+        """Compact copy of the full game state; shares nothing mutable with the live game"""
+        return EnvSnapshot(self.step_count, self.obstacle_move_counter, self.pulse_offset,
+                           tuple(a.snapshot() for a in [self.human] + self.ai_list),
+                           tuple((f.type, f.position, getattr(f, 'lifetime', None)) for f in self.food_agents),
+                           tuple(o.position for o in self.obstacle_agents),
+                           tuple(self.shared_dangers), tuple(self.occupancy.free), random.getstate())
+
+    def restore(self, snap, rng=True):
+        """
+        Put the game back into a snapshot's state. Agent objects are kept and updated in
+        place; the event log is left alone. rng=False keeps the current random state.
+        Raises ValueError when snap.free_cells does not match the cells the snapshot's
+        snakes, food and obstacles leave free, e.g. after editing its bodies by hand.
+        """
+        agents = [self.human] + self.ai_list
+        if len(snap.snakes) != len(agents):
+            raise ValueError(f"snapshot has {len(snap.snakes)} snakes, environment has {len(agents)}")
+        self.step_count, self.obstacle_move_counter, self.pulse_offset = snap.step_count, snap.obstacle_move_counter, snap.pulse_offset
+        for agent, state in zip(agents, snap.snakes):
+            agent.restore(state)
+        self.food_agents = []
+        for ftype, pos, lifetime in snap.food:
+            f = FOOD_CLASSES[ftype](pos)
+            if lifetime is not None:
+                f.lifetime = lifetime
+            self.food_agents.append(f)
+        self.obstacle_agents = [ObstacleAgent(p) for p in snap.obstacles]
+        self.shared_dangers = set(snap.dangers)
+
+        # same as rebuild_occupancy, but the grid is loaded in one go with the snapshot's free-list order
+        spatial = self.spatial
+        spatial.clear()
+        occupied = []
+        for agent in agents:
+            cells = deque(agent.body)
+            for c in cells:
+                spatial.add('snake', c, agent)
+            self.snake_cells[agent] = cells
+            occupied.extend(cells)
         for o in self.obstacle_agents:
-            occ.append(o.position)
+            spatial.add('obstacle', o.position)
+            occupied.append(o.position)
+        self.blockers.load(occupied)
         for f in self.food_agents:
-            occ.append(f.position)
-        return occ
+            spatial.add('food', f.position)
+            occupied.append(f.position)
+        for d in self.shared_dangers:
+            spatial.add('danger', d)
+        self.occupancy.load(occupied, snap.free_cells)
+        self.distance_fields = None
+        self.risk_field = None
+        if rng:
+            random.setstate(snap.rng)
+
+    def fork(self):
+        """
+        Independent copy of the game for lookahead and what-if runs. It is silent, logs
+        to its own event_log and shares the font. random is a global module, so fork()
+        does not touch it: take a snapshot() first to rewind it afterwards.
+        """
+        clone = Environment.__new__(Environment)
+        clone.__dict__.update(self.__dict__)
+        clone.human = copy.copy(self.human)
+        clone.ai_list = [copy.copy(a) for a in self.ai_list]
+        clone.eat_sound = clone.levelup_sound = clone.gameover_sound = None
+        clone.headless = True  # stays silent even if drawn
+        clone.event_log = []
+        clone.event_writer = None
+        clone.renderer = None
+        clone.occupancy = OccupancyGrid(self.occupancy.size)
+        clone.spatial = SpatialHash(self.spatial.bucket)
+        clone.blockers = Blockers(self.occupancy.size)
+        clone.snake_cells = {}
+        clone.restore(self.snapshot(), rng=False)
+        return clone
 
     # -------------------------
     # Step function
     # -------------------------
+    def build_fields(self):
+        """One set of food distance fields and risk maps for every AI this tick"""
+        heads = [ai.body[0] for ai in self.ai_list if ai.alive and ai.body]
+        self.distance_fields = DistanceFields([f.position for f in self.food_agents], self.occupancy, heads)
+        # the maps cost O(snakes * board) per tick; with short snakes or many of them the agents' local scan is cheaper
+        snake_cells = sum(len(c) for c in self.snake_cells.values())
+        if self.ai_list and snake_cells >= RISK_FIELD_MIN_CELLS and len(self.ai_list) + 1 <= RISK_FIELD_MAX_SNAKES:
+            self.risk_field = RiskField([self.human] + self.ai_list, [o.position for o in self.obstacle_agents])
+        else:
+            self.risk_field = None
+
     def step(self, level):
+        prof = profiler.active  # None unless profiling; phases are timed as laps from t
+        if prof: start = t = perf_counter()
         self.step_count += 1
         self.pulse_offset += 1.0 / FOOD_PULSE_SPEED
 
+        # food and obstacles stay put until every snake has moved: one view of them for the whole tick
+        foods = [f.position for f in self.food_agents]
+        food_types = {f.position: f.type for f in self.food_agents}
+        obstacles = [o.position for o in self.obstacle_agents]
+        snakes = [self.human] + self.ai_list
+
         # human acts
-        self.human.step([f.position for f in self.food_agents], {f.position: f.type for f in self.food_agents}, [o.position for o in self.obstacle_agents])
+        self.human.step(list(foods), dict(food_types), obstacles)  # it drops what it eats from its copies
+        self.sync_snake(self.human)
+        if prof: t = prof.lap('human', t)
+
+        self.build_fields()
+        if prof: t = prof.lap('fields', t)
 
         # AI acts
-        for ai in self.ai_list:
-            events = ai.step([f.position for f in self.food_agents],
-                             {f.position: f.type for f in self.food_agents},
-                             [self.human] + [x for x in self.ai_list if x is not ai],
-                             [o.position for o in self.obstacle_agents], self)
-            for e in events:
-                pass
+        if self.decide_pool is None:
+            for ai in self.ai_list:
+                events = ai.step(foods, food_types, OtherSnakes(snakes, ai), obstacles, self)
+                self.sync_snake(ai)
+                for e in events:
+                    pass
+        else:
+            self.step_simultaneous(foods, food_types, obstacles, snakes)
+        if prof: t = prof.lap('ai', t)
 
         # centralized eating
+        food_at = {}
+        for f in self.food_agents:
+            food_at.setdefault(f.position, f)
         eaten_positions = []
-        for agent in [self.human] + self.ai_list:
+        for agent in snakes:
             head = agent.body[0] if agent.alive else None
-            if head:
-                for f in self.food_agents:
-                    if head == f.position:
-                        eaten_positions.append((agent, f))
-                        break
+            if head and head in food_at:
+                eaten_positions.append((agent, food_at[head]))
         for agent, food in eaten_positions:
-            if food in self.food_agents:
-                self.food_agents.remove(food)
+            self.remove_food(food)
             if self.eat_sound:
                 try: self.eat_sound.play()
                 except: pass
             agent.score += 3 if food.type=='bonus' else -2 if food.type=='poison' else 1
             self.log_event('eat','food_eaten', agent.id, food.position, extra={'type': food.type})
+        if prof: t = prof.lap('eat', t)
 
         # update bonus food lifetime
         for f in self.food_agents[:]:
@@ -145,10 +358,12 @@ class Environment:
                 if hasattr(f, 'lifetime'):
                     f.lifetime -= 1
                     if f.lifetime <= 0:
-                        self.food_agents.remove(f)
+                        self.remove_food(f)
         # ensure max 3 foods
         while len(self.food_agents) < 3:
-            self.spawn_food(1)
+            if not self.spawn_food(1):
+                break
+        if prof: t = prof.lap('food', t)
 
         # obstacles move slowly
         self.obstacle_move_counter += 1
@@ -157,65 +372,96 @@ class Environment:
             for obs in self.obstacle_agents:
                 old = obs.position
                 obs.step()
+                self.untrack('obstacle', old)
+                self.track('obstacle', obs.position)
                 self.log_event('move', 'obstacle_moved', None, {'from': old, 'to': obs.position})
+        if prof:
+            prof.lap('obstacles', t)
+            prof.lap('step', start)
+            prof.end_tick()
+
+    def step_simultaneous(self, foods, food_types, obstacles, snakes):
+        """
+        AI phase in two steps: every live AI decides on the decide_pool against
+        the board as it is now, then the moves are applied in roster order (an
+        AI whose cell another one entered first swerves). Nothing writes to the
+        board while the pool runs; a distance field two threads ask for at once
+        is just computed twice. Each AI's jitter comes from its own Random,
+        seeded here in roster order, so the game does not depend on the worker
+        count.
+        """
+        prof = profiler.active
+        if prof: t = perf_counter()
+        turns = [(ai, OtherSnakes(snakes, ai)) for ai in self.ai_list if ai.alive]
+        for ai, _ in turns:
+            ai.noise = random.Random(random.getrandbits(64))
+        directions = self.decide_pool.decide(turns, foods, food_types, obstacles, self)
+        if prof: t = prof.lap('ai.decide_all', t)
+        taken = set()  # heads placed so far in this phase
+        for (ai, others), direction in zip(turns, directions):
+            if self.next_cell(ai, direction) in taken:
+                direction = self.swerve(ai, direction)
+            ai.act(direction, foods, food_types, others, obstacles, self)
+            self.sync_snake(ai)
+            if ai.alive:
+                taken.add(ai.body[0])
+
+    def next_cell(self, snake, direction):
+        dx, dy = DELTAS.get(direction, (0, 0))
+        x, y = snake.body[0]
+        return max(0, min(GRID_SIZE - 1, x + dx)), max(0, min(GRID_SIZE - 1, y + dy))
+
+    def swerve(self, snake, direction):
+        """The roomiest free direction for a snake whose decided cell another AI entered first this tick"""
+        board, blocked = self.blockers.board, self.blockers.bits
+        best, best_room = direction, -1
+        for d in DELTAS:
+            cell = self.next_cell(snake, d)
+            if cell != snake.body[0] and cell not in self.blockers.counts:
+                room = board.reachable_count(cell, blocked, SWERVE_ROOM_LIMIT)
+                if room > best_room:
+                    best, best_room = d, room
+        return best
 
     # -------------------------
     # Draw function
     # -------------------------
-    def draw(self, screen, level):
-        screen.fill((6,6,20))
+    def draw(self, screen, level, alpha=1.0):
+        """
+        Repaint what changed since the last frame; returns the rects for pygame.display.update.
+        alpha in [0, 1) draws moving heads and tails that far between the last tick and this one.
+        """
+        if self.renderer is None:
+            self.renderer = self.create_renderer()
+        prof = profiler.active
+        if prof: t = perf_counter()
+        dirty = self.renderer.draw(screen, self, level, alpha)
+        if prof: prof.lap('draw', t)
+        return dirty
 
-        # draw food
-        for f in self.food_agents:
-            fx = f.position[0]*CELL_SIZE + CELL_SIZE//2
-            fy = f.position[1]*CELL_SIZE + CELL_SIZE//2
-            base = CELL_SIZE//2 - 4
-            pulse = int((1 + 0.5 * (1 + math.sin(self.pulse_offset))) * (FOOD_PULSE_AMPLITUDE/2))
-            size = max(6, base + pulse)
-            color = (255,255,0) if f.type=='normal' else (0,255,255) if f.type=='bonus' else (255,0,255)
-            pygame.draw.circle(screen, color, (fx, fy), size//2)
-
-        # draw obstacles if level >=2
-        if level >= 2:
-            for o in self.obstacle_agents:
-                pygame.draw.rect(screen, (120,120,120), (o.position[0]*CELL_SIZE, o.position[1]*CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-        # draw human
-        for seg in self.human.body:
-            pygame.draw.rect(screen, self.human.color, (seg[0]*CELL_SIZE, seg[1]*CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-        # draw alive AI snakes only
-        colors = [(0,0,200),(0,0,200),(0,0,200),(0,0,200)]
-        for idx, a in enumerate(self.ai_list):
-            if a.alive:
-                for seg in a.body:
-                    pygame.draw.rect(screen, colors[idx%len(colors)], (seg[0]*CELL_SIZE, seg[1]*CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-        # HUD
-        y = 6
-        txt = self.font.render(f"Level: {level}", True, (255,255,255))
-        screen.blit(txt, (8, y))
-        y += 22
-        scr = self.font.render(f"Human: {self.human.score}", True, self.human.color)
-        screen.blit(scr, (8, y))
-        y += 18
-        for idx, a in enumerate(self.ai_list):
-            s = self.font.render(f"AI{idx+1}: {a.score}", True, colors[idx%len(colors)])
-            screen.blit(s, (8, y))
-            y += 18
+    def create_renderer(self):
+        """Import the pygame side and load the font (and sounds unless headless) on first use"""
+        from game.renderer import Renderer, default_font, load_sound
+        if self.font is None:
+            self.font = default_font()
+        if not self.headless:
+            self.eat_sound = load_sound('assets/sounds/eat.wav')
+            self.levelup_sound = load_sound('assets/sounds/levelup.wav')
+            self.gameover_sound = load_sound('assets/sounds/gameover.wav')
+        return Renderer(self.font)
 
     # -------------------------
     # Save event log
     # -------------------------
     def save_event_log(self, path=EVENT_LOG_PATH):
+        """Write the in-memory log to path, or flush the streaming writer if one is attached"""
+        if self.event_writer is not None:
+            self.event_writer.flush()
+            return
         if not self.event_log:
             return
         with open(path, 'w', newline='', encoding='utf-8') as f:
-            keys = ['step','kind','action','agent','pos','extra']
-            writer = csv.DictWriter(f, fieldnames=keys)
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
             writer.writeheader()
             for ev in self.event_log:
-                row = {k: ev.get(k) for k in keys}
-                row['pos'] = str(ev.get('pos'))
-                row['extra'] = str(ev.get('extra'))
-                writer.writerow(row)
\ No newline at end of file
+                writer.writerow(event_row(ev))
\ No newline at end of file
@@ -0,0 +1,166 @@
+# game/event_log.py
+import atexit, csv, os, queue, threading, time
+
+FIELDS = ['step', 'kind', 'action', 'agent', 'pos', 'extra']
+
+
+def event_row(ev):
+    """CSV row in the format save_event_log has always written"""
+    row = {k: ev.get(k) for k in FIELDS}
+    row['pos'] = str(ev.get('pos'))
+    row['extra'] = str(ev.get('extra'))
+    return row
+
+
+class EventLogWriter:
+    """
+    Streaming CSV writer for Environment events with bounded memory.
+
+    Events are kept in a buffer of at most buffer_size rows and written in
+    batches when it fills up, when flush_interval seconds have passed since the
+    last write, and on flush()/close(). With background=True batches are
+    written by a worker thread; its queue holds at most max_pending batches, so
+    a slow disk blocks the game instead of growing memory.
+
+    Files are appended to (header written only for new files) and rotated like
+    logging.RotatingFileHandler (path -> path.1 -> ... path.N) once they exceed
+    max_bytes, or when the event step enters a new block of rotate_steps.
+    """
+
+    def __init__(self, path, buffer_size=1024, flush_interval=None, max_bytes=None, rotate_steps=None,
+                 backups=5, append=True, background=False, max_pending=4):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_steps = rotate_steps
+        self.backups = backups
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.closed = False
+        self._file = None
+        self._writer = None
+        self._step_block = None
+        d = os.path.dirname(path)
+        if d and not os.path.exists(d):
+            os.makedirs(d)
+        if not append and os.path.exists(path):
+            os.remove(path)
+
+        self._queue = None
+        self._thread = None
+        self._error = None  # exception the worker hit, raised on the caller's next write/flush/close
+        if background:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._worker, name='event-log-writer', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def write(self, event):
+        self._check_open()
+        self._raise_worker_error()
+        self.buffer.append(event)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush(wait=False)
+        elif self.flush_interval is not None and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(wait=False)
+
+    def flush(self, wait=True):
+        """Hand the buffer to the file (or the worker thread); wait=True blocks until it is on disk"""
+        self._check_open()  # a closed background writer has no worker left to drain the queue
+        batch, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        if self._queue is None:
+            if batch:
+                self._write_batch(batch)
+            if self._file:
+                self._file.flush()
+            return
+        if batch:
+            self._queue.put(batch)
+        if wait:
+            self._queue.join()
+        self._raise_worker_error()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self.closed = True
+            atexit.unregister(self.close)  # otherwise atexit keeps every closed writer and its buffer alive
+            if self._queue is not None:
+                self._queue.put(None)
+                self._thread.join()
+            if self._file:
+                self._file.close()
+                self._file = None
+        self._raise_worker_error()
+
+    # -------------------------
+    # File handling (caller thread, or the worker when background=True)
+    # -------------------------
+    def _worker(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                self._write_batch(batch)
+                if self._file:  # None right after a rotation
+                    self._file.flush()
+            except Exception as e:
+                # keep draining the queue so the game never blocks on it; the caller sees the error
+                if self._error is None:
+                    self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError(f"write to closed event log {self.path}")
+
+    def _raise_worker_error(self):
+        e, self._error = self._error, None
+        if e is not None:
+            raise e
+
+    def _write_batch(self, batch):
+        for ev in batch:
+            if self.rotate_steps:
+                block = (ev.get('step') or 0) // self.rotate_steps
+                if self._step_block is not None and block != self._step_block:
+                    self._rotate()
+                self._step_block = block
+            if self._writer is None:
+                self._open()
+            self._writer.writerow(event_row(ev))
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _open(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+        if new:
+            self._writer.writeheader()
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if not os.path.exists(self.path):
+            return
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i+1}")
+        os.replace(self.path, f"{self.path}.1")
@@ -0,0 +1,382 @@
+# game/event_store.py
+"""
+Binary columnar event log.
+
+A store is a directory:
+
+    events.bin    fixed-width records (RECORD dtype), appended in batches
+    extras.jsonl  side table for 'extra' payloads and non-cell positions (deduplicated)
+    extras.idx    int64 byte offset of every extras line
+    strings.json  kind/action dictionaries (string <-> uint8 code)
+    index.bin     one INDEX row per BLOCK records: min/max step, an agent bitmask
+                  and how many records the row covers
+
+EventStore memory-maps events.bin, so opening a multi-gigabyte log costs
+nothing; slice(steps, agent) first drops whole blocks using the sparse index
+and then filters the survivors with one vectorised mask.
+
+A flush appends the records first and then rewrites only the index rows of the
+blocks it touched, so writing stays linear in the log size. Blocks whose row
+is missing or covers fewer records than the block holds (a crash between the
+two writes) are treated as unindexed: readers always scan them and a writer
+reopening the store re-indexes them.
+
+    python -m game.event_store convert events/log.csv events/log.evb
+    python -m game.event_store dump events/log.evb --steps 100:200 --agent 1
+"""
+import ast, atexit, csv, json, os, sys
+import numpy as np
+
+RECORD = np.dtype([('step', '<i4'), ('kind', 'u1'), ('action', 'u1'), ('agent', '<i2'),
+                   ('x', '<i2'), ('y', '<i2'), ('extra', '<i4')])
+INDEX = np.dtype([('min_step', '<i8'), ('max_step', '<i8'), ('agents', '<u8'), ('count', '<i8')])
+BLOCK = 4096
+INTERN_LIMIT = 4096
+NONE = -1
+
+
+def agent_bit(agent):
+    """Bit of the block agent mask; ids outside 0..62 (and 'no agent') share bit 63"""
+    return 1 << (agent if 0 <= agent < 63 else 63)
+
+
+def _jsonable(v):
+    if isinstance(v, tuple):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _jsonable(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_jsonable(x) for x in v]
+    return v
+
+
+class _Files:
+    def __init__(self, path):
+        self.bin = os.path.join(path, 'events.bin')
+        self.extras = os.path.join(path, 'extras.jsonl')
+        self.extras_idx = os.path.join(path, 'extras.idx')
+        self.strings = os.path.join(path, 'strings.json')
+        self.index = os.path.join(path, 'index.bin')
+
+
+def indexed_blocks(index, n_records):
+    """How many leading blocks the index rows describe completely"""
+    index = index[:-(-n_records // BLOCK)]
+    full = np.minimum(BLOCK, n_records - np.arange(len(index)) * BLOCK)
+    ok = index['count'] == full
+    return len(ok) if ok.all() else int(ok.argmin())
+
+
+def read_index(files, n_records):
+    """The trustworthy prefix of a store's index"""
+    index = np.fromfile(files.index, INDEX) if os.path.exists(files.index) else np.zeros(0, INDEX)
+    return index[:indexed_blocks(index, n_records)]
+
+
+class BinaryEventWriter:
+    """
+    Drop-in alternative to EventLogWriter (write/flush/close) that appends to a
+    binary event store. Buffers buffer_size events, then writes them as one
+    structured array.
+    """
+
+    def __init__(self, path, buffer_size=BLOCK, append=True):
+        self.path = path
+        self.files = _Files(path)
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.closed = False
+        os.makedirs(path, exist_ok=True)
+        if not append:
+            for f in vars(self.files).values():
+                if os.path.exists(f):
+                    os.remove(f)
+        self.strings = {'kind': [], 'action': []}
+        if os.path.exists(self.files.strings):
+            with open(self.files.strings, encoding='utf-8') as f:
+                self.strings = json.load(f)
+        self.codes = {k: {s: i for i, s in enumerate(v)} for k, v in self.strings.items()}
+        self.strings_saved = sum(map(len, self.strings.values()))
+        self.count = os.path.getsize(self.files.bin) // RECORD.itemsize if os.path.exists(self.files.bin) else 0
+        self.n_extras = os.path.getsize(self.files.extras_idx) // 8 if os.path.exists(self.files.extras_idx) else 0
+        self.index = read_index(self.files, self.count)
+        self.n_blocks = len(self.index)   # rows in use; self.index grows by doubling
+        if self.n_blocks * BLOCK < self.count:
+            self._reindex_tail()
+        self.interned = {}  # side-table JSON -> row, so repeated payloads ({'type': 'normal'}) are stored once
+        atexit.register(self.close)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def code(self, column, value):
+        value = '' if value is None else str(value)
+        table = self.codes[column]
+        if value not in table:
+            if len(table) >= 256:
+                raise ValueError(f"more than 256 distinct {column} values")
+            table[value] = len(table)
+            self.strings[column].append(value)
+        return table[value]
+
+    def write(self, event):
+        self._check_open()
+        self.buffer.append(event)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self, wait=True):
+        self._check_open()
+        batch, self.buffer = self.buffer, []
+        if not batch:
+            return
+        rec = np.zeros(len(batch), RECORD)
+        extras = []
+        for i, ev in enumerate(batch):
+            pos = ev.get('pos')
+            side = {}
+            if isinstance(pos, tuple) and len(pos) == 2:
+                x, y = pos
+            elif isinstance(pos, dict) and isinstance(pos.get('to'), tuple):
+                x, y = pos['to']        # obstacle moves: keep the destination in the columns
+                side['pos'] = pos
+            else:
+                x = y = NONE
+                if pos is not None:
+                    side['pos'] = pos
+            if ev.get('extra') is not None:
+                side['extra'] = ev['extra']
+            agent = ev.get('agent')
+            rec[i] = (ev.get('step') or 0, self.code('kind', ev.get('kind')), self.code('action', ev.get('action')),
+                      NONE if agent is None else agent, x, y, NONE)
+            if side:
+                key = json.dumps(_jsonable(side))
+                row = self.interned.get(key)
+                if row is None:
+                    row = self.n_extras + len(extras)
+                    extras.append(key)
+                    if len(self.interned) < INTERN_LIMIT:
+                        self.interned[key] = row
+                rec['extra'][i] = row
+
+        if sum(map(len, self.strings.values())) != self.strings_saved:
+            self._save_strings()  # before the records that use the new codes
+        with open(self.files.bin, 'ab') as f:
+            f.write(rec.tobytes())
+        if extras:
+            with open(self.files.extras, 'ab') as f:
+                offsets = np.empty(len(extras), np.int64)
+                pos = f.tell()
+                for i, line in enumerate(extras):
+                    data = (line + '\n').encode('utf-8')
+                    offsets[i] = pos
+                    f.write(data)
+                    pos += len(data)
+            with open(self.files.extras_idx, 'ab') as f:
+                f.write(offsets.tobytes())
+            self.n_extras += len(extras)
+        self._update_index(rec)
+        self.count += len(rec)
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        atexit.unregister(self.close)  # otherwise atexit keeps every closed writer alive
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError(f"write to closed event store {self.path}")
+
+    def _save_strings(self):
+        tmp = self.files.strings + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.strings, f)
+        os.replace(tmp, self.files.strings)
+        self.strings_saved = sum(map(len, self.strings.values()))
+
+    # -------------------------
+    # Sparse index
+    # -------------------------
+    def _update_index(self, rec):
+        """Fold a batch about to land at self.count into the index and write the rows it touched"""
+        blocks = (self.count + np.arange(len(rec))) // BLOCK
+        first, n_blocks = int(blocks[0]), int(blocks[-1]) + 1
+        self._grow_index(n_blocks)
+        for b in range(first, n_blocks):
+            part = rec[blocks == b]
+            row = self.index[b]
+            row['min_step'] = min(int(row['min_step']), int(part['step'].min()))
+            row['max_step'] = max(int(row['max_step']), int(part['step'].max()))
+            mask = int(row['agents'])
+            for a in np.unique(part['agent']):
+                mask |= agent_bit(int(a))
+            row['agents'] = mask
+            row['count'] += len(part)
+            self.index[b] = row
+        self._write_index(first)
+
+    def _reindex_tail(self):
+        """Rebuild the rows of blocks the index does not fully cover, e.g. after a crash mid-flush"""
+        records = np.memmap(self.files.bin, RECORD, mode='r', shape=(self.count,))
+        first = self.n_blocks
+        self._grow_index(-(-self.count // BLOCK))
+        self.index[first:] = self._empty_rows(len(self.index) - first)
+        for b in range(first, self.n_blocks):
+            part = records[b*BLOCK:(b+1)*BLOCK]
+            mask = 0
+            for a in np.unique(part['agent']):
+                mask |= agent_bit(int(a))
+            self.index[b] = (int(part['step'].min()), int(part['step'].max()), mask, len(part))
+        del records
+        self._write_index(first)
+
+    def _grow_index(self, n_blocks):
+        if n_blocks > len(self.index):
+            grown = self._empty_rows(max(n_blocks, 2 * len(self.index)))
+            grown[:self.n_blocks] = self.index[:self.n_blocks]
+            self.index = grown
+        self.n_blocks = max(self.n_blocks, n_blocks)
+
+    @staticmethod
+    def _empty_rows(n):
+        rows = np.zeros(n, INDEX)
+        rows['min_step'] = np.iinfo(np.int64).max
+        rows['max_step'] = np.iinfo(np.int64).min
+        return rows
+
+    def _write_index(self, first):
+        """Overwrite rows first.. of index.bin in place; everything before them is unchanged"""
+        with open(self.files.index, 'r+b' if os.path.exists(self.files.index) else 'wb') as f:
+            f.seek(first * INDEX.itemsize)
+            f.write(self.index[first:self.n_blocks].tobytes())
+            f.truncate()
+
+
+class EventStore:
+    """Read side: memory-mapped records plus the sparse block index"""
+
+    def __init__(self, path):
+        self.files = _Files(path)
+        size = os.path.getsize(self.files.bin) if os.path.exists(self.files.bin) else 0
+        n = size // RECORD.itemsize
+        self.records = np.memmap(self.files.bin, RECORD, mode='r', shape=(n,)) if n else np.zeros(0, RECORD)
+        self.index = read_index(self.files, n)  # blocks past it are scanned on every slice
+        self.strings = {'kind': [], 'action': []}  # nothing flushed yet: a new or empty store
+        if os.path.exists(self.files.strings):
+            with open(self.files.strings, encoding='utf-8') as f:
+                self.strings = json.load(f)
+        self._extras_idx = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def code(self, column, value):
+        try:
+            return self.strings[column].index(value)
+        except ValueError:
+            raise KeyError(f"no {column} {value!r} in this store") from None
+
+    def slice(self, steps=None, agent=None, kind=None):
+        """
+        Record array (copy) of the events with step in [start, stop), from the given
+        agent (None = any, -1 = events without an agent) and of the given kind.
+        A kind the store has never seen matches nothing.
+        """
+        if kind is not None:
+            if kind not in self.strings['kind']:
+                return np.zeros(0, RECORD)
+            kind_code = self.code('kind', kind)
+        keep = np.ones(len(self.index), bool)
+        lo, hi = steps if steps is not None else (None, None)
+        if lo is not None:
+            keep &= self.index['max_step'] >= lo
+        if hi is not None:
+            keep &= self.index['min_step'] < hi
+        if agent is not None:
+            keep &= (self.index['agents'] & np.uint64(agent_bit(agent))) != 0
+        parts = []
+        unindexed = range(len(self.index), -(-len(self.records) // BLOCK))
+        for b in np.concatenate([np.flatnonzero(keep), unindexed]).astype(np.intp):
+            r = self.records[b*BLOCK:(b+1)*BLOCK]
+            m = np.ones(len(r), bool)
+            if lo is not None:
+                m &= r['step'] >= lo
+            if hi is not None:
+                m &= r['step'] < hi
+            if agent is not None:
+                m &= r['agent'] == agent
+            if kind is not None:
+                m &= r['kind'] == kind_code
+            parts.append(np.asarray(r[m]))
+        return np.concatenate(parts) if parts else np.zeros(0, RECORD)
+
+    def extra(self, i):
+        """Side-table payload of extras row i ({'extra': ..., 'pos': ...})"""
+        if i < 0:
+            return {}
+        if self._extras_idx is None:
+            self._extras_idx = np.fromfile(self.files.extras_idx, np.int64)
+        with open(self.files.extras, 'rb') as f:
+            f.seek(int(self._extras_idx[i]))
+            return json.loads(f.readline())
+
+    def to_dicts(self, records):
+        """Decode records back into log_event-style dicts (tuples come back as lists in side data)"""
+        out = []
+        sides = {}
+        for r in records:
+            i = int(r['extra'])
+            if i not in sides:
+                sides[i] = self.extra(i)
+            side = sides[i]
+            agent = int(r['agent'])
+            pos = side.get('pos', None if r['x'] == NONE else (int(r['x']), int(r['y'])))
+            out.append({'step': int(r['step']), 'kind': self.strings['kind'][r['kind']],
+                        'action': self.strings['action'][r['action']], 'agent': None if agent == NONE else agent,
+                        'pos': pos, 'extra': side.get('extra')})
+        return out
+
+
+def convert_csv(src, dst):
+    """Convert a CSV written by save_event_log/EventLogWriter into a binary store"""
+    writer = BinaryEventWriter(dst, append=False)
+    with open(src, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            def parse(v):
+                return None if v in ('', 'None') else ast.literal_eval(v)
+            writer.write({'step': int(row['step']), 'kind': row['kind'], 'action': row['action'],
+                          'agent': int(row['agent']) if row['agent'] else None,
+                          'pos': parse(row['pos']), 'extra': parse(row['extra'])})
+    writer.close()
+    return writer.count
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m game.event_store')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    c = sub.add_parser('convert', help='CSV event log -> binary store')
+    c.add_argument('src')
+    c.add_argument('dst')
+    d = sub.add_parser('dump', help='print events of a binary store as JSON lines')
+    d.add_argument('path')
+    d.add_argument('--steps', default=None, help='start:stop (stop exclusive)')
+    d.add_argument('--agent', type=int, default=None)
+    d.add_argument('--kind', default=None)
+    args = parser.parse_args(argv)
+    if args.cmd == 'convert':
+        print(f"{convert_csv(args.src, args.dst)} events written to {args.dst}")
+        return
+    store = EventStore(args.path)
+    steps = None
+    if args.steps:
+        a, b = args.steps.split(':')
+        steps = (int(a) if a else None, int(b) if b else None)
+    for ev in store.to_dicts(store.slice(steps, args.agent, args.kind)):
+        sys.stdout.write(json.dumps(ev) + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# game/headless.py
+"""
+Headless batch simulation runner.
+
+Steps Environment as fast as the CPU allows (no window, font, sound or frame
+clock) and writes one JSON line per episode:
+
+    python -m game.headless --episodes 10000 --ai 3 --seed 42 --out results.jsonl
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse, json, random, sys, time
+from agents.human_agent import HumanAgent, OPPOSITE
+from agents.cognitive_ai_agent import CognitiveAIAgent
+from core.config import GRID_SIZE, DECIDE_WORKERS
+from game.environment import Environment
+from game.event_log import EventLogWriter
+from game.event_store import BinaryEventWriter
+from game import profiler
+
+# level-up score per difficulty (same table as main.main)
+DIFFICULTIES = {'Easy': 10, 'Medium': 8, 'Hard': 5}
+HUMAN_POLICIES = ('straight', 'random')
+DELTAS = {'UP': (0,-1), 'DOWN': (0,1), 'LEFT': (-1,0), 'RIGHT': (1,0)}
+HUMAN_START = (5, 5)
+
+
+def start_cells(size=GRID_SIZE):
+    """AI start cells in roster order: the diagonal from (15, 15) while it fits, then every third cell row by row"""
+    cells = [(d, d) for d in range(15, size, 2)]
+    taken = set(cells) | {HUMAN_START}
+    return cells + [(x, y) for y in range(1, size, 3) for x in range(1, size, 3) if (x, y) not in taken]
+
+
+def build_roster(num_ai, personalities=None, with_human=True):
+    """
+    Same starting roster as main.main. personalities optionally gives one
+    CognitiveAIAgent personality dict per AI; with_human=False leaves the human
+    slot empty and dead so AI-only matches can be played.
+    """
+    starts = start_cells()
+    if num_ai > len(starts):
+        raise ValueError(f"{num_ai} AIs do not fit on a {GRID_SIZE}x{GRID_SIZE} board (at most {len(starts)})")
+    human = HumanAgent(0, HUMAN_START)
+    if not with_human:
+        human.body.clear()
+        human.alive = False
+    personalities = personalities or [None] * num_ai
+    ai_list = [CognitiveAIAgent(i+1, starts[i], personality=personalities[i]) for i in range(num_ai)]
+    return human, ai_list
+
+
+def human_autopilot(human, policy, env, rng):
+    """Stand-in for keyboard input: 'straight' never turns, 'random' wanders without hitting walls, itself or obstacles"""
+    if policy != 'random' or not human.alive:
+        return
+    hx, hy = human.body[0]
+    blocked = set(human.body) | {o.position for o in env.obstacle_agents}
+    safe = [d for d, (dx, dy) in DELTAS.items()
+            if 0 <= hx+dx < GRID_SIZE and 0 <= hy+dy < GRID_SIZE and (hx+dx, hy+dy) not in blocked
+            and d != OPPOSITE[human.direction]]  # turn() ignores reversals
+    if not safe:
+        return
+    if human.direction not in safe or rng.random() < 0.2:
+        human.turn(rng.choice(safe))
+
+
+def run_episode(seed, num_ai=3, difficulty='Medium', max_steps=5000, human_policy='random', until_all_dead=False,
+                personalities=None, with_human=True, event_writer=None, recorder=None, decide_workers=DECIDE_WORKERS):
+    """
+    Play one episode; recorder (game.replay.Recorder) captures it for deterministic
+    replay, which re-simulates with SNAKE_DECIDE_WORKERS, not decide_workers.
+    """
+    human, ai_list = build_roster(num_ai, personalities, with_human)
+    env = Environment(human, ai_list, seed=seed, headless=True, event_writer=event_writer, decide_workers=decide_workers)
+    rng = random.Random(seed)  # separate stream so the policy doesn't shift env randomness
+    level_up_score = DIFFICULTIES[difficulty]
+
+    level = 1
+    while env.step_count < max_steps:
+        human_autopilot(human, human_policy, env, rng)
+        if recorder:
+            recorder.record(env)
+        env.step(level)
+
+        # level up exactly like main.main
+        highest = max([human.score] + [a.score for a in ai_list])
+        if 1 + highest // level_up_score > level:
+            level += 1
+            env.spawn_for_level(level)
+
+        alive_ai = [a for a in ai_list if a.alive]
+        if until_all_dead or not with_human:
+            if not human.alive and not alive_ai:
+                break
+        elif not human.alive or not alive_ai:
+            break
+
+    snakes = ([('Human', human)] if with_human else []) + [(f"AI{idx+1}", a) for idx, a in enumerate(ai_list)]
+    return {
+        'seed': seed,
+        'steps': env.step_count,
+        'level': level,
+        'truncated': env.step_count >= max_steps and any(s.alive for _, s in snakes),
+        'winner': max(snakes, key=lambda s: s[1].score)[0],
+        'scores': {name: s.score for name, s in snakes},
+        'lengths': {name: len(s.body) for name, s in snakes},
+        'alive': {name: s.alive for name, s in snakes},
+        'death_causes': {name: s.death_cause for name, s in snakes},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.headless', description='Run Snake Arena episodes without a display.')
+    parser.add_argument('--episodes', type=int, default=100)
+    parser.add_argument('--ai', type=int, default=3, help='number of CognitiveAIAgent snakes')
+    parser.add_argument('--seed', type=int, default=0, help='episode i uses seed + i')
+    parser.add_argument('--difficulty', default='Medium', choices=list(DIFFICULTIES))
+    parser.add_argument('--max-steps', type=int, default=5000, help='truncate episodes after this many steps')
+    parser.add_argument('--human-policy', default='random', choices=HUMAN_POLICIES)
+    parser.add_argument('--until-all-dead', action='store_true', help="keep running after the human dies (main.py ends the game there)")
+    parser.add_argument('--out', default='-', help="JSONL output path ('-' for stdout)")
+    parser.add_argument('--events', default=None, help="stream every episode's events to this CSV (rotated, appended); "
+                        "a path ending in .evb writes a binary event store instead")
+    parser.add_argument('--events-max-bytes', type=int, default=50_000_000, help='rotate the events file past this size')
+    parser.add_argument('--decide-workers', type=int, default=DECIDE_WORKERS,
+                        help='0 moves the AIs one by one; n >= 1 decides them all on n threads against the tick-start board')
+    parser.add_argument('--profile', default=None, help='time every step phase and write p50/p95/p99 as JSON to this path')
+    args = parser.parse_args(argv)
+    if not 1 <= args.ai <= len(start_cells()):
+        parser.error(f"--ai must be between 1 and {len(start_cells())} on a {GRID_SIZE}x{GRID_SIZE} board")
+    if args.decide_workers < 0:
+        parser.error("--decide-workers must be 0 or more")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    events = None
+    if args.events and args.events.endswith('.evb'):
+        events = BinaryEventWriter(args.events)
+    elif args.events:
+        events = EventLogWriter(args.events, max_bytes=args.events_max_bytes, background=True)
+    prof = profiler.enable() if args.profile else None
+    total_steps = 0
+    start = time.perf_counter()
+    try:
+        for i in range(args.episodes):
+            result = run_episode(args.seed + i, args.ai, args.difficulty, args.max_steps, args.human_policy, args.until_all_dead,
+                                 event_writer=events, decide_workers=args.decide_workers)
+            result['episode'] = i
+            total_steps += result['steps']
+            out.write(json.dumps(result) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if events:
+            events.close()
+        if prof:
+            profiler.disable()
+            prof.dump(args.profile)
+    elapsed = time.perf_counter() - start
+    print(f"{args.episodes} episodes, {total_steps} steps in {elapsed:.2f}s "
+          f"({total_steps / max(elapsed, 1e-9):.0f} steps/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
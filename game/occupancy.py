@@ -0,0 +1,105 @@
+# game/occupancy.py
+import random
+from itertools import chain
+import numpy as np
+from core.config import GRID_SIZE
+
+
+class OccupancyGrid:
+    """
+    Per-cell occupancy counts plus an index of free cells.
+
+    Counts (not booleans) because cells can be shared for a tick, e.g. a head on
+    the food it is about to eat or an obstacle drifting onto a snake. Free cells
+    live in a list with a reverse index so add/remove are O(1) swap-removes and
+    sample_free is a single random draw. Once blocks(k) has been asked for, the
+    occupied cells per k x k block are kept up to date too (the minimap).
+    """
+
+    def __init__(self, size=GRID_SIZE):
+        self.size = size
+        self.counts = np.zeros((size, size), dtype=np.int16)     # [x, y]
+        self.slot = np.arange(size * size, dtype=np.int32).reshape(size, size)
+        self.free = [(x, y) for x in range(size) for y in range(size)]
+        self.block_k = None       # block size of self.block_counts, None until blocks() is called
+        self.block_counts = None
+
+    def add(self, cell):
+        x, y = cell
+        if self.counts[x, y] == 0:
+            self._take_free(cell)
+            if self.block_k:
+                self.block_counts[x // self.block_k, y // self.block_k] += 1
+        self.counts[x, y] += 1
+
+    def remove(self, cell):
+        x, y = cell
+        if self.counts[x, y] <= 0:
+            return
+        self.counts[x, y] -= 1
+        if self.counts[x, y] == 0:
+            self.slot[x, y] = len(self.free)
+            self.free.append(cell)
+            if self.block_k:
+                self.block_counts[x // self.block_k, y // self.block_k] -= 1
+
+    def is_free(self, cell):
+        return self.counts[cell[0], cell[1]] == 0
+
+    def free_count(self):
+        return len(self.free)
+
+    def blocks(self, k):
+        """Occupied cells per k x k block, ceil(size / k) square; O(board) once, then kept up to date"""
+        if self.block_k != k:
+            n = -(-self.size // k)
+            occupied = np.zeros((n * k, n * k), dtype=np.int32)
+            occupied[:self.size, :self.size] = self.counts > 0
+            self.block_counts = occupied.reshape(n, k, n, k).sum(axis=(1, 3))
+            self.block_k = k
+        return self.block_counts
+
+    def sample_free(self, rng=random):
+        """Uniform random free cell, or None when the board is full"""
+        if not self.free:
+            return None
+        return self.free[rng.randrange(len(self.free))]
+
+    def set_free(self, cells):
+        """Adopt a free-cell order, e.g. from a snapshot, so sample_free keeps drawing the same cells"""
+        self.free = list(cells)
+        self.slot.fill(-1)
+        if self.free:
+            xy = np.fromiter(chain.from_iterable(self.free), dtype=np.intp, count=2 * len(self.free)).reshape(-1, 2)
+            self.slot[xy[:, 0], xy[:, 1]] = np.arange(len(self.free))
+
+    def load(self, cells, free):
+        """
+        Reset to the given occupied cells (repeats count twice) and free-cell order in one go.
+        Raises ValueError, leaving the grid as it was, unless free lists every unoccupied cell once.
+        """
+        counts = np.zeros_like(self.counts)
+        if cells:
+            xs, ys = zip(*cells)
+            np.add.at(counts, (xs, ys), 1)
+        free = list(free)
+        empty = counts == 0
+        if len(free) != empty.sum() or (free and not empty[tuple(zip(*free))].all()) or len(set(free)) != len(free):
+            raise ValueError(f"free list of {len(free)} cells does not match the {empty.sum()} unoccupied cells")
+        self.counts[:] = counts
+        self.set_free(free)
+        self.block_k = self.block_counts = None  # recounted on the next blocks() call
+
+    def clear(self):
+        self.counts[:] = 0
+        self.slot = np.arange(self.size * self.size, dtype=np.int32).reshape(self.size, self.size)
+        self.free = [(x, y) for x in range(self.size) for y in range(self.size)]
+        self.block_k = self.block_counts = None
+
+    def _take_free(self, cell):
+        i = self.slot[cell[0], cell[1]]
+        last = self.free.pop()
+        if last != cell:
+            self.free[i] = last
+            self.slot[last[0], last[1]] = i
+        self.slot[cell[0], cell[1]] = -1
@@ -0,0 +1,123 @@
+# game/profiler.py
+"""
+Opt-in per-phase timing and work counters.
+
+    from game import profiler
+    prof = profiler.enable()
+    ...run the game...
+    prof.dump('profile.json')
+
+Instrumented code reads the module-level `active` and does nothing else when
+it is None, so a disabled profiler costs one attribute lookup per phase:
+
+    prof = profiler.active
+    if prof: t = perf_counter()
+    ...phase...
+    if prof: t = prof.lap('phase', t)
+
+Timings keep the last `window` samples per phase. Counters (A* expansions,
+flood-fill cells, ...) are summed per tick and end_tick() turns them into one
+sample each, so both report as rolling p50/p95/p99.
+"""
+import json, os
+from collections import deque
+from time import perf_counter
+
+PERCENTILES = (50, 95, 99)
+
+active = None  # the enabled Profiler, or None
+
+
+def enable(window=2000):
+    global active
+    active = Profiler(window)
+    return active
+
+
+def disable():
+    global active
+    prof, active = active, None
+    return prof
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted sequence"""
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+class Profiler:
+    def __init__(self, window=2000):
+        self.window = window
+        self.timings = {}    # phase -> deque of seconds
+        self.counters = {}   # counter -> deque of per-tick totals
+        self.tick = {}       # counter -> total so far this tick
+        self.ticks = 0
+        self._overlay = None
+        self._overlay_at = 0.0
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def add(self, name, seconds):
+        samples = self.timings.get(name)
+        if samples is None:
+            samples = self.timings[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def lap(self, name, since):
+        """Record the time since `since` under name; returns now so laps can be chained"""
+        now = perf_counter()
+        self.add(name, now - since)
+        return now
+
+    def count(self, name, n=1):
+        self.tick[name] = self.tick.get(name, 0) + n
+
+    def end_tick(self):
+        """Close the tick: every counter gets this tick's total, 0 if untouched, including ticks before its first use"""
+        for name in self.tick.keys() - self.counters.keys():
+            self.counters[name] = deque([0] * min(self.ticks, self.window), maxlen=self.window)
+        for name, samples in self.counters.items():
+            samples.append(self.tick.get(name, 0))
+        self.tick = {}
+        self.ticks += 1
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def report(self):
+        """{'timings': {phase: ms stats}, 'counters': {name: per-tick stats}} over the rolling window"""
+        def stats(samples, scale):
+            ordered = sorted(samples)
+            out = {'n': len(ordered), 'mean': round(sum(ordered) / len(ordered) * scale, 4)}
+            for p in PERCENTILES:
+                out[f"p{p}"] = round(percentile(ordered, p) * scale, 4)
+            return out
+        return {'ticks': self.ticks,
+                'timings': {name: stats(s, 1000.0) for name, s in sorted(self.timings.items()) if s},
+                'counters': {name: stats(s, 1) for name, s in sorted(self.counters.items()) if s}}
+
+    def dump(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def overlay(self, font, refresh=0.5):
+        """Surface listing p50/p95/p99 per phase (ms) and counter (per tick); re-rendered every `refresh` seconds"""
+        import pygame
+        now = perf_counter()
+        if self._overlay is not None and now - self._overlay_at < refresh:
+            return self._overlay
+        rep = self.report()
+        lines = [f"{'phase':<14}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        lines += [f"{name:<14}{s['p50']:>8.3f}{s['p95']:>8.3f}{s['p99']:>8.3f}" for name, s in rep['timings'].items()]
+        lines += [f"{name:<14}{s['p50']:>8g}{s['p95']:>8g}{s['p99']:>8g}" for name, s in rep['counters'].items()]
+        rendered = [font.render(line, True, (230, 230, 230)) for line in lines]
+        h = font.get_linesize()
+        surf = pygame.Surface((max(r.get_width() for r in rendered) + 8, h * len(rendered) + 8))
+        surf.fill((0, 0, 0))
+        for i, r in enumerate(rendered):
+            surf.blit(r, (4, 4 + i * h))
+        self._overlay, self._overlay_at = surf, now
+        return surf
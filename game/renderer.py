@@ -0,0 +1,365 @@
+# game/renderer.py
+import heapq, math
+import pygame
+import numpy as np
+from core.config import GRID_SIZE, CELL_SIZE, VIEW_CELLS, MINIMAP_SIZE, FOOD_PULSE_AMPLITUDE, FONT_NAME
+
+BACKGROUND = (6, 6, 20)
+FOOD_COLORS = {'normal': (255, 255, 0), 'bonus': (0, 255, 255), 'poison': (255, 0, 255)}
+OBSTACLE_COLOR = (120, 120, 120)
+AI_COLORS = [(0, 0, 200), (0, 0, 200), (0, 0, 200), (0, 0, 200)]
+HUD_AI_ROWS = 8  # score lines; larger rosters show the leaders and how many are alive
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color); re-rendered only when the text changes"""
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self.surfaces = {}
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self.surfaces.get(key)
+        if surf is None:
+            if len(self.surfaces) >= self.limit:
+                self.surfaces.clear()  # scores only grow, so old entries are dead weight
+            surf = self.surfaces[key] = font.render(text, True, color)
+        return surf
+
+
+TEXT_CACHE = TextCache()
+
+
+def default_font():
+    pygame.font.init()
+    return pygame.font.SysFont(FONT_NAME, 18)
+
+
+def load_sound(path):
+    try:
+        s = pygame.mixer.Sound(path)
+        s.set_volume(0.5)
+        return s
+    except Exception:
+        return None
+
+
+def food_size(pulse_offset):
+    pulse = int((1 + 0.5 * (1 + math.sin(pulse_offset))) * (FOOD_PULSE_AMPLITUDE/2))
+    return max(6, CELL_SIZE//2 - 4 + pulse)
+
+
+# the pulse factor runs from 1 to 2, so these are all the sizes food_size() can return
+FOOD_SIZES = sorted({max(6, CELL_SIZE//2 - 4 + p)
+                     for p in range(int(FOOD_PULSE_AMPLITUDE/2), int(FOOD_PULSE_AMPLITUDE) + 1)})
+
+
+class Camera:
+    """
+    Top-left arena cell of a cols x rows viewport. follow() scrolls just enough to
+    keep a cell `margin` cells away from the edges, and never past the arena.
+    """
+
+    def __init__(self, cols, rows, world=GRID_SIZE, margin=None):
+        self.cols, self.rows, self.world = cols, rows, world
+        self.margin = min(cols, rows) // 4 if margin is None else margin
+        self.x = self.y = 0
+
+    def clamp(self):
+        self.x = max(0, min(self.world - self.cols, self.x))
+        self.y = max(0, min(self.world - self.rows, self.y))
+
+    def center(self, cell):
+        self.x, self.y = cell[0] - self.cols // 2, cell[1] - self.rows // 2
+        self.clamp()
+
+    def follow(self, cell):
+        """Scroll towards cell; returns True if the viewport moved"""
+        old = (self.x, self.y)
+        m = self.margin
+        self.x = min(max(self.x, cell[0] - self.cols + 1 + m), cell[0] - m)
+        self.y = min(max(self.y, cell[1] - self.rows + 1 + m), cell[1] - m)
+        self.clamp()
+        return (self.x, self.y) != old
+
+
+class SpriteAtlas:
+    """
+    One surface holding a pre-rendered cell tile per look: background, every food
+    type at every pulse size, obstacles and snake segments per colour. Looks that
+    were not known up front (e.g. a custom snake colour) get a tile on first use.
+    """
+
+    def __init__(self, looks=()):
+        self.rects = {}
+        self.surface = pygame.Surface((CELL_SIZE, CELL_SIZE))
+        self.add([None] + list(looks))
+
+    def add(self, looks):
+        looks = [look for look in dict.fromkeys(looks) if look not in self.rects]
+        if not looks:
+            return
+        old = self.surface
+        n = len(self.rects)
+        surface = pygame.Surface((CELL_SIZE * (n + len(looks)), CELL_SIZE), 0, old)
+        surface.blit(old, (0, 0))
+        for i, look in enumerate(looks, n):
+            rect = self.rects[look] = pygame.Rect(i * CELL_SIZE, 0, CELL_SIZE, CELL_SIZE)
+            if look is None or look[0] == 'food':
+                surface.fill(BACKGROUND, rect)
+                if look is not None:
+                    pygame.draw.circle(surface, look[1], rect.center, look[2]//2)
+            else:
+                surface.fill(look[1], rect)
+        self.surface = surface
+
+    def convert(self, screen):
+        """Match the screen's pixel format so blits are plain copies (no display needed, unlike Surface.convert)"""
+        surface = pygame.Surface(self.surface.get_size(), 0, screen)
+        surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+    def area(self, look):
+        rect = self.rects.get(look)
+        if rect is None:
+            self.add([look])
+            rect = self.rects[look]
+        return rect
+
+
+class Renderer:
+    """
+    Retained-mode drawing for Environment.draw.
+
+    Every frame the cells inside the camera's viewport are described as a
+    {cell: look} map, read from the environment's spatial index so the cost
+    follows the window, not the arena. The original draw order decides a shared
+    cell: food, obstacles, human, live AIs. Only cells whose look differs from the
+    previous frame are repainted, as one Surface.blits batch from a SpriteAtlas,
+    and draw() returns their rects for pygame.display.update. HUD lines come from
+    a TextCache and are re-blitted only when their text changes or something was
+    painted under them. A camera scroll repaints the viewport.
+
+    Between ticks (alpha < 1) each moving snake's head slides from its previous
+    cell into the new one and the vacated tail cell slides after the body. These
+    overlays are drawn over the board and wiped again on the next frame.
+    """
+
+    def __init__(self, font, cols=VIEW_CELLS, rows=VIEW_CELLS, text_cache=TEXT_CACHE):
+        self.font = font
+        self.text_cache = text_cache
+        self.atlas = SpriteAtlas([('food', color, size) for color in FOOD_COLORS.values() for size in FOOD_SIZES] +
+                                 [('rect', color) for color in [OBSTACLE_COLOR] + AI_COLORS])
+        self.camera = Camera(cols, rows)
+        self.target = None   # snake the camera follows; the human when None or dead
+        self.show_minimap = GRID_SIZE > max(cols, rows)
+        self.minimap = None  # (surface, rect) of the current tick
+        self.screen = None   # surface the retained state belongs to
+        self.size = None
+        self.scene = {}
+        self.labels = []     # [(text, color, pos)] of the last frame
+        self.hud = None      # area covered by the last frame's HUD
+        self.overlays = []   # rects of the last frame's sliding heads and tails
+        self.damaged = []    # rects something else drew over since the last frame
+        self.step = None     # env.step_count that self.ends belongs to
+        self.ends = []       # (head, tail) per snake, human first
+        self.prev_ends = None
+
+    def invalidate(self):
+        """Repaint everything on the next draw, e.g. after something else drew over the screen"""
+        self.screen = None
+
+    def damage(self, rect):
+        """Repaint the board under rect on the next draw, e.g. after a debug overlay was blitted there"""
+        self.damaged.append(pygame.Rect(rect))
+
+    def follow(self, snake):
+        """Point the camera at snake (None for the human) and recenter on the next draw"""
+        self.target = snake
+        self.screen = None
+
+    def toggle_minimap(self):
+        self.show_minimap = not self.show_minimap
+        self.minimap = None
+        self.screen = None
+
+    # -------------------------
+    # Frame description
+    # -------------------------
+    def snake_look(self, i, snake):
+        return ('rect', snake.color if i == 0 else AI_COLORS[(i - 1) % len(AI_COLORS)])
+
+    def cell_rect(self, cell):
+        cam = self.camera
+        return pygame.Rect((cell[0] - cam.x) * CELL_SIZE, (cell[1] - cam.y) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+    def lerp_rect(self, a, b, alpha):
+        """Cell-sized screen rect alpha of the way from cell a to cell b"""
+        cam = self.camera
+        return pygame.Rect(round((a[0] - cam.x + (b[0] - a[0]) * alpha) * CELL_SIZE),
+                           round((a[1] - cam.y + (b[1] - a[1]) * alpha) * CELL_SIZE), CELL_SIZE, CELL_SIZE)
+
+    def track_ends(self, env, snakes):
+        """Remember head and tail per tick; returns True on a new tick (interpolation needs the previous one)"""
+        if env.step_count == self.step:
+            return False
+        ends = [(s.body[0], s.body[-1]) if len(s.body) else None for s in snakes]
+        consecutive = self.step is not None and env.step_count == self.step + 1 and len(ends) == len(self.ends)
+        self.prev_ends = self.ends if consecutive else None
+        self.ends, self.step = ends, env.step_count
+        return True
+
+    def interpolate(self, snakes, alpha):
+        """Sliding (look, rect) overlays for this frame and the snakes whose head cell they replace"""
+        overlays, sliding = [], set()
+        if alpha >= 1 or self.prev_ends is None:
+            return overlays, sliding
+        for i, (s, prev, cur) in enumerate(zip(snakes, self.prev_ends, self.ends)):
+            if prev is None or cur is None or not s.alive:
+                continue
+            (ph, pt), (h, t) = prev, cur
+            look = self.snake_look(i, s)
+            if abs(ph[0] - h[0]) + abs(ph[1] - h[1]) == 1:
+                sliding.add(i)
+                overlays.append((look, self.lerp_rect(ph, h, alpha)))
+            if t != h and pt != t and abs(pt[0] - t[0]) + abs(pt[1] - t[1]) == 1:
+                overlays.append((look, self.lerp_rect(pt, t, alpha)))
+        return overlays, sliding
+
+    def build_scene(self, env, level, snakes, sliding=()):
+        cam = self.camera
+        view = (cam.x, cam.y, cam.x + cam.cols, cam.y + cam.rows)
+        spatial = env.spatial
+        scene = {}
+        size = food_size(env.pulse_offset)
+        types = {f.position: f.type for f in env.food_agents}
+        for cell, _ in spatial.in_rect('food', *view):
+            scene[cell] = ('food', FOOD_COLORS.get(types.get(cell), FOOD_COLORS['poison']), size)
+        if level >= 2:
+            for cell, _ in spatial.in_rect('obstacle', *view):
+                scene[cell] = ('rect', OBSTACLE_COLOR)
+        rank = {s: i for i, s in enumerate(snakes)}
+        top = {}
+        for cell, s in spatial.in_rect('snake', *view):
+            i = rank.get(s)
+            if i is None or (i and not s.alive):   # the human stays on screen when dead, AIs vanish
+                continue
+            if i in sliding and cell == s.body[0]:
+                continue
+            if top.get(cell, -1) < i:   # later snakes are drawn over earlier ones
+                top[cell] = i
+                scene[cell] = self.snake_look(i, s)
+        return scene
+
+    def build_labels(self, env, level):
+        labels = [(f"Level: {level}", (255, 255, 255), (8, 6)), (f"Human: {env.human.score}", env.human.color, (8, 28))]
+        y = 46
+        shown = list(enumerate(env.ai_list))
+        if len(shown) > HUD_AI_ROWS:  # battle royale: the leaders and a head count instead of every snake
+            shown = heapq.nlargest(HUD_AI_ROWS - 1, shown, key=lambda e: e[1].score)
+        for idx, a in shown:
+            labels.append((f"AI{idx+1}: {a.score}", AI_COLORS[idx % len(AI_COLORS)], (8, y)))
+            y += 18
+        if len(env.ai_list) > HUD_AI_ROWS:
+            alive = sum(a.alive for a in env.ai_list)
+            labels.append((f"AIs alive: {alive}/{len(env.ai_list)}", (255, 255, 255), (8, y)))
+        return labels
+
+    def build_minimap(self, env, snakes, screen):
+        """Whole arena downsampled to MINIMAP_SIZE pixels: occupied cells, live heads and the viewport outline"""
+        k = -(-GRID_SIZE // MINIMAP_SIZE)
+        n = -(-GRID_SIZE // k)
+        rgb = np.zeros((n, n, 3), dtype=np.uint8)
+        # per-block counts the occupancy grid keeps as things move: the cost follows the minimap, not the entities
+        rgb[env.occupancy.blocks(k) > 0] = OBSTACLE_COLOR
+        for i, s in enumerate(snakes):
+            if s.alive and len(s.body):
+                hx, hy = s.body[0]
+                rgb[hx // k, hy // k] = self.snake_look(i, s)[1]
+        surf = pygame.transform.scale(pygame.surfarray.make_surface(rgb), (MINIMAP_SIZE, MINIMAP_SIZE))
+        scale = MINIMAP_SIZE / (n * k)
+        cam = self.camera
+        pygame.draw.rect(surf, (255, 255, 255), (cam.x * scale, cam.y * scale, cam.cols * scale, cam.rows * scale), 1)
+        w, h = screen.get_size()
+        return surf, surf.get_rect(bottomright=(w - 8, h - 8))
+
+    # -------------------------
+    # Painting
+    # -------------------------
+    def paint(self, screen, cells, scene):
+        """Blit the atlas tile of each cell in one batch; returns the screen rects"""
+        area = self.atlas.area
+        rects = [self.cell_rect(cell) for cell in cells]
+        tiles = [area(scene.get(cell)) for cell in cells]
+        surface = self.atlas.surface
+        screen.blits([(surface, rect, tile) for rect, tile in zip(rects, tiles)], doreturn=False)
+        return rects
+
+    def paint_area(self, screen, rect):
+        """Repaint every viewport cell touching the screen rect from the current scene"""
+        cam = self.camera
+        x0, x1 = max(0, rect.left // CELL_SIZE), min(cam.cols - 1, (rect.right - 1) // CELL_SIZE)
+        y0, y1 = max(0, rect.top // CELL_SIZE), min(cam.rows - 1, (rect.bottom - 1) // CELL_SIZE)
+        cells = [(cam.x + x, cam.y + y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+        return self.paint(screen, cells, self.scene)
+
+    def draw(self, screen, env, level, alpha=1.0):
+        """Bring screen up to date with env, alpha of the way to the next tick; returns the rects that changed"""
+        snakes = [env.human] + env.ai_list
+        new_tick = self.track_ends(env, snakes)
+        full = screen is not self.screen or screen.get_size() != self.size
+        target = self.target if self.target is not None and self.target.alive else env.human
+        if len(target.body):
+            if full:
+                self.camera.center(target.body[0])
+            elif new_tick:
+                full = self.camera.follow(target.body[0])
+        overlays, sliding = self.interpolate(snakes, alpha)
+        scene = self.build_scene(env, level, snakes, sliding)
+        overlay_rects = [rect for _, rect in overlays]
+        labels = self.build_labels(env, level)
+        surfaces = [(self.text_cache.render(self.font, text, color), pos) for text, color, pos in labels]
+        hud = pygame.Rect(surfaces[0][1], (0, 0)).unionall([s.get_rect(topleft=pos) for s, pos in surfaces])
+
+        if full:
+            self.screen, self.size = screen, screen.get_size()
+            self.atlas.convert(screen)
+            self.scene = scene
+            screen.fill(BACKGROUND)
+            self.paint(screen, list(scene), scene)
+            dirty = [screen.get_rect()]
+            hud_dirty = True
+        else:
+            prev = self.scene
+            self.scene = scene
+            dirty = self.paint(screen, [cell for cell in prev.keys() | scene.keys() if prev.get(cell) != scene.get(cell)],
+                               scene)
+            for rect in self.overlays + self.damaged:
+                dirty += self.paint_area(screen, rect)
+            old_hud = self.hud
+            hud_dirty = (labels != self.labels or hud.collidelist(dirty) >= 0 or old_hud.collidelist(dirty) >= 0
+                         or hud.collidelist(overlay_rects) >= 0)
+            if hud_dirty:
+                dirty += self.paint_area(screen, hud.union(old_hud))
+
+        if overlays:
+            tiles = [self.atlas.area(look) for look, _ in overlays]   # may grow the atlas, so before .surface
+            surface = self.atlas.surface
+            screen.blits([(surface, rect, tile) for rect, tile in zip(overlay_rects, tiles)], doreturn=False)
+            dirty += overlay_rects
+        if hud_dirty:
+            for surf, pos in surfaces:
+                screen.blit(surf, pos)
+        if self.show_minimap:
+            if full or new_tick or self.minimap is None:
+                self.minimap = self.build_minimap(env, snakes, screen)
+                dirty.append(self.minimap[1])
+            if full or new_tick or self.minimap[1].collidelist(dirty) >= 0:
+                screen.blit(*self.minimap)
+                dirty.append(self.minimap[1])
+        self.labels = labels
+        self.hud = hud
+        self.overlays = overlay_rects
+        self.damaged = []
+        return dirty
@@ -0,0 +1,189 @@
+# game/replay.py
+"""
+Deterministic session recording and replay.
+
+A session is fully determined by its seed, the roster/difficulty it was started
+with and the human's direction at every tick, so Recorder only stores those
+(plus the config the simulation depends on). Replayer re-simulates headlessly
+and keeps a zlib-compressed keyframe of the full state every keyframe_every
+steps; seek(step) restores the nearest earlier keyframe and simulates at most
+keyframe_every steps forward.
+
+    python -m game.replay replays/session-123.json            # deaths and final scores
+    python -m game.replay replays/session-123.json --step 850 # state at step 850
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse, bisect, json, pickle, sys, zlib
+from core import config
+
+FORMAT_VERSION = 1
+
+
+def simulation_config():
+    """The settings a replay must match; simultaneous AI moves are only listed when on"""
+    cfg = {'grid_size': config.GRID_SIZE, 'sensing_range': config.BASE_SENSING_RANGE}
+    if config.DECIDE_WORKERS > 0:
+        cfg['simultaneous'] = True  # the worker count itself does not change the game
+    return cfg
+
+
+class Recorder:
+    """Collects what a replay needs; call record() right before every env.step()"""
+
+    def __init__(self, seed, num_ai, difficulty='Medium', personalities=None, with_human=True):
+        self.data = {
+            'version': FORMAT_VERSION,
+            'seed': seed,
+            'num_ai': num_ai,
+            'difficulty': difficulty,
+            'personalities': personalities,
+            'with_human': with_human,
+            'config': simulation_config(),
+            'turns': [],  # [step, direction]: human.direction from that step on
+            'steps': 0,
+        }
+        self.direction = None
+
+    def record(self, env):
+        direction = env.human.direction
+        if direction != self.direction:
+            self.data['turns'].append([env.step_count, direction])
+            self.direction = direction
+        self.data['steps'] = env.step_count + 1
+
+    def save(self, path):
+        d = os.path.dirname(path)
+        if d and not os.path.exists(d):
+            os.makedirs(d)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+
+
+def load_recording(path):
+    with open(path, encoding='utf-8') as f:
+        rec = json.load(f)
+    if rec.get('version') != FORMAT_VERSION:
+        raise ValueError(f"unsupported recording version {rec.get('version')!r}")
+    expected = simulation_config()
+    if rec['config'] != expected:
+        raise ValueError(f"recording was made with config {rec['config']}, current config is {expected}")
+    return rec
+
+
+class Replayer:
+    """
+    Re-simulates a recording. self.env is the live state at self.env.step_count;
+    keyframes hold (env.snapshot(), level, turn cursor) as compressed pickles.
+    The event log is not part of a snapshot, so env.event_log only holds events
+    simulated since the last seek.
+    """
+
+    def __init__(self, recording, keyframe_every=500):
+        from game.headless import DIFFICULTIES
+        self.rec = recording
+        self.keyframe_every = keyframe_every
+        self.level_up_score = DIFFICULTIES[recording['difficulty']]
+        self.keyframes = {}  # step -> compressed state
+        self._start()
+
+    def _start(self):
+        from game.environment import Environment
+        from game.headless import build_roster
+        human, ai_list = build_roster(self.rec['num_ai'], self.rec['personalities'], self.rec['with_human'])
+        self.env = Environment(human, ai_list, seed=self.rec['seed'], headless=True)
+        self.level = 1
+        self.cursor = 0
+        self._keyframe()
+
+    # -------------------------
+    # Simulation
+    # -------------------------
+    def tick(self):
+        """One tick exactly as main.main runs it"""
+        env, turns = self.env, self.rec['turns']
+        while self.cursor < len(turns) and turns[self.cursor][0] <= env.step_count:
+            env.human.direction = turns[self.cursor][1]
+            self.cursor += 1
+        env.step(self.level)
+        snakes = [env.human] + env.ai_list
+        if 1 + max(s.score for s in snakes) // self.level_up_score > self.level:
+            self.level += 1
+            env.spawn_for_level(self.level)
+        if env.step_count % self.keyframe_every == 0 and env.step_count not in self.keyframes:
+            self._keyframe()
+
+    def seek(self, step):
+        """Bring self.env to the state after `step` ticks and return it"""
+        step = max(0, min(step, self.rec['steps']))
+        frames = sorted(self.keyframes)
+        best = frames[bisect.bisect_right(frames, step) - 1]  # step 0 is always there
+        if step < self.env.step_count or best > self.env.step_count:
+            self._restore(best)
+        while self.env.step_count < step:
+            self.tick()
+        return self.env
+
+    def build_keyframes(self):
+        """Simulate the whole recording once so every later seek is O(keyframe_every)"""
+        self.seek(self.rec['steps'])
+
+    # -------------------------
+    # Keyframes
+    # -------------------------
+    def _keyframe(self):
+        state = (self.env.snapshot(), self.level, self.cursor)
+        self.keyframes[self.env.step_count] = zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    def _restore(self, step):
+        snap, self.level, self.cursor = pickle.loads(zlib.decompress(self.keyframes[step]))
+        self.env.restore(snap)
+        self.env.event_log = []
+
+
+def summary(env):
+    snakes = ([('Human', env.human)] if env.human.body else []) + [(f"AI{i+1}", a) for i, a in enumerate(env.ai_list)]
+    return {
+        'step': env.step_count,
+        'snakes': {name: {'alive': s.alive, 'score': s.score, 'length': len(s.body),
+                          'head': s.body[0] if s.body else None, 'direction': s.direction,
+                          'death_cause': s.death_cause} for name, s in snakes},
+        'food': [(f.position, f.type) for f in env.food_agents],
+        'obstacles': [o.position for o in env.obstacle_agents],
+    }
+
+
+def deaths(replayer):
+    """Simulate to the end and return {snake: (step, cause)} for every snake that died"""
+    replayer.seek(0)
+    out = {}
+    while replayer.env.step_count < replayer.rec['steps']:
+        replayer.tick()
+        env = replayer.env
+        for name, s in [('Human', env.human)] + [(f"AI{i+1}", a) for i, a in enumerate(env.ai_list)]:
+            if not s.alive and name not in out and s.death_cause:
+                out[name] = (env.step_count, s.death_cause)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.replay')
+    parser.add_argument('recording')
+    parser.add_argument('--step', type=int, default=None, help='print the full state after this many ticks')
+    parser.add_argument('--keyframe-every', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    replayer = Replayer(load_recording(args.recording), args.keyframe_every)
+    if args.step is not None:
+        json.dump(summary(replayer.seek(args.step)), sys.stdout)
+        sys.stdout.write('\n')
+        return
+    for name, (step, cause) in deaths(replayer).items():
+        print(f"{name} died at step {step} ({cause})")
+    final = summary(replayer.env)
+    print(f"{final['step']} steps, scores: " + ", ".join(f"{n} {s['score']}" for n, s in final['snakes'].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# game/risk_field.py
+import numpy as np
+from core.config import GRID_SIZE
+
+FAR = 999      # "nothing there", same sentinel the agents' risk_score uses
+_BIG = 1 << 24
+
+
+def l1_distance(mask):
+    """
+    Exact city-block distance from every cell to the nearest True cell of mask
+    (over the last two axes, so a stack of masks is transformed in one call).
+    Each axis is two running-minimum sweeps: min_j (d[j] + |i - j|) splits into
+    i + cummin(d[j] - j) from the left and cummin(d[j] + j) - i from the right.
+    """
+    d = np.where(mask, 0, _BIG).astype(np.int32)
+    for axis in (-2, -1):
+        n = d.shape[axis]
+        i = np.arange(n).reshape((-1, 1) if axis == -2 else (1, -1))
+        fwd = np.minimum.accumulate(d - i, axis=axis) + i
+        rev = (d + i)[..., ::-1, :] if axis == -2 else (d + i)[..., ::-1]
+        bwd = np.minimum.accumulate(rev, axis=axis)
+        bwd = (bwd[..., ::-1, :] if axis == -2 else bwd[..., ::-1]) - i
+        d = np.minimum(fwd, bwd)
+    return np.minimum(d, FAR)
+
+
+def two_best(stack):
+    """Nearest distance, its owner and the nearest distance of any other owner, per cell"""
+    if len(stack) == 0:
+        far = np.full(stack.shape[1:], FAR, dtype=np.int32)
+        return far, np.full(stack.shape[1:], -1), far
+    owner = stack.argmin(axis=0)
+    d1 = np.take_along_axis(stack, owner[None], axis=0)[0]
+    if len(stack) == 1:
+        return d1, owner, np.full(stack.shape[1:], FAR, dtype=np.int32)
+    rest = stack.copy()
+    np.put_along_axis(rest, owner[None], FAR, axis=0)
+    return d1, owner, rest.min(axis=0)
+
+
+class RiskField:
+    """
+    Per-tick distance maps behind the agents' risk_score, computed once for everyone.
+
+    obstacle: distance to the nearest obstacle. Snake bodies and heads keep the
+    nearest distance, which snake it belongs to and the nearest distance to any
+    *other* snake, so an agent drops its own body with one comparison instead of
+    rebuilding the distance lists. Snapshot taken when the AI phase starts:
+    AIs that moved earlier in the same tick are seen one cell behind.
+    """
+
+    def __init__(self, snakes, obstacles, size=GRID_SIZE):
+        self.size = size
+        self.index = {s: k for k, s in enumerate(snakes)}
+        # obstacles, every body and every head transformed in one stacked call
+        bodies = [getattr(s, "body", []) for s in snakes]
+        heads = [[body[0]] if body else [] for body in bodies]
+        d = l1_distance(self._mask([obstacles] + bodies + heads))
+        n = len(snakes)
+        self.obstacle = d[0].tolist()
+        self.body_d1, self.body_owner, self.body_d2 = (a.tolist() for a in two_best(d[1:n+1]))
+        self.head_d1, self.head_owner, self.head_d2 = (a.tolist() for a in two_best(d[n+1:]))
+
+    def _mask(self, groups):
+        """(len(groups), size, size) masks, one per list of cells"""
+        m = np.zeros((len(groups), self.size, self.size), dtype=bool)
+        ks = [k for k, cells in enumerate(groups) for _ in cells]
+        if ks:
+            xy = np.array([c for cells in groups for c in cells])
+            m[ks, xy[:, 0], xy[:, 1]] = True
+        return m
+
+    def covers(self, agent):
+        return agent in self.index
+
+    def obstacle_dist(self, cell):
+        return self.obstacle[cell[0]][cell[1]]
+
+    def snake_dist(self, cell, agent):
+        """Distance to the nearest body segment of any snake but agent"""
+        x, y = cell
+        if self.body_owner[x][y] == self.index.get(agent, -1):
+            return self.body_d2[x][y]
+        return self.body_d1[x][y]
+
+    def head_dist(self, cell, agent):
+        """Distance to the nearest head of any snake but agent"""
+        x, y = cell
+        if self.head_owner[x][y] == self.index.get(agent, -1):
+            return self.head_d2[x][y]
+        return self.head_d1[x][y]
@@ -1,13 +1,14 @@
 import pygame
 import random
 from core.config import CELL_SIZE, GRID_SIZE
+from game.snake_body import SnakeBody
 
 class SnakeAgent:
     COLORS = [(0, 255, 0), (255, 0, 0)]  # Human green, AI red
 
     def __init__(self, id, start_pos):
         self.id = id
-        self.body = [start_pos]
+        self.body = SnakeBody([start_pos])
         self.color = SnakeAgent.COLORS[id % len(SnakeAgent.COLORS)]
         self.direction = (1, 0)
         self.grow_pending = 0
@@ -46,7 +47,7 @@ class SnakeAgent:
             return
 
         # Move
-        self.body.insert(0, new_head)
+        self.body.push_head(new_head)
 
         # Check food
         if self.env and new_head == self.env.food.position:
@@ -58,7 +59,7 @@ class SnakeAgent:
         if self.grow_pending > 0:
             self.grow_pending -= 1
         else:
-            self.body.pop()
+            self.body.pop_tail()
 
     def draw(self, screen):
         for segment in self.body:
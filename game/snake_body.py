@@ -0,0 +1,65 @@
+# game/snake_body.py
+from collections import deque
+
+
+class SnakeBody:
+    """
+    Snake segments, head first: a deque for the order plus a multiset of cells.
+
+    push_head/pop_tail are O(1) and so is `cell in body`, which every collision
+    check relies on. Indexing (body[0], body[-1]), len() and iteration behave
+    like the list the agents used before.
+    """
+
+    __slots__ = ('_cells', '_count')
+
+    def __init__(self, cells=()):
+        self._cells = deque(cells)
+        self._count = count = {}
+        for c in self._cells:
+            count[c] = count.get(c, 0) + 1
+
+    def push_head(self, cell):
+        self._cells.appendleft(cell)
+        self._count[cell] = self._count.get(cell, 0) + 1
+
+    def push_tail(self, cell):
+        self._cells.append(cell)
+        self._count[cell] = self._count.get(cell, 0) + 1
+
+    def pop_tail(self):
+        cell = self._cells.pop()
+        n = self._count[cell]
+        if n > 1:
+            self._count[cell] = n - 1
+        else:
+            del self._count[cell]
+        return cell
+
+    def clear(self):
+        self._cells.clear()
+        self._count.clear()
+
+    def __contains__(self, cell):
+        return cell in self._count
+
+    def count(self, cell):
+        """Segments on cell (more than one only while the snake crosses itself)"""
+        return self._count.get(cell, 0)
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def __getitem__(self, i):
+        return self._cells[i]
+
+    def __eq__(self, other):
+        return list(self._cells) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"SnakeBody({list(self._cells)!r})"
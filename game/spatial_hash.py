@@ -0,0 +1,76 @@
+# game/spatial_hash.py
+from core import config
+
+
+class SpatialHash:
+    """
+    Bucketed grid hash of everything agents can perceive.
+
+    Entries are (kind, cell, owner) with a count, owner being the snake a body
+    segment belongs to (None for food, obstacles and dangers). The environment
+    adds/removes entries as things move, and a window query only visits the few
+    buckets that overlap the window, so perception costs O(window), not
+    O(entities on the board).
+    """
+
+    def __init__(self, bucket=2 * config.BASE_SENSING_RANGE + 1):
+        self.bucket = bucket
+        self.buckets = {}  # (bx, by) -> {kind: {(cell, owner): count}}
+
+    def add(self, kind, cell, owner=None):
+        b = self.buckets.setdefault((cell[0] // self.bucket, cell[1] // self.bucket), {})
+        entries = b.setdefault(kind, {})
+        key = (cell, owner)
+        entries[key] = entries.get(key, 0) + 1
+
+    def remove(self, kind, cell, owner=None):
+        b = self.buckets.get((cell[0] // self.bucket, cell[1] // self.bucket))
+        entries = b.get(kind) if b else None
+        key = (cell, owner)
+        if not entries or key not in entries:
+            return
+        if entries[key] > 1:
+            entries[key] -= 1
+        else:
+            del entries[key]
+
+    def query(self, kind, center, radius):
+        """(cell, owner) of every entry of kind with |dx| <= radius and |dy| <= radius, repeated per count"""
+        cx, cy = center
+        size = self.bucket
+        out = []
+        for bx in range((cx - radius) // size, (cx + radius) // size + 1):
+            for by in range((cy - radius) // size, (cy + radius) // size + 1):
+                b = self.buckets.get((bx, by))
+                entries = b.get(kind) if b else None
+                if not entries:
+                    continue
+                for key, n in entries.items():
+                    c = key[0]
+                    if abs(c[0] - cx) <= radius and abs(c[1] - cy) <= radius:
+                        out.extend([key] * n)
+        return out
+
+    def in_rect(self, kind, left, top, right, bottom):
+        """(cell, owner) of every entry of kind with left <= x < right and top <= y < bottom, once per key"""
+        size = self.bucket
+        bx0, bx1 = left // size, (right - 1) // size
+        by0, by1 = top // size, (bottom - 1) // size
+        if (bx1 - bx0 + 1) * (by1 - by0 + 1) > len(self.buckets):  # a big rect over a sparse board
+            keys = [k for k in self.buckets if bx0 <= k[0] <= bx1 and by0 <= k[1] <= by1]
+        else:
+            keys = [(bx, by) for bx in range(bx0, bx1 + 1) for by in range(by0, by1 + 1)]
+        out = []
+        for k in keys:
+            b = self.buckets.get(k)
+            entries = b.get(kind) if b else None
+            if not entries:
+                continue
+            for key in entries:
+                c = key[0]
+                if left <= c[0] < right and top <= c[1] < bottom:
+                    out.append(key)
+        return out
+
+    def clear(self):
+        self.buckets = {}
@@ -0,0 +1,212 @@
+# game/tournament.py
+"""
+Tournament runner for CognitiveAIAgent personalities.
+
+    python -m game.tournament --random 64 --format swiss --rounds 8 --out matches.jsonl
+    python -m game.tournament --personalities sweep.json --format round-robin --out matches.jsonl
+
+A match is `games` headless AI-only games between two personalities, swapping
+start positions every game. Matches run on a ProcessPoolExecutor; each one gets
+a seed derived only from (base seed, round, players, game) so results do not
+depend on worker count or scheduling. Finished matches are appended to --out as
+they complete and skipped on the next run, so an interrupted sweep resumes
+where it stopped; a result only counts for a run with the same seed, games,
+max steps, difficulty, personalities and board settings. Ratings are
+sequential Elo updates replayed in pairing order.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse, itertools, json, random, sys, time, zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game.headless import DIFFICULTIES, run_episode
+from game.replay import simulation_config
+
+PERSONALITY_KEYS = ('fear', 'hunger', 'aggression', 'curiosity')
+BASE_RATING = 1500.0
+ELO_K = 24.0
+
+
+# -------------------------
+# Players
+# -------------------------
+def load_personalities(path):
+    """JSON list of {"name": ..., "fear": ..., "hunger": ..., "aggression": ..., "curiosity": ...}"""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    players = {}
+    for i, e in enumerate(entries):
+        name = str(e.get('name', f"p{i}"))
+        if name in players:
+            raise ValueError(f"duplicate personality name {name!r}")
+        players[name] = {k: float(e[k]) for k in PERSONALITY_KEYS if k in e}
+    return players
+
+
+def random_personalities(n, seed=0):
+    rng = random.Random(seed)
+    return {f"p{i}": {'fear': round(rng.uniform(0, 1.5), 3), 'hunger': round(rng.uniform(0, 2), 3),
+                      'aggression': round(rng.uniform(0, 1), 3), 'curiosity': round(rng.uniform(0, 1), 3)}
+            for i in range(n)}
+
+
+# -------------------------
+# Matches (run in worker processes)
+# -------------------------
+def match_seed(base_seed, round_no, a, b):
+    return zlib.crc32(f"{base_seed}:{round_no}:{a}:{b}".encode())
+
+
+def match_id(round_no, a, b, pa, pb, seed, games, max_steps, difficulty):
+    """Key of a result in --out; covers every setting the result depends on, so a resume never reuses stale ones"""
+    params = zlib.crc32(json.dumps([pa, pb, simulation_config()], sort_keys=True).encode())
+    return f"r{round_no}:{a}:{b}:s{seed}:g{games}:m{max_steps}:{difficulty}:{params:08x}"
+
+
+def play_match(job):
+    a, b = job['a'], job['b']
+    points = 0.0
+    score_a = score_b = steps = 0
+    for g in range(job['games']):
+        swap = g % 2 == 1
+        pers = [job['pb'], job['pa']] if swap else [job['pa'], job['pb']]
+        res = run_episode(job['seed'] + g, num_ai=2, difficulty=job['difficulty'], max_steps=job['max_steps'],
+                          personalities=pers, with_human=False)
+        sa, sb = (res['scores']['AI2'], res['scores']['AI1']) if swap else (res['scores']['AI1'], res['scores']['AI2'])
+        points += 1.0 if sa > sb else 0.5 if sa == sb else 0.0
+        score_a += sa
+        score_b += sb
+        steps += res['steps']
+    return {'match_id': job['match_id'], 'round': job['round'], 'a': a, 'b': b, 'seed': job['seed'],
+            'games': job['games'], 'points_a': points, 'score_a': score_a, 'score_b': score_b, 'steps': steps}
+
+
+def play_matches(jobs):
+    return [play_match(j) for j in jobs]
+
+
+# -------------------------
+# Pairing & ratings
+# -------------------------
+def round_robin_pairs(names):
+    return list(itertools.combinations(names, 2))
+
+
+def swiss_pairs(names, ratings, played):
+    """Pair neighbours in the rating order, skipping rematches where possible; odd player out gets a bye"""
+    order = sorted(names, key=lambda n: (-ratings[n], n))
+    pairs = []
+    while len(order) > 1:
+        a = order.pop(0)
+        j = next((i for i, b in enumerate(order) if frozenset((a, b)) not in played), 0)
+        pairs.append((a, order.pop(j)))
+    return pairs
+
+
+def update_elo(ratings, a, b, score_a, k=ELO_K):
+    expected = 1.0 / (1.0 + 10 ** ((ratings[b] - ratings[a]) / 400.0))
+    ratings[a] += k * (score_a - expected)
+    ratings[b] -= k * (score_a - expected)
+
+
+def load_results(path):
+    done = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    rec = json.loads(line)
+                    done[rec['match_id']] = rec
+    return done
+
+
+# -------------------------
+# Driver
+# -------------------------
+def run_tournament(players, fmt='round-robin', rounds=1, games=2, seed=0, workers=None, out_path=None,
+                   max_steps=2000, difficulty='Medium', log=sys.stderr):
+    names = sorted(players)
+    done = load_results(out_path)
+    ratings = {n: BASE_RATING for n in names}
+    stats = {n: {'games': 0, 'points': 0.0, 'score': 0} for n in names}
+    played = set()
+    workers = workers or os.cpu_count() or 1
+    out = open(out_path, 'a', encoding='utf-8') if out_path else None
+    n_rounds = 1 if fmt == 'round-robin' else rounds
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for round_no in range(n_rounds):
+                pairs = round_robin_pairs(names) if fmt == 'round-robin' else swiss_pairs(names, ratings, played)
+                jobs = [{'match_id': match_id(round_no, a, b, players[a], players[b], seed, games, max_steps, difficulty),
+                         'round': round_no, 'a': a, 'b': b, 'pa': players[a], 'pb': players[b],
+                         'seed': match_seed(seed, round_no, a, b),
+                         'games': games, 'max_steps': max_steps, 'difficulty': difficulty} for a, b in pairs]
+                pending = [j for j in jobs if j['match_id'] not in done]
+                start = time.perf_counter()
+                # batch small jobs so IPC stays negligible next to game time
+                chunk = max(1, min(32, len(pending) // (workers * 4)))
+                futures = [pool.submit(play_matches, pending[i:i+chunk]) for i in range(0, len(pending), chunk)]
+                for fut in as_completed(futures):
+                    for rec in fut.result():
+                        done[rec['match_id']] = rec
+                        if out:
+                            out.write(json.dumps(rec) + '\n')
+                    if out:
+                        out.flush()
+                if log and pending:
+                    print(f"round {round_no}: {len(pending)} matches in {time.perf_counter() - start:.1f}s "
+                          f"({len(jobs) - len(pending)} resumed)", file=log)
+
+                # replay in pairing order so ratings don't depend on completion order
+                for j in jobs:
+                    rec = done[j['match_id']]
+                    a, b = rec['a'], rec['b']
+                    update_elo(ratings, a, b, rec['points_a'] / rec['games'])
+                    played.add(frozenset((a, b)))
+                    for n, pts, sc in ((a, rec['points_a'], rec['score_a']), (b, rec['games'] - rec['points_a'], rec['score_b'])):
+                        stats[n]['games'] += rec['games']
+                        stats[n]['points'] += pts
+                        stats[n]['score'] += sc
+    finally:
+        if out:
+            out.close()
+
+    table = []
+    for n in sorted(names, key=lambda n: (-ratings[n], n)):
+        table.append({'name': n, 'rating': round(ratings[n], 1), **stats[n], 'personality': players[n]})
+    return table
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m game.tournament', description='Rate CognitiveAIAgent personalities against each other.')
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument('--personalities', help='JSON file with a list of personality dicts')
+    src.add_argument('--random', type=int, metavar='N', help='generate N random personalities from --seed')
+    parser.add_argument('--format', default='round-robin', choices=['round-robin', 'swiss'])
+    parser.add_argument('--rounds', type=int, default=7, help='Swiss rounds')
+    parser.add_argument('--games', type=int, default=2, help='games per match (start positions alternate)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--max-steps', type=int, default=2000)
+    parser.add_argument('--difficulty', default='Medium', choices=list(DIFFICULTIES))
+    parser.add_argument('--out', default=None, help='match results JSONL; existing results are resumed')
+    parser.add_argument('--ratings', default=None, help='write the final rating table as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    players = load_personalities(args.personalities) if args.personalities else random_personalities(args.random, args.seed)
+    table = run_tournament(players, args.format, args.rounds, args.games, args.seed, args.workers, args.out,
+                           args.max_steps, args.difficulty)
+    if args.ratings:
+        with open(args.ratings, 'w', encoding='utf-8') as f:
+            json.dump(table, f, indent=2)
+    for rank, row in enumerate(table, 1):
+        print(f"{rank:>4}  {row['name']:<16} {row['rating']:>7.1f}  {row['points']:>6.1f}/{row['games']:<5} "
+              + " ".join(f"{k}={row['personality'].get(k, '-')}" for k in PERSONALITY_KEYS))
+
+
+if __name__ == "__main__":
+    main()
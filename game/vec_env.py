@@ -0,0 +1,382 @@
+# game/vec_env.py
+"""
+Vectorized multi-arena environment.
+
+VecEnvironment keeps N independent boards in NumPy arrays and advances all of
+them with one step(actions) call. Snakes follow the CognitiveAIAgent rules
+inside Environment.step: moves are clamped to the board, a snake dies when its
+new head hits any body (dead snakes stay on the board), an obstacle or the wall
+(clamped onto itself), it grows when it eats and the centralized eating pass
+scores the food a second time. Food is capped at 3 per board, bonus food
+expires after 300 steps and obstacles drift every 10 steps. Besides the
+food_grid each board keeps its food in a few slots (food_pos/food_kind/
+food_life), so the rollout policies and the bonus timer never scan the grid.
+
+Snakes within a board still move one after another (snake s sees the bodies of
+snakes < s already moved, like the ai_list loop); only the arenas are batched.
+Finished boards (all snakes dead or max_steps reached) are reset automatically
+unless auto_reset=False, which forward models use to see how a rollout ended.
+"""
+import numpy as np
+from core.config import GRID_SIZE
+
+DIRECTIONS = ["UP", "DOWN", "LEFT", "RIGHT"]   # action index -> Environment direction
+DELTAS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int16)
+
+EMPTY, NORMAL, BONUS, POISON = 0, 1, 2, 3
+FOOD_TYPES = {NORMAL: "normal", BONUS: "bonus", POISON: "poison"}
+CENTRAL_SCORE = np.array([0, 1, 3, -2], dtype=np.int32)   # centralized eating pass
+BONUS_LIFETIME = 300
+MAX_FOOD = 3
+OBSTACLE_MOVE_EVERY = 10
+
+DEATH_CAUSES = [None, "wall", "self", "obstacle", "snake"]
+
+DEFAULT_STARTS = [(5, 5), (15, 15), (17, 17), (19, 19)]
+
+# every array that makes up a board, in get_state()/set_state() order
+STATE_ARRAYS = ('bodies', 'head_idx', 'lengths', 'alive', 'death_cause', 'scores', 'snake_grid', 'food_grid',
+                'food_pos', 'food_kind', 'food_life', 'food_count', 'obstacles', 'obstacle_grid', 'step_count',
+                'obstacle_move_counter')
+
+
+class VecEnvironment:
+    def __init__(self, num_envs, num_snakes=4, num_obstacles=0, seed=None, grid_size=GRID_SIZE,
+                 max_steps=5000, start_positions=None, auto_reset=True):
+        self.num_envs = N = num_envs
+        self.num_snakes = S = num_snakes
+        self.num_obstacles = O = num_obstacles
+        self.grid_size = G = grid_size
+        self.max_steps = max_steps
+        self.auto_reset = auto_reset  # False: finished boards stay as they ended and keep reporting done
+        self.start_positions = start_positions or DEFAULT_STARTS[:num_snakes]
+        if len(self.start_positions) != num_snakes:
+            raise ValueError("need one start position per snake")
+        self.rng = np.random.default_rng(seed)
+
+        L = G * G  # ring capacity: a body can never exceed the board
+        self.bodies = np.zeros((N, S, L, 2), dtype=np.int16)   # ring buffers of (x, y)
+        self.head_idx = np.zeros((N, S), dtype=np.int32)
+        self.lengths = np.zeros((N, S), dtype=np.int32)
+        self.alive = np.zeros((N, S), dtype=bool)
+        self.death_cause = np.zeros((N, S), dtype=np.int8)     # index into DEATH_CAUSES
+        self.scores = np.zeros((N, S), dtype=np.int32)
+
+        # per-board grids, indexed [env, x, y]
+        self.snake_grid = np.zeros((N, G, G), dtype=np.int16)
+        self.food_grid = np.zeros((N, G, G), dtype=np.int8)
+        self.obstacle_grid = np.zeros((N, G, G), dtype=np.int16)
+        self._alloc_food_slots(MAX_FOOD)
+        self.food_count = np.zeros(N, dtype=np.int32)
+        self.obstacles = np.zeros((N, O, 2), dtype=np.int16)
+
+        self.step_count = np.zeros(N, dtype=np.int32)
+        self.obstacle_move_counter = np.zeros(N, dtype=np.int32)
+        self._env_ix = np.arange(N)[:, None]
+        self._snake_ix = np.arange(S)[None, :]
+        self._cell_base = (np.arange(N) * (G * G))[:, None, None]   # flat offset of each board's grid
+        self.reset()
+
+    def _alloc_food_slots(self, slots):
+        N = self.num_envs
+        self.food_pos = np.zeros((N, slots, 2), dtype=np.int16)
+        self.food_kind = np.zeros((N, slots), dtype=np.int8)     # EMPTY marks a free slot
+        self.food_life = np.zeros((N, slots), dtype=np.int16)    # bonus steps left
+
+    # -------------------------
+    # Reset
+    # -------------------------
+    def reset(self, mask=None):
+        idx = np.arange(self.num_envs) if mask is None else np.flatnonzero(mask)
+        if not idx.size:
+            return
+        for arr in (self.head_idx, self.lengths, self.death_cause, self.scores, self.snake_grid, self.food_grid,
+                    self.food_kind, self.food_life, self.food_count, self.obstacle_grid, self.step_count, self.obstacle_move_counter):
+            arr[idx] = 0
+        self.alive[idx] = True
+        for s, (x, y) in enumerate(self.start_positions):
+            self.bodies[idx, s, 0] = (x, y)
+            self.lengths[idx, s] = 1
+            self.snake_grid[idx, x, y] += 1
+        for o in range(self.num_obstacles):
+            has, cells = self._sample_free(idx)
+            self.obstacles[has, o] = cells
+            self.obstacle_grid[has, cells[:, 0], cells[:, 1]] += 1
+        for _ in range(MAX_FOOD):
+            self._spawn_food(idx)
+
+    def load(self, snakes, food, obstacles, step_count=0, obstacle_move_counter=0):
+        """
+        Put every board into one given position, e.g. a live Environment's, to run
+        rollouts from it. snakes: (head-first body, alive, score) per snake; food:
+        (cell, type name, bonus lifetime or None); obstacles: one cell per obstacle.
+        """
+        G, L = self.grid_size, self.bodies.shape[2]
+        if len(snakes) != self.num_snakes or len(obstacles) != self.num_obstacles:
+            raise ValueError(f"board has {self.num_snakes} snakes and {self.num_obstacles} obstacles, "
+                             f"position has {len(snakes)} and {len(obstacles)}")
+        self.bodies[:] = 0
+        snake_grid = np.zeros((G, G), dtype=np.int16)
+        for s, (body, alive, score) in enumerate(snakes):
+            n = len(body)
+            if n:
+                cells = np.array(body[::-1], dtype=np.int16)   # ring runs tail -> head
+                self.bodies[:, s, :n] = cells
+                np.add.at(snake_grid, (cells[:, 0], cells[:, 1]), 1)
+            self.head_idx[:, s] = (n - 1) % L
+            self.lengths[:, s] = n
+            self.alive[:, s] = alive and n > 0
+            self.scores[:, s] = score
+        self.death_cause[:] = 0
+        self.snake_grid[:] = snake_grid
+
+        codes = {name: code for code, name in FOOD_TYPES.items()}
+        if len(food) > self.food_kind.shape[1]:
+            self._alloc_food_slots(len(food))   # level-ups can put more than MAX_FOOD on the board
+        self.food_grid[:] = EMPTY
+        self.food_kind[:] = EMPTY
+        self.food_life[:] = 0
+        for k, ((x, y), ftype, lifetime) in enumerate(food):
+            self.food_grid[:, x, y] = codes[ftype]
+            self.food_pos[:, k] = (x, y)
+            self.food_kind[:, k] = codes[ftype]
+            self.food_life[:, k] = lifetime or 0
+        self.food_count[:] = len(food)
+
+        self.obstacle_grid[:] = 0
+        for o, (x, y) in enumerate(obstacles):
+            self.obstacles[:, o] = (x, y)
+            self.obstacle_grid[:, x, y] += 1
+        self.step_count[:] = step_count
+        self.obstacle_move_counter[:] = obstacle_move_counter
+
+    def get_state(self):
+        """Copy of every board's arrays, for set_state()"""
+        return tuple(getattr(self, name).copy() for name in STATE_ARRAYS)
+
+    def set_state(self, state):
+        for name, arr in zip(STATE_ARRAYS, state):
+            if getattr(self, name).shape != arr.shape:   # food slots grown by a load() since
+                setattr(self, name, np.empty_like(arr))
+            np.copyto(getattr(self, name), arr)
+
+    # -------------------------
+    # Spawning
+    # -------------------------
+    def _sample_free(self, idx):
+        """One uniformly random free cell per board in idx (boards without one are dropped)"""
+        G = self.grid_size
+        # boards are mostly empty, so a few random probes settle almost every board without a full-grid scan
+        flat = self.rng.integers(G * G, size=(len(idx), 4))
+        x, y = flat // G, flat % G
+        b = idx[:, None]
+        ok = (self.snake_grid[b, x, y] == 0) & (self.obstacle_grid[b, x, y] == 0) & (self.food_grid[b, x, y] == 0)
+        hit = ok.any(axis=1)
+        pick = flat[np.arange(len(idx)), ok.argmax(axis=1)]
+        out_idx, out_flat = idx[hit], pick[hit]
+        rest = idx[~hit]
+        if rest.size:
+            free = (self.snake_grid[rest] == 0) & (self.obstacle_grid[rest] == 0) & (self.food_grid[rest] == 0)
+            free = free.reshape(len(rest), G * G)
+            r = self.rng.random(free.shape)
+            r[~free] = -1.0
+            has = free.any(axis=1)
+            out_idx = np.concatenate([out_idx, rest[has]])
+            out_flat = np.concatenate([out_flat, r.argmax(axis=1)[has]])
+        return out_idx, np.stack([out_flat // G, out_flat % G], axis=1)
+
+    def _spawn_food(self, idx):
+        idx, cells = self._sample_free(idx)
+        if not idx.size:
+            return
+        r = self.rng.random(len(idx))
+        ftype = np.where(r < 0.7, NORMAL, np.where(r < 0.9, BONUS, POISON)).astype(np.int8)
+        x, y = cells[:, 0], cells[:, 1]
+        self.food_grid[idx, x, y] = ftype
+        slot = (self.food_kind[idx] == EMPTY).argmax(axis=1)   # callers only spawn below MAX_FOOD, so one is free
+        self.food_pos[idx, slot] = cells
+        self.food_kind[idx, slot] = ftype
+        self.food_life[idx, slot] = np.where(ftype == BONUS, BONUS_LIFETIME, 0)
+        self.food_count[idx] += 1
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def heads(self):
+        """(N, S, 2) current head cell of every snake"""
+        return self.bodies[self._env_ix, self._snake_ix, self.head_idx]
+
+    def body(self, env, snake):
+        """Body of one snake as a head-first list of (x, y), like agent.body"""
+        L = self.bodies.shape[2]
+        h, n = self.head_idx[env, snake], self.lengths[env, snake]
+        ring = self.bodies[env, snake, (h - np.arange(n)) % L]
+        return [tuple(c) for c in ring.tolist()]
+
+    def food(self, env):
+        """{(x, y): type} for one board, like Environment's food_types map"""
+        xs, ys = np.nonzero(self.food_grid[env])
+        return {(int(x), int(y)): FOOD_TYPES[int(self.food_grid[env, x, y])] for x, y in zip(xs, ys)}
+
+    def _candidate_moves(self):
+        """Heads (N, S, 2), the cell each move leads to (N, S, 4, 2, clamped) and whether it is safe (N, S, 4)"""
+        G = self.grid_size
+        heads = self.heads().astype(np.int32)
+        moved = heads[:, :, None, :] + DELTAS
+        new = np.minimum(np.maximum(moved, 0), G - 1)
+        x, y = new[..., 0], new[..., 1]
+        inside = (x == moved[..., 0]) & (y == moved[..., 1])
+        cell = self._cell_base + x * G + y   # flat take() is much cheaper than 3-D fancy indexing
+        free = (self.snake_grid.reshape(-1).take(cell) == 0) & (self.obstacle_grid.reshape(-1).take(cell) == 0)
+        return heads, new, inside & free
+
+    def safe_actions(self):
+        """(N, S, 4) bool: moves that don't run into the wall, a body (tails included) or an obstacle"""
+        return self._candidate_moves()[2]
+
+    def random_safe_actions(self):
+        """Cheap default policy: a uniformly random safe move per snake (any move when none is safe)"""
+        safe = self.safe_actions()
+        return (self.rng.random(safe.shape) + safe).argmax(axis=2)
+
+    def greedy_safe_actions(self, eps=0.25):
+        """
+        Cheap default policy that goes for food: the safe move closest (L1) to the
+        snake's nearest food, or a random safe move with probability eps.
+        """
+        N, S = self.num_envs, self.num_snakes
+        heads, new, safe = self._candidate_moves()
+        r = self.rng.random((N, S, 5))
+        # empty slots sit far off the board, so they are never the nearest food while there is one
+        foods = np.where((self.food_kind == EMPTY)[..., None], 4 * self.grid_size, self.food_pos).astype(np.int32)
+        dist = np.abs(heads[:, :, None, 0] - foods[:, None, :, 0]) + np.abs(heads[:, :, None, 1] - foods[:, None, :, 1])
+        target = foods[self._env_ix, dist.argmin(axis=2)]                        # (N, S, 2)
+        score = (np.abs(new[..., 0] - target[:, :, None, 0]) + np.abs(new[..., 1] - target[:, :, None, 1])
+                 + r[..., :4] * 0.5)   # random tie-break
+        score = np.where(r[..., 4:] < eps, r[..., :4], score)
+        return np.where(safe, score, score + 1e6).argmin(axis=2)
+
+    # -------------------------
+    # Step
+    # -------------------------
+    def step(self, actions):
+        """
+        actions: (N, S) ints indexing DIRECTIONS (ignored for dead snakes).
+        Returns (rewards, dones, info); rewards are per-snake score deltas and
+        info holds final 'scores'/'steps' for the boards that finished (and were reset,
+        with auto_reset).
+        """
+        N, S, G = self.num_envs, self.num_snakes, self.grid_size
+        L = self.bodies.shape[2]
+        actions = np.asarray(actions).reshape(N, S)
+        prev_scores = self.scores.copy()
+        ate = np.zeros((N, S), dtype=bool)
+
+        # snakes act in order; grids and rings are addressed through flat views, cheaper than 3-D fancy indexing
+        snake_grid, food_grid = self.snake_grid.reshape(-1), self.food_grid.reshape(-1)
+        obstacle_grid, ring = self.obstacle_grid.reshape(-1), self.bodies.reshape(-1, 2)
+        for s in range(S):
+            live = self.alive[:, s].nonzero()[0]
+            if not live.size:
+                continue
+            hi = self.head_idx[live, s]
+            slot = (live * S + s) * L            # ring start of snake s on each live board
+            head = ring[slot + hi].astype(np.intp)   # x * G overflows int16 on big boards
+            new = np.minimum(np.maximum(head + DELTAS[actions[live, s]], 0), G - 1)  # np.clip has a slow Python wrapper
+            cell = live * (G * G) + new[:, 0] * G + new[:, 1]
+
+            hit_obstacle = obstacle_grid[cell] > 0
+            dead = (snake_grid[cell] > 0) | hit_obstacle
+            if dead.any():
+                self._kill(live[dead], s, head[dead], new[dead], hit_obstacle[dead])
+                ok = ~dead
+                live, hi, slot, new, cell = live[ok], hi[ok], slot[ok], new[ok], cell[ok]
+
+            hi = (hi + 1) % L
+            self.head_idx[live, s] = hi
+            ring[slot + hi] = new
+            snake_grid[cell] += 1
+            lengths = self.lengths[live, s] + 1
+
+            # the agent's own step scores the food and skips the tail pop
+            ftype = food_grid[cell]
+            got = ftype > EMPTY
+            ate[live[got], s] = True
+            sc = self.scores[live, s] + CENTRAL_SCORE[ftype]   # same +1/+3/-2 table, but poison floors at 0
+            self.scores[live, s] = np.where(ftype == POISON, np.maximum(0, sc), sc)
+
+            grow = ~got
+            tail = ring[slot[grow] + (hi[grow] - lengths[grow] + 1) % L].astype(np.intp)
+            snake_grid[live[grow] * (G * G) + tail[:, 0] * G + tail[:, 1]] -= 1
+            self.lengths[live, s] = lengths - grow
+
+        # centralized eating
+        for s in range(S):
+            e = (ate[:, s] & self.alive[:, s]).nonzero()[0]
+            if not e.size:
+                continue
+            head = self.bodies[e, s, self.head_idx[e, s]]
+            x, y = head[:, 0], head[:, 1]
+            self.scores[e, s] += CENTRAL_SCORE[self.food_grid[e, x, y]]
+            self.food_grid[e, x, y] = EMPTY
+            slot = ((self.food_pos[e] == head[:, None, :]).all(axis=2) & (self.food_kind[e] != EMPTY)).argmax(axis=1)
+            self.food_kind[e, slot] = EMPTY
+            self.food_life[e, slot] = 0
+            self.food_count[e] -= 1
+
+        # bonus food lifetime
+        bonus = self.food_kind == BONUS
+        self.food_life -= bonus
+        expired = bonus & (self.food_life <= 0)
+        if expired.any():
+            e, k = expired.nonzero()
+            self.food_grid[e, self.food_pos[e, k, 0], self.food_pos[e, k, 1]] = EMPTY
+            self.food_kind[e, k] = EMPTY
+            self.food_count -= expired.sum(axis=1, dtype=np.int32)
+
+        # ensure max 3 foods
+        for _ in range(MAX_FOOD):
+            need = (self.food_count < MAX_FOOD).nonzero()[0]
+            if not need.size:
+                break
+            self._spawn_food(need)
+
+        # obstacles move slowly
+        self.obstacle_move_counter += 1
+        if self.num_obstacles:
+            m = (self.obstacle_move_counter >= OBSTACLE_MOVE_EVERY).nonzero()[0]
+            if m.size:
+                self._move_obstacles(m)
+        self.obstacle_move_counter[self.obstacle_move_counter >= OBSTACLE_MOVE_EVERY] = 0
+
+        self.step_count += 1
+        rewards = self.scores - prev_scores
+        dones = ~self.alive.any(axis=1) | (self.step_count >= self.max_steps)
+        info = {}
+        if dones.any():
+            info = {'scores': self.scores[dones].copy(), 'steps': self.step_count[dones].copy(),
+                    'death_cause': self.death_cause[dones].copy()}
+            if self.auto_reset:
+                self.reset(dones)
+        return rewards, dones, info
+
+    def _kill(self, envs, s, head, new, hit_obstacle):
+        self.alive[envs, s] = False
+        L = self.bodies.shape[2]
+        # only dying snakes pay for the body scan that tells "self" from "snake", and only as far as the longest
+        lengths = self.lengths[envs, s]
+        span = np.arange(int(lengths.max()))
+        ring = (self.head_idx[envs, s][:, None] - span[None, :]) % L
+        cells = self.bodies[envs[:, None], s, ring]
+        in_body = span[None, :] < lengths[:, None]
+        own = ((cells == new[:, None, :]).all(axis=2) & in_body).any(axis=1)
+        wall = (new == head).all(axis=1)
+        self.death_cause[envs, s] = np.where(wall, 1, np.where(own, 2, np.where(hit_obstacle, 3, 4)))
+
+    def _move_obstacles(self, envs):
+        G = self.grid_size
+        old = self.obstacles[envs].astype(np.int32)
+        np.add.at(self.obstacle_grid, (np.repeat(envs, self.num_obstacles), old[..., 0].ravel(), old[..., 1].ravel()), -1)
+        new = np.minimum(np.maximum(old + self.rng.integers(-1, 2, size=old.shape), 0), G - 1)
+        self.obstacles[envs] = new
+        np.add.at(self.obstacle_grid, (np.repeat(envs, self.num_obstacles), new[..., 0].ravel(), new[..., 1].ravel()), 1)
@@ -1,15 +1,13 @@
 # main.py
-import pygame, sys
-from core.config import WINDOW_WIDTH, WINDOW_HEIGHT, BASE_FPS, FPS_INCREMENT, LEVEL_UP_SCORE, FONT_NAME, EVENT_LOG_PATH
-from agents.human_agent import HumanAgent
-from agents.cognitive_ai_agent import CognitiveAIAgent
+import pygame, sys, random, time
+from core.config import WINDOW_WIDTH, WINDOW_HEIGHT, BASE_FPS, FPS_INCREMENT, LEVEL_UP_SCORE, FONT_NAME, EVENT_LOG_PATH, \
+    EVENT_LOG_BUFFER, EVENT_LOG_MAX_BYTES, EVENT_LOG_BACKUPS, REPLAY_DIR, RENDER_FPS, MAX_TICKS_PER_FRAME
 from game.environment import Environment
-
-pygame.init()
-try:
-    pygame.mixer.init()
-except Exception:
-    pass
+from game.headless import build_roster, start_cells
+from game.event_log import EventLogWriter
+from game.replay import Recorder
+from game.renderer import TEXT_CACHE
+from game import profiler
 
 def safe_play(sound):
     if sound:
@@ -18,8 +16,26 @@ def safe_play(sound):
         except:
             pass
 
+AI_CHOICES = (1, 2, 3, 10, 50, 200)  # menu options, trimmed to what fits on the board
+GAME_OVER_ROWS = 5                   # AIs listed on the game over screen, best first
+
+# window events after which the whole frame has to be repainted
+REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED)
+
+def ticks_due(lag, dt, fps):
+    """
+    Fixed-timestep accumulator: add dt seconds of real time to the lag not yet simulated
+    and return (ticks to run at fps, lag left over, alpha), alpha in [0, 1) being how far
+    the frame is between the last tick and the next. After a stall at most
+    MAX_TICKS_PER_FRAME ticks are caught up and the rest of the stall is dropped.
+    """
+    ticks = min((lag + dt) * fps, MAX_TICKS_PER_FRAME)
+    n = int(ticks)
+    alpha = ticks - n
+    return n, alpha / fps, alpha
+
 def draw_text_center(screen, text, font, color, y):
-    txt = font.render(text, True, color)
+    txt = TEXT_CACHE.render(font, text, color)
     screen.blit(txt, (WINDOW_WIDTH//2 - txt.get_width()//2, y))
 
 def start_menu(screen):
@@ -28,38 +44,44 @@ def start_menu(screen):
     font_medium = pygame.font.SysFont(FONT_NAME, 36)
 
     difficulty_levels = ['Easy', 'Medium', 'Hard']
-    ai_options = [1, 2, 3]
+    ai_options = [n for n in AI_CHOICES if n <= len(start_cells())]
     selected_difficulty = 0
     selected_ai = 0
     menu_stage = 0  # 0=difficulty, 1=AI count
 
     running = True
+    changed = True
     while running:
-        screen.fill((20, 20, 40))
-        y = 100
-        draw_text_center(screen, "Snake Arena", font_large, (255,255,0), y)
-        y += 100
+        if changed:  # static until a key press or an expose
+            changed = False
+            screen.fill((20, 20, 40))
+            y = 100
+            draw_text_center(screen, "Snake Arena", font_large, (255,255,0), y)
+            y += 100
 
-        if menu_stage == 0:
-            draw_text_center(screen, "Select Difficulty:", font_medium, (255,255,255), y)
-            y += 50
-            for idx, level in enumerate(difficulty_levels):
-                color = (255,255,0) if idx == selected_difficulty else (200,200,200)
-                draw_text_center(screen, level, font_medium, color, y + idx*40)
-        elif menu_stage == 1:
-            draw_text_center(screen, "Select Number of AI Agents:", font_medium, (255,255,255), y)
-            y += 50
-            for idx, num in enumerate(ai_options):
-                color = (255,255,0) if idx == selected_ai else (200,200,200)
-                draw_text_center(screen, f"{num} AI", font_medium, color, y + idx*40)
+            if menu_stage == 0:
+                draw_text_center(screen, "Select Difficulty:", font_medium, (255,255,255), y)
+                y += 50
+                for idx, level in enumerate(difficulty_levels):
+                    color = (255,255,0) if idx == selected_difficulty else (200,200,200)
+                    draw_text_center(screen, level, font_medium, color, y + idx*40)
+            elif menu_stage == 1:
+                draw_text_center(screen, "Select Number of AI Agents:", font_medium, (255,255,255), y)
+                y += 50
+                for idx, num in enumerate(ai_options):
+                    color = (255,255,0) if idx == selected_ai else (200,200,200)
+                    draw_text_center(screen, f"{num} AI", font_medium, color, y + idx*40)
 
-        pygame.display.flip()
+            pygame.display.flip()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type in REPAINT_EVENTS:
+                changed = True
             if event.type == pygame.KEYDOWN:
+                changed = True
                 if event.key == pygame.K_DOWN:
                     if menu_stage == 0:
                         selected_difficulty = (selected_difficulty + 1) % len(difficulty_levels)
@@ -83,29 +105,40 @@ def game_over_screen(screen, human, ai_list, env):
     font_large = pygame.font.SysFont(FONT_NAME, 50)
     font_medium = pygame.font.SysFont(FONT_NAME, 36)
 
+    changed = True
     while True:
-        screen.fill((0,0,0))
-        y = 80
-        draw_text_center(screen, "Game Over!", font_large, (255,0,0), y)
-        y += 80
-        draw_text_center(screen, f"Human: {human.score}", font_medium, human.color, y)
-        y += 50
-        colors = [(200,0,0),(0,0,200),(200,0,200)]
-        for idx, a in enumerate(ai_list):
-            draw_text_center(screen, f"AI{idx+1}: {a.score}", font_medium, colors[idx%len(colors)], y)
-            y += 40
-        scores = [(human.score, "Human")] + [(a.score, f"AI{idx+1}") for idx, a in enumerate(ai_list)]
-        winner = max(scores, key=lambda x: x[0])
-        y += 20
-        draw_text_center(screen, f"Winner: {winner[1]}", font_medium, (255,255,0), y)
-        y += 80
-        draw_text_center(screen, "Press R to Restart or Q to Quit", font_medium, (255,255,255), y)
-        pygame.display.flip()
+        if changed:  # nothing changes on this screen unless the window is exposed
+            changed = False
+            screen.fill((0,0,0))
+            y = 80
+            draw_text_center(screen, "Game Over!", font_large, (255,0,0), y)
+            y += 80
+            draw_text_center(screen, f"Human: {human.score}", font_medium, human.color, y)
+            y += 50
+            colors = [(200,0,0),(0,0,200),(200,0,200)]
+            shown = list(enumerate(ai_list))
+            if len(shown) > GAME_OVER_ROWS:
+                shown = sorted(shown, key=lambda e: -e[1].score)[:GAME_OVER_ROWS]
+            for idx, a in shown:
+                draw_text_center(screen, f"AI{idx+1}: {a.score}", font_medium, colors[idx%len(colors)], y)
+                y += 40
+            if len(ai_list) > GAME_OVER_ROWS:
+                draw_text_center(screen, f"... and {len(ai_list) - GAME_OVER_ROWS} more", font_medium, (200,200,200), y)
+                y += 40
+            scores = [(human.score, "Human")] + [(a.score, f"AI{idx+1}") for idx, a in enumerate(ai_list)]
+            winner = max(scores, key=lambda x: x[0])
+            y += 20
+            draw_text_center(screen, f"Winner: {winner[1]}", font_medium, (255,255,0), y)
+            y += 80
+            draw_text_center(screen, "Press R to Restart or Q to Quit", font_medium, (255,255,255), y)
+            pygame.display.flip()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type in REPAINT_EVENTS:
+                changed = True
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
                     return True  # restart
@@ -115,8 +148,19 @@ def game_over_screen(screen, human, ai_list, env):
         clock.tick(30)
 
 def main():
+    pygame.init()
+    try:
+        pygame.mixer.init()
+    except Exception:
+        pass
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Cognitive MAS Snake Arena (Rational + Complex Systems)")
+    profile_font = pygame.font.SysFont('monospace', 12)
+    show_profile = False  # F3 starts profiling and toggles the overlay
+
+    # events stream to disk (appending across games) instead of piling up in memory
+    event_writer = EventLogWriter(EVENT_LOG_PATH, buffer_size=EVENT_LOG_BUFFER, max_bytes=EVENT_LOG_MAX_BYTES,
+                                  backups=EVENT_LOG_BACKUPS, background=True)
 
     restart_game = True
     while restart_game:
@@ -135,59 +179,83 @@ def main():
             fps_increment = 3
 
         # create agents
-        human = HumanAgent(0, (5,5))
-        ai_list = [CognitiveAIAgent(i+1, (15+i*2,15+i*2)) for i in range(num_ai)]
-        env = Environment(human, ai_list, seed=None)
+        human, ai_list = build_roster(num_ai)
+        # explicit seed so the game can be replayed deterministically
+        seed = random.SystemRandom().randrange(2**31)
+        env = Environment(human, ai_list, seed=seed, event_writer=event_writer)
+        recorder = Recorder(seed, num_ai, difficulty)
+        replay_path = f"{REPLAY_DIR}/session-{time.strftime('%Y%m%d-%H%M%S')}-{seed}.json"
 
         level = 1
         last_level = 1
         running = True
         clock = pygame.time.Clock()
+        lag = 0.0  # real time not yet simulated, in seconds
 
+        # fps is the simulation rate (ticks per second) and only it speeds up with the level;
+        # input and drawing run every frame at RENDER_FPS
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    recorder.save(replay_path)  # closing the window is how most sessions end
                     pygame.quit()
                     sys.exit()
+                elif event.type in REPAINT_EVENTS and env.renderer is not None:
+                    env.renderer.invalidate()  # window contents were lost: repaint the full frame
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    show_profile = not show_profile
+                    if profiler.active is None:
+                        profiler.enable()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB and env.renderer is not None:
+                    # cycle the camera through the live snakes, human first
+                    targets = [None] + [a for a in ai_list if a.alive]
+                    current = targets.index(env.renderer.target) if env.renderer.target in targets else 0
+                    env.renderer.follow(targets[(current + 1) % len(targets)])
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_m and env.renderer is not None:
+                    env.renderer.toggle_minimap()
                 else:
                     human.handle_event(event)
 
-            env.step(level)
-
-            # Level up by human + AI scores
-            highest = max([human.score] + [a.score for a in ai_list])
-            target_level = 1 + highest // level_up_score
-            if target_level > level:
-                level += 1  # step by step
-                fps += fps_increment
-                safe_play(env.levelup_sound)
-                if level == 2:
-                    env.spawn_obstacles(2)
-                elif level == 3:
-                    env.spawn_obstacles(3)
-                    env.spawn_food(1)
-                elif level >= 4:
-                    env.spawn_obstacles(4)
-                    env.spawn_food(2)
-
-            # Draw environment
-            env.draw(screen, level)
-            pygame.display.flip()
+            # a level-up mid-frame speeds up the ticks from the next frame on
+            ticks, lag, alpha = ticks_due(lag, clock.tick(RENDER_FPS) / 1000, fps)
+            for _ in range(ticks):
+                if not running:
+                    break
+                human.apply_turn()  # at most one buffered key turn per tick
+                recorder.record(env)
+                env.step(level)
+
+                # Level up by human + AI scores
+                highest = max([human.score] + [a.score for a in ai_list])
+                target_level = 1 + highest // level_up_score
+                if target_level > level:
+                    level += 1  # step by step
+                    fps += fps_increment
+                    safe_play(env.levelup_sound)
+                    env.spawn_for_level(level)
 
-            # -------------------------
-            # Game over logic
-            # -------------------------
-            alive_ai = [a for a in ai_list if a.alive]
-            total_alive = [human] + alive_ai
+                # -------------------------
+                # Game over logic
+                # -------------------------
+                alive_ai = [a for a in ai_list if a.alive]
+                total_alive = [human] + alive_ai
 
-            if not human.alive:
-                running = False
-            elif len(total_alive) == 2 and len(alive_ai) == 0:
-                running = False  # Only 2 snakes and AI dead
-            # Dead AI snakes are invisible but game continues if more than 2 snakes
+                if not human.alive:
+                    running = False
+                elif len(total_alive) == 2 and len(alive_ai) == 0:
+                    running = False  # Only 2 snakes and AI dead
+                # Dead AI snakes are invisible but game continues if more than 2 snakes
 
-            clock.tick(fps)
+            # Draw environment between the last tick and the next one: only what changed
+            dirty = env.draw(screen, level, alpha if running else 1.0)
+            if show_profile:
+                panel = profiler.active.overlay(profile_font)
+                rect = screen.blit(panel, (WINDOW_WIDTH - panel.get_width(), 0))
+                env.renderer.damage(rect)
+                dirty.append(rect)
+            pygame.display.update(dirty)
 
+        recorder.save(replay_path)
         restart_game = game_over_screen(screen, human, ai_list, env)
         env.save_event_log(EVENT_LOG_PATH)
 
@@ -0,0 +1,38 @@
+# tests/conftest.py
+import pytest
+from agents.dstar_lite import DStarLite
+from agents.mcts_agent import Node
+
+
+def planner_state(p):
+    return (p.goal, p.start, p.km, frozenset(p.blocked), tuple(sorted(p.g.items())), tuple(sorted(p.rhs.items())))
+
+
+def tree_state(node):
+    return (node.visits, node.total, tuple(tree_state(c) if c else None for c in node.children))
+
+
+def comparable(v):
+    if isinstance(v, DStarLite):
+        return planner_state(v)
+    if isinstance(v, Node):
+        return tree_state(v)
+    if isinstance(v, dict) and all(isinstance(cells, list) for cells in v.values()):
+        # perceptions: cell lists in spatial-hash order, which a rebuilt index does not keep; agents treat them as sets
+        return tuple(sorted((k, tuple(sorted(cells))) for k, cells in v.items()))
+    return v
+
+
+def state_key(env, human_direction=True):
+    """env.snapshot() with D* Lite planners, MCTS trees and perceptions turned into comparable values"""
+    snap = env.snapshot()
+    snakes = [tuple(comparable(v) for v in s) for s in snap.snakes]
+    if not human_direction:
+        # the human's direction is set for the coming tick before Recorder.record sees the env
+        snakes[0] = snakes[0][:3] + snakes[0][4:]
+    return snap._replace(snakes=tuple(snakes))
+
+
+@pytest.fixture
+def env_state():
+    return state_key
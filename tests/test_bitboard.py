@@ -0,0 +1,40 @@
+# tests/test_bitboard.py
+import random
+from collections import deque
+import pytest
+from game.bitboard import Bitboard, BIT_TABLE_MAX_SIZE
+
+
+def bfs_reachable(start, blocked, size):
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for v in ((x, y-1), (x, y+1), (x-1, y), (x+1, y)):
+            if 0 <= v[0] < size and 0 <= v[1] < size and v not in blocked and v not in seen:
+                seen.add(v)
+                queue.append(v)
+    return seen
+
+
+@pytest.mark.parametrize('size', [20, BIT_TABLE_MAX_SIZE + 20])  # per-cell bit table and on-demand bits
+def test_flood_and_reachability_match_bfs(size):
+    rng = random.Random(size)
+    board = Bitboard(size)
+    boards = 500 if size <= BIT_TABLE_MAX_SIZE else 20
+    for _ in range(boards):
+        blocked = {(rng.randrange(size), rng.randrange(size)) for _ in range(rng.randrange(size * size * 2 // 3))}
+        start = (rng.randrange(size), rng.randrange(size))
+        goal = (rng.randrange(size), rng.randrange(size))
+        mask = board.mask(blocked)
+        reach = bfs_reachable(start, blocked, size)
+        assert set(board.cells(board.flood(start, mask))) == reach
+        assert board.reachable_count(start, mask) == len(reach)
+        assert board.reachable_count(start, mask, limit=50) == min(len(reach), 50)
+        assert board.is_reachable(start, goal, mask) == (goal in reach)
+
+
+def test_mask_round_trip():
+    board = Bitboard(30)
+    cells = {(0, 0), (29, 29), (29, 0), (0, 29), (13, 7)}
+    assert set(board.cells(board.mask(cells))) == cells
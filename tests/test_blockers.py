@@ -0,0 +1,90 @@
+# tests/test_blockers.py
+from collections import Counter
+from game.blockers import Blockers
+from game.environment import Environment
+from game.headless import build_roster
+
+
+def reference_counts(env):
+    """Snake segments and obstacles per cell, counted from scratch"""
+    counts = Counter(o.position for o in env.obstacle_agents)
+    for snake in [env.human] + env.ai_list:
+        counts.update(snake.body)
+    return dict(counts)
+
+
+def test_counts_bits_and_journal_follow_a_game():
+    human, ai_list = build_roster(8)
+    env = Environment(human, ai_list, seed=3, headless=True)
+    env.spawn_for_level(3)  # drifting obstacles move blocked cells too
+    blockers = env.blockers
+    for _ in range(150):
+        before, version = set(blockers.counts), blockers.version()
+        env.step(3)
+        expected = reference_counts(env)
+        assert blockers.counts == expected, env.step_count
+        assert blockers.bits == blockers.board.mask(expected)
+        fresh = Blockers(blockers.board.size)
+        fresh.load(c for snake in [env.human] + env.ai_list for c in snake.body)
+        for o in env.obstacle_agents:
+            fresh.add(o.position)
+        assert (fresh.counts, fresh.bits) == (blockers.counts, blockers.bits)
+        assert before ^ set(expected) <= set(blockers.changes_since(version))
+        if not any(a.alive for a in env.ai_list):
+            break
+    assert env.step_count > 20
+
+
+def test_changes_since_is_unknown_across_loads_and_instances():
+    blockers = Blockers(8)
+    v = blockers.version()
+    blockers.add((1, 1))
+    blockers.add((1, 1))
+    blockers.remove((1, 1))  # still blocked: not a change
+    blockers.add((2, 2))
+    assert blockers.changes_since(v) == [(1, 1), (2, 2)]
+    assert Blockers(8).changes_since(v) is None
+    blockers.load([(3, 3)])
+    assert blockers.changes_since(v) is None and blockers.changes_since(None) is None
+    assert blockers.changes_since(blockers.version()) == []
+
+
+def test_each_view_hides_only_its_own_body():
+    human, ai_list = build_roster(8)
+    env = Environment(human, ai_list, seed=3, headless=True)
+    env.spawn_for_level(3)
+    for _ in range(60):
+        env.step(3)
+    snakes = [env.human] + env.ai_list
+    obstacles = Counter(o.position for o in env.obstacle_agents)
+    cells = [(x, y) for x in range(env.occupancy.size) for y in range(env.occupancy.size)]
+    hidden = 0
+    for agent in env.ai_list:
+        # memory normally covers the whole body; keep one old cell so the own-body rule is what gets tested
+        kept = list(agent.memory)[:1]
+        agent.memory.clear()
+        agent.memory.extend(kept)
+        others = obstacles + Counter(c for s in snakes if s is not agent for c in s.body)
+        expected = set(others) | set(kept)
+        view = env.blockers.view(agent)
+        assert {c for c in cells if c in view} == expected
+        assert set(view) == expected and len(list(view)) == len(expected)
+        assert view.mask() == env.blockers.board.mask(expected)
+        hidden += len(set(agent.body) - expected)
+    assert hidden > 10
+
+
+def test_own_cells_another_snake_or_obstacle_covers_stay_blocked():
+    class Snake:
+        def __init__(self, body, memory=()):
+            self.body, self.memory = list(body), list(memory)
+
+    me = Snake([(1, 1), (1, 2), (1, 3), (2, 3)], memory=[(5, 5)])
+    other = Snake([(2, 3), (3, 3)])
+    blockers = Blockers(8)
+    blockers.load(me.body + other.body + [(1, 3)])  # an obstacle drifted onto (1, 3)
+    view = blockers.view(me)
+    assert [c in view for c in me.body] == [False, False, True, True]
+    assert set(view) == {(1, 3), (2, 3), (3, 3), (5, 5)}
+    assert view.mask() == blockers.board.mask(set(view))
+    assert set(blockers.view(other)) == {(1, 1), (1, 2), (1, 3), (2, 3)}
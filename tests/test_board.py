@@ -0,0 +1,110 @@
+# tests/test_board.py
+import random
+import pytest
+from game.occupancy import OccupancyGrid
+
+
+def check_index(grid):
+    """The free list holds exactly the zero-count cells and slot points back into it"""
+    free = {(x, y) for x in range(grid.size) for y in range(grid.size) if grid.counts[x, y] == 0}
+    assert len(grid.free) == len(free) and set(grid.free) == free
+    for i, (x, y) in enumerate(grid.free):
+        assert grid.slot[x, y] == i
+
+
+def test_counts_and_free_list_under_random_updates():
+    grid = OccupancyGrid(8)
+    rng = random.Random(0)
+    placed = []
+    for _ in range(2000):
+        if placed and rng.random() < 0.45:
+            grid.remove(placed.pop(rng.randrange(len(placed))))
+        else:
+            cell = (rng.randrange(8), rng.randrange(8))
+            grid.add(cell)
+            placed.append(cell)
+        assert grid.free_count() == 64 - len(set(placed))
+    check_index(grid)
+
+
+def test_shared_cell_stays_occupied_until_the_last_remove():
+    grid = OccupancyGrid(4)
+    grid.add((1, 1))
+    grid.add((1, 1))
+    grid.remove((1, 1))
+    assert not grid.is_free((1, 1))
+    grid.remove((1, 1))
+    grid.remove((1, 1))  # extra removes are ignored
+    assert grid.is_free((1, 1)) and grid.counts[1, 1] == 0
+    check_index(grid)
+
+
+def test_sample_free_never_returns_an_occupied_cell():
+    grid = OccupancyGrid(5)
+    for x in range(5):
+        for y in range(5):
+            if (x, y) != (3, 2):
+                grid.add((x, y))
+    rng = random.Random(1)
+    assert {grid.sample_free(rng) for _ in range(20)} == {(3, 2)}
+    grid.add((3, 2))
+    assert grid.sample_free(rng) is None
+
+
+def test_load_keeps_the_given_free_order():
+    grid = OccupancyGrid(3)
+    grid.add((0, 0))
+    grid.add((2, 1))
+    other = OccupancyGrid(3)
+    other.load([(0, 0), (2, 1)], grid.free)
+    assert other.free == grid.free
+    assert (other.counts == grid.counts).all()
+    rng_a, rng_b = random.Random(5), random.Random(5)
+    assert [grid.sample_free(rng_a) for _ in range(10)] == [other.sample_free(rng_b) for _ in range(10)]
+    check_index(other)
+
+
+def test_load_rejects_a_free_list_that_does_not_match_the_cells():
+    grid = OccupancyGrid(3)
+    grid.add((1, 1))
+    free = list(grid.free)
+    for cells, bad in [([(1, 1), (0, 2)], free),                      # a new cell still listed as free
+                       ([], free),                                    # a freed cell missing
+                       ([(1, 1)], free[:-1] + free[:1]),              # a repeat in place of a free cell
+                       ([(1, 1)], free[:-1] + [(1, 1)])]:             # an occupied cell listed as free
+        with pytest.raises(ValueError):
+            grid.load(cells, bad)
+        assert grid.free == free and grid.counts.sum() == 1  # left as it was
+    check_index(grid)
+
+
+def test_block_counts_follow_adds_removes_and_loads():
+    grid = OccupancyGrid(8)
+    rng = random.Random(1)
+    placed = []
+
+    def recount(k):
+        n = -(-8 // k)
+        blocks = [[0] * n for _ in range(n)]
+        for x, y in set(placed):
+            blocks[x // k][y // k] += 1
+        return blocks
+
+    grid.add((7, 7))
+    placed.append((7, 7))
+    assert grid.blocks(3).tolist() == recount(3)  # counted from the grid on the first call
+    for _ in range(1000):
+        if placed and rng.random() < 0.45:
+            grid.remove(placed.pop(rng.randrange(len(placed))))
+        else:
+            cell = (rng.randrange(8), rng.randrange(8))
+            grid.add(cell)
+            placed.append(cell)
+        assert grid.blocks(3).tolist() == recount(3)
+    assert grid.blocks(2).tolist() == recount(2)
+    placed = [(0, 0), (0, 1), (5, 5)]
+    grid.load(placed, [(x, y) for x in range(8) for y in range(8) if (x, y) not in placed])
+    assert grid.blocks(2).tolist() == recount(2)
+    grid.clear()
+    placed = []
+    assert grid.blocks(2).tolist() == recount(2)
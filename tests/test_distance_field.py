@@ -0,0 +1,88 @@
+# tests/test_distance_field.py
+import random
+from collections import deque
+import pytest
+from agents.cognitive_ai_agent import CognitiveAIAgent
+from game.distance_field import DistanceFields
+from game.occupancy import OccupancyGrid
+
+
+def bfs_dist(goal, blocked, size):
+    """Moves from every cell to goal through free cells (blocked ones can be left, not entered)"""
+    dist = {goal: 0}
+    queue = deque([goal])
+    while queue:
+        x, y = queue.popleft()
+        for v in ((x, y-1), (x, y+1), (x-1, y), (x+1, y)):
+            if 0 <= v[0] < size and 0 <= v[1] < size and v not in blocked and v not in dist:
+                dist[v] = dist[(x, y)] + 1
+                queue.append(v)
+    return dist
+
+
+def random_board(rng, size):
+    occ = OccupancyGrid(size)
+    foods = [(rng.randrange(size), rng.randrange(size)) for _ in range(3)]
+    blocked = {(rng.randrange(size), rng.randrange(size)) for _ in range(rng.randrange(size * size // 2))} - set(foods)
+    for c in blocked | set(foods):
+        occ.add(c)
+    return occ, blocked, foods
+
+
+@pytest.mark.parametrize('size', [20, 37])
+def test_fields_match_plain_bfs(size):
+    rng = random.Random(size)
+    for _ in range(60):
+        occ, blocked, foods = random_board(rng, size)
+        fields = DistanceFields(foods, occ)
+        for food in foods:
+            dist, nxt = fields.get(food)
+            truth = bfs_dist(food, blocked, size)
+            for i, d in enumerate(dist):
+                x, y = fields.cell(i)
+                if not (0 <= x < size and 0 <= y < size):
+                    assert d == -2  # the padded border is never entered
+                    continue
+                assert d == truth.get((x, y), -2 if (x, y) in blocked else -1), (food, (x, y))
+                if d > 0:
+                    assert dist[nxt[i]] == d - 1 and abs(nxt[i] - i) in (1, fields.stride)
+        assert fields.get((size + 5, 0)) is None  # not a food
+
+
+def test_fields_stopped_at_the_heads_agree_next_to_them():
+    rng = random.Random(1)
+    size = 60
+    for _ in range(40):
+        occ, blocked, foods = random_board(rng, size)
+        heads = [(rng.randrange(size), rng.randrange(size)) for _ in range(3)]
+        full = DistanceFields(foods, occ)
+        near = DistanceFields(foods, occ, heads)
+        for food in foods:
+            whole, _ = full.get(food)
+            partial, _ = near.get(food)
+            for hx, hy in heads:
+                for c in ((hx, hy-1), (hx, hy+1), (hx-1, hy), (hx+1, hy)):
+                    i = near.index(c)
+                    assert partial[i] == whole[i], (food, c)
+            # cells it did reach got their final distance; far ones were not visited at all
+            assert all(p in (w, -1) for p, w in zip(partial, whole))
+
+
+def test_field_path_ignores_memory_past_the_horizon():
+    """The field knows nothing of an agent's memory, so past the horizon its path can be shorter than A*'s"""
+    ai = CognitiveAIAgent(1, (0, 0))
+    occ = OccupancyGrid()
+    occ.add((0, 0))
+    food = (10, 0)
+    occ.add(food)
+    fields = DistanceFields([food], occ)
+    memory = {(6, 0), (6, 1)}  # a short wall across the straight line, six cells ahead
+
+    path = ai.field_path((0, 0), food, memory, fields, horizon=3)
+    assert path == [(x, 0) for x in range(1, 11)]  # straight through the remembered cells
+    detour = ai.astar((0, 0), food, memory)
+    assert len(detour) == 14 and not memory & set(detour)
+
+    # within the horizon the same cells send the caller back to A*
+    assert ai.field_path((0, 0), food, memory, fields, horizon=None) is None
+    assert ai.field_path((0, 0), food, {(2, 0)}, fields, horizon=3) is None
@@ -0,0 +1,74 @@
+# tests/test_dstar_lite.py
+import random
+from collections import deque
+from agents.cognitive_ai_agent import CognitiveAIAgent
+from agents.dstar_lite import DStarLite
+from game.environment import Environment
+from game.headless import build_roster, human_autopilot
+
+
+def bfs_distance(start, goal, blocked, size):
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        c = queue.popleft()
+        if c == goal:
+            return dist[c]
+        x, y = c
+        for v in ((x, y-1), (x, y+1), (x-1, y), (x+1, y)):
+            if 0 <= v[0] < size and 0 <= v[1] < size and v not in blocked and v not in dist:
+                dist[v] = dist[c] + 1
+                queue.append(v)
+    return None
+
+
+def test_incremental_paths_match_bfs():
+    rng = random.Random(1)
+    size = 20
+    for trial in range(100):
+        blocked = {(rng.randrange(size), rng.randrange(size)) for _ in range(120)}
+        goal = (rng.randrange(size), rng.randrange(size))
+        blocked.discard(goal)
+        start = (rng.randrange(size), rng.randrange(size))
+        known = blocked | {start}
+        planner = DStarLite(goal, start, known, size)
+        for tick in range(15):
+            path = planner.path()
+            expected = bfs_distance(start, goal, blocked, size)
+            if expected is None or start == goal:
+                assert path == [] or start == goal
+            else:
+                assert len(path) == expected, (trial, tick)
+            if path:
+                start = path[0]
+            for _ in range(4):
+                c = (rng.randrange(size), rng.randrange(size))
+                if c != goal:
+                    blocked ^= {c}
+            now = blocked | {start}
+            planner.update(start, now - known, known - now)
+            known = now
+            assert planner.blocked == known
+
+
+def test_agent_repairs_keep_the_planner_in_sync(monkeypatch):
+    """The journal-based deltas leave the planner with exactly the agent's blocked cells"""
+    checked = []
+    repair = CognitiveAIAgent.repair_path
+
+    def checked_repair(self, head, blocked_set, food_positions):
+        path = repair(self, head, blocked_set, food_positions)
+        if self.planner is not None:
+            assert self.planner.blocked == set(blocked_set)
+            checked.append(self.planner_sync is not None)
+        return path
+
+    monkeypatch.setattr(CognitiveAIAgent, 'repair_path', checked_repair)
+    for seed in range(3):
+        human, ai_list = build_roster(10)
+        env = Environment(human, ai_list, seed=seed, headless=True)
+        rng = random.Random(seed)
+        while env.step_count < 400 and any(a.alive for a in ai_list):
+            human_autopilot(human, 'random', env, rng)
+            env.step(1)
+    assert len(checked) > 50 and all(checked)
@@ -0,0 +1,72 @@
+# tests/test_environment.py
+import random
+import pytest
+from agents.mcts_agent import MCTSAgent
+from game.environment import Environment
+from game.headless import build_roster, start_cells
+
+
+def mixed_env(decide_workers):
+    """Cognitive AIs plus an MCTS snake with its own numpy rng, run until some D* Lite planner is live"""
+    human, ai_list = build_roster(8)  # crowded enough that blocked paths get repaired from the start
+    ai_list.append(MCTSAgent(9, start_cells()[8], rollouts=64, batch=32, seed=5))
+    env = Environment(human, ai_list, seed=7, headless=True, decide_workers=decide_workers)
+    while not any(getattr(a, 'planner', None) for a in ai_list):
+        env.step(1)
+        assert env.step_count < 200
+    return env
+
+
+@pytest.mark.parametrize('decide_workers', [0, 2])
+def test_restored_env_steps_like_the_original(decide_workers, env_state):
+    env = mixed_env(decide_workers)
+    snap = env.snapshot()
+    states = []
+    for _ in range(30):
+        env.step(1)
+        states.append(env_state(env))
+    env.restore(snap)
+    assert env_state(env) == env_state(mixed_env(decide_workers))
+    for expected in states:
+        env.step(1)
+        assert env_state(env) == expected, env.step_count
+
+
+@pytest.mark.parametrize('decide_workers', [0, 2])
+def test_fork_steps_like_the_original(decide_workers, env_state):
+    env = mixed_env(decide_workers)
+    start = random.getstate()
+    clone = env.fork()
+    original_rng = clone_rng = start
+    # interleaved, so state the two games still share would make them drift apart
+    for _ in range(30):
+        random.setstate(original_rng)
+        env.step(1)
+        original_rng = random.getstate()
+        random.setstate(clone_rng)
+        clone.step(1)
+        clone_rng = random.getstate()
+        assert env_state(clone) == env_state(env), env.step_count
+
+
+def test_restore_rejects_bodies_edited_without_their_free_cells():
+    env = mixed_env(0)
+    snap = env.snapshot()
+    head = snap.snakes[1][0][0]
+    moved = next(c for c in snap.free_cells if abs(c[0] - head[0]) + abs(c[1] - head[1]) > 1)  # a hand-edited body
+    snakes = list(snap.snakes)
+    snakes[1] = ((moved,),) + snakes[1][1:]
+    with pytest.raises(ValueError, match='free list'):
+        env.restore(snap._replace(snakes=tuple(snakes)))
+    env.restore(snap)
+    assert len(env.occupancy.free) == (env.occupancy.counts == 0).sum()
+
+
+def test_decide_workers_do_not_change_the_game(env_state):
+    finals = []
+    for workers in (1, 2, 4):
+        env = mixed_env(workers)
+        while env.step_count < 80:
+            env.step(1)
+        finals.append(env_state(env))
+    assert finals[1] == finals[0] and finals[2] == finals[0]
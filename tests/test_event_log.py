@@ -0,0 +1,102 @@
+# tests/test_event_log.py
+import csv, gc, glob, threading, weakref
+import pytest
+from game.event_log import EventLogWriter
+
+
+def rows(path):
+    out = []
+    for p in sorted(glob.glob(path + '*')):
+        with open(p, newline='', encoding='utf-8') as f:
+            out += [int(r['step']) for r in csv.DictReader(f)]
+    return sorted(out)
+
+
+def run_with_timeout(fn, seconds=10):
+    """Run fn on a thread; fail instead of hanging the suite if it blocks"""
+    errors = []
+    def target():
+        try:
+            fn()
+        except Exception as e:
+            errors.append(e)
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(seconds)
+    assert not t.is_alive(), "writer blocked"
+    return errors
+
+
+def test_background_rotation_on_last_row_of_batch(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    w = EventLogWriter(path, buffer_size=1, max_bytes=1, backups=100, background=True, max_pending=2)
+
+    def play():
+        for step in range(50):
+            w.write({'step': step, 'kind': 'move', 'action': 'x', 'agent': 1})
+        w.close()
+
+    assert run_with_timeout(play) == []
+    assert w._thread is not None and not w._thread.is_alive()
+    assert rows(path) == list(range(50))
+
+
+def test_background_rotation_with_batches(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    w = EventLogWriter(path, buffer_size=7, max_bytes=300, backups=100, background=True)
+    assert run_with_timeout(lambda: [w.write({'step': s}) for s in range(500)] and w.close()) == []
+    assert rows(path) == list(range(500))
+
+
+def test_worker_error_is_raised_to_caller(tmp_path):
+    w = EventLogWriter(str(tmp_path / 'log.csv'), buffer_size=1, background=True, max_pending=1)
+
+    def broken(batch):
+        raise OSError("disk full")
+    w._write_batch = broken
+
+    def play():
+        with pytest.raises(OSError):
+            for step in range(20):
+                w.write({'step': step})
+            w.flush()
+        del w._write_batch  # the disk recovered: the worker is still alive and close() finishes cleanly
+        w.close()
+
+    assert run_with_timeout(play) == []
+    assert not w._thread.is_alive()
+
+
+def test_closed_writers_can_be_collected(tmp_path):
+    refs = []
+    for i in range(3):  # e.g. one writer per tournament match
+        w = EventLogWriter(str(tmp_path / f'log{i}.csv'), background=i == 1)
+        w.write({'step': i})
+        w.close()
+        refs.append(weakref.ref(w))
+    del w
+    gc.collect()
+    assert all(r() is None for r in refs)
+
+
+@pytest.mark.parametrize('background', [False, True])
+def test_writes_after_close_are_refused(tmp_path, background):
+    path = str(tmp_path / 'log.csv')
+    w = EventLogWriter(path, buffer_size=1, background=background, max_pending=1)
+    w.write({'step': 0})
+    w.close()
+
+    refused = []
+
+    def late():
+        for step in range(1, 5):  # past max_pending: would block forever on a queue nobody drains
+            for call in (lambda: w.write({'step': step}), w.flush):
+                try:
+                    call()
+                except ValueError as e:
+                    refused.append(str(e))
+        w.close()  # closing again is still fine
+
+    assert run_with_timeout(late) == []
+    assert len(refused) == 8 and all('closed' in e for e in refused)
+    assert rows(path) == [0]
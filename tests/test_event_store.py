@@ -0,0 +1,136 @@
+# tests/test_event_store.py
+import gc, random, weakref
+import pytest
+from game.event_store import BLOCK, BinaryEventWriter, EventStore
+
+
+def make_events(n, seed=0):
+    rng = random.Random(seed)
+    events, step = [], 0
+    for _ in range(n):
+        step += rng.random() < 0.3
+        kind = rng.choice(['move', 'eat', 'death'])
+        events.append({'step': step, 'kind': kind, 'action': rng.choice(['up', 'down', None]),
+                       'agent': rng.choice([None, 0, 1, 2, 70]), 'pos': (rng.randrange(20), rng.randrange(20)),
+                       'extra': {'type': 'normal'} if kind == 'eat' else None})
+    return events
+
+
+def test_new_and_empty_stores_open(tmp_path):
+    store = EventStore(str(tmp_path / 'missing'))
+    assert len(store) == 0 and len(store.slice((0, 10), kind='move')) == 0
+    BinaryEventWriter(str(tmp_path / 'empty')).close()  # nothing written, so no strings.json
+    store = EventStore(str(tmp_path / 'empty'))
+    assert len(store) == 0 and len(store.slice(agent=1)) == 0
+
+
+def test_closed_writers_can_be_collected(tmp_path):
+    w = BinaryEventWriter(str(tmp_path / 'log.evb'))
+    w.write(make_events(1)[0])
+    w.close()
+    ref = weakref.ref(w)
+    del w
+    gc.collect()
+    assert ref() is None
+
+
+def test_writes_after_close_are_refused(tmp_path):
+    w = BinaryEventWriter(str(tmp_path / 'log.evb'))
+    w.close()
+    with pytest.raises(ValueError, match='closed'):
+        w.write(make_events(1)[0])
+    with pytest.raises(ValueError, match='closed'):
+        w.flush()
+    w.close()
+
+
+def test_unknown_kind_matches_nothing(tmp_path):
+    w = BinaryEventWriter(str(tmp_path / 'log.evb'))
+    for ev in make_events(50):
+        w.write(ev)
+    w.close()
+    store = EventStore(str(tmp_path / 'log.evb'))
+    assert len(store.slice(kind='teleport')) == 0
+    with pytest.raises(KeyError, match='teleport'):
+        store.code('kind', 'teleport')
+
+
+def test_slices_match_a_linear_filter(tmp_path):
+    events = make_events(3 * BLOCK + 100)
+    w = BinaryEventWriter(str(tmp_path / 'log.evb'), buffer_size=1000)
+    for ev in events:
+        w.write(ev)
+    w.close()
+    store = EventStore(str(tmp_path / 'log.evb'))
+    assert len(store) == len(events) and len(store.index) == 4
+    assert [(e['step'], e['kind'], e['agent'], list(e['pos'])) for e in store.to_dicts(store.records)] == \
+        [(e['step'], e['kind'], e['agent'], list(e['pos'])) for e in events]
+    rng = random.Random(1)
+    last = events[-1]['step']
+    for _ in range(100):
+        lo = rng.randrange(last)
+        hi = lo + rng.randrange(1, 400)
+        agent = rng.choice([None, -1, 1, 70])
+        kind = rng.choice([None, 'eat', 'death'])
+        got = store.slice((lo, hi), agent, kind)
+        expected = [e for e in events if lo <= e['step'] < hi
+                    and (agent is None or (-1 if e['agent'] is None else e['agent']) == agent)
+                    and (kind is None or e['kind'] == kind)]
+        assert [(int(r['step']), int(r['agent'])) for r in got] == \
+            [(e['step'], -1 if e['agent'] is None else e['agent']) for e in expected]
+
+
+def test_flushes_write_only_the_index_rows_they_touch(tmp_path, monkeypatch):
+    rows_written, string_saves = [], []
+    write_index, save_strings = BinaryEventWriter._write_index, BinaryEventWriter._save_strings
+
+    def spy_index(self, first):
+        rows_written.append(self.n_blocks - first)
+        write_index(self, first)
+
+    def spy_strings(self):
+        string_saves.append(1)
+        save_strings(self)
+
+    monkeypatch.setattr(BinaryEventWriter, '_write_index', spy_index)
+    monkeypatch.setattr(BinaryEventWriter, '_save_strings', spy_strings)
+    events = make_events(6 * BLOCK)
+    w = BinaryEventWriter(str(tmp_path / 'log.evb'), buffer_size=500)
+    for ev in events:
+        w.write(ev)
+    w.close()
+    assert len(rows_written) > 40 and max(rows_written) <= 2
+    assert len(string_saves) == 1  # every kind and action shows up in the first batch
+    store = EventStore(str(tmp_path / 'log.evb'))
+    assert len(store.index) == 6 and len(store.slice()) == len(events)
+
+
+def test_records_the_index_missed_are_still_sliced(tmp_path, monkeypatch):
+    path = str(tmp_path / 'log.evb')
+    events = make_events(3 * BLOCK)
+    w = BinaryEventWriter(path, buffer_size=1000)
+    for ev in events[:BLOCK + 500]:
+        w.write(ev)
+    w.flush()
+    # the process dies between appending the records and writing their index rows, flush after flush
+    monkeypatch.setattr(BinaryEventWriter, '_write_index', lambda self, first: None)
+    for ev in events[BLOCK + 500:]:
+        w.write(ev)
+    w.flush()
+    monkeypatch.undo()
+
+    def linear(lo, hi, agent):
+        return [(e['step'], e['agent']) for e in events if lo <= e['step'] < hi and e['agent'] == agent]
+
+    store = EventStore(path)
+    assert len(store) == len(events) and len(store.index) == 1  # block 1 is only partly covered
+    last = events[-1]['step']
+    for lo, hi in [(0, last + 1), (last // 2, last + 1), (last - 20, last + 1)]:
+        got = store.slice((lo, hi), agent=1)
+        assert [(int(r['step']), int(r['agent'])) for r in got] == linear(lo, hi, 1)
+
+    BinaryEventWriter(path).close()  # reopening re-indexes the tail
+    store = EventStore(path)
+    assert len(store.index) == 3 and list(store.index['count']) == [BLOCK] * 3
+    assert [(int(r['step']), int(r['agent'])) for r in store.slice((last // 2, last + 1), agent=1)] == \
+        linear(last // 2, last + 1, 1)
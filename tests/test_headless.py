@@ -0,0 +1,24 @@
+# tests/test_headless.py
+import os, subprocess, sys, textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_simulation_runs_without_pygame():
+    # a fresh interpreter: this test process may already have pygame loaded by the renderer tests
+    script = textwrap.dedent("""
+        import sys
+        import game.headless, game.tournament, game.replay
+        from game.environment import Environment
+        from game.headless import build_roster, run_episode
+
+        human, ai_list = build_roster(3)
+        env = Environment(human, ai_list, seed=1, headless=True)
+        for _ in range(30):
+            env.step(1)
+        assert env.step_count == 30
+        run_episode(2, num_ai=2, max_steps=30, recorder=game.replay.Recorder(2, 2))
+        assert 'pygame' not in sys.modules, sorted(m for m in sys.modules if m.startswith('pygame'))
+    """)
+    proc = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
@@ -0,0 +1,48 @@
+# tests/test_main.py
+import random
+import pytest
+from core.config import MAX_TICKS_PER_FRAME
+from main import ticks_due
+
+
+def run_frames(frames, fps_at):
+    """Feed (dt) frames through ticks_due; returns the ticks per frame and the final lag"""
+    lag, ticks = 0.0, []
+    for i, dt in enumerate(frames):
+        n, lag, _ = ticks_due(lag, dt, fps_at(i))
+        ticks.append(n)
+    return ticks, lag
+
+
+def test_steady_frames_tick_at_the_simulation_rate():
+    ticks, lag = run_frames([1 / 60] * 600, lambda i: 5)
+    assert sum(ticks) == pytest.approx(50, abs=1) and max(ticks) == 1
+    assert sum(ticks) / 5 + lag == pytest.approx(10)  # no real time lost or invented
+
+
+def test_a_stalled_frame_catches_up_at_most_the_limit():
+    assert ticks_due(0.0, 30.0, 5) == (MAX_TICKS_PER_FRAME, 0.0, 0.0)
+    n, lag, alpha = ticks_due(0.1, 0.5, 8)  # 4.8 ticks due: under the limit, nothing dropped
+    assert n == 4 and alpha == pytest.approx(0.8) and lag == pytest.approx(0.1)
+    ticks, _ = run_frames([1 / 60] * 10 + [2.0] + [1 / 60] * 10, lambda i: 10)
+    assert ticks[10] == MAX_TICKS_PER_FRAME and max(ticks[11:]) == 1  # the rest of the stall is not replayed
+
+
+def test_a_level_up_only_changes_the_tick_rate():
+    frames = [1 / 60] * 120
+    ticks, lag = run_frames(frames, lambda i: 5 if i < 60 else 7)
+    assert sum(ticks[:60]) == pytest.approx(5, abs=1) and sum(ticks[60:]) == pytest.approx(7, abs=1)
+    assert sum(ticks[:60]) / 5 + sum(ticks[60:]) / 7 + lag == pytest.approx(2)  # the lag carries over in seconds
+    n, carried, _ = ticks_due(0.1, 0.0, 7)  # raising fps keeps the time owed, it is just paid in shorter ticks
+    assert n == 0 and carried == pytest.approx(0.1)
+
+
+def test_alpha_and_lag_stay_within_one_tick():
+    rng = random.Random(3)
+    lag = 0.0
+    for _ in range(20000):
+        fps = rng.choice([5, 7, 9, 13, 29])
+        dt = rng.choice([0.0, 1 / 60, 1 / 30, 1 / fps, rng.random() * 0.3])
+        n, lag, alpha = ticks_due(lag, dt, fps)
+        assert 0 <= n <= MAX_TICKS_PER_FRAME
+        assert 0.0 <= alpha < 1.0 and 0.0 <= lag < 1 / fps
@@ -0,0 +1,72 @@
+# tests/test_profiler.py
+import pytest
+from agents.cooperative_agent import CooperativeAIAgent
+from game import profiler
+from game.environment import Environment
+from game.headless import build_roster, start_cells
+
+
+@pytest.fixture(autouse=True)
+def no_profiler():
+    profiler.disable()
+    yield
+    profiler.disable()
+
+
+def small_env():
+    human, ai_list = build_roster(3)
+    ai_list.append(CooperativeAIAgent(4, start_cells()[3]))
+    return Environment(human, ai_list, seed=2, headless=True)
+
+
+def test_nearest_rank_percentiles():
+    hundred = list(range(1, 101))
+    assert [profiler.percentile(hundred, p) for p in (0, 1, 50, 95, 99, 100)] == [1, 1, 50, 95, 99, 100]
+    assert [profiler.percentile([10, 20, 30, 40], p) for p in (50, 95, 99)] == [20, 40, 40]
+    assert [profiler.percentile([7], p) for p in profiler.PERCENTILES] == [7, 7, 7]
+
+
+def test_report_over_the_rolling_window():
+    prof = profiler.Profiler(window=100)
+    for ms in range(1, 151):
+        prof.add('phase', ms / 1000)
+    rep = prof.report()['timings']['phase']
+    assert rep == {'n': 100, 'mean': 100.5, 'p50': 100.0, 'p95': 145.0, 'p99': 149.0}  # ms, last 100 samples
+
+
+def test_counters_are_zero_for_ticks_they_were_not_hit():
+    prof = profiler.Profiler(window=10)
+    for tick in range(12):
+        if tick == 4:
+            prof.count('rare', 5)
+        prof.count('always')
+        prof.count('always', 2)
+        prof.end_tick()
+    assert list(prof.counters['always']) == [3] * 10
+    assert list(prof.counters['rare']) == [0, 0, 5] + [0] * 7  # ticks 2-11: before, at and after its only hit
+    rep = prof.report()
+    assert rep['ticks'] == 12 and rep['counters']['rare'] == {'n': 10, 'mean': 0.5, 'p50': 0, 'p95': 5, 'p99': 5}
+
+
+def test_enabled_profiler_times_every_phase():
+    env = small_env()
+    prof = profiler.enable()
+    for _ in range(20):
+        env.step(1)  # closes the tick itself
+    rep = prof.report()
+    assert rep['ticks'] == 20
+    assert {'human', 'fields'} <= rep['timings'].keys()
+    assert all(s['n'] == 20 for s in rep['counters'].values()) and rep['counters']
+
+
+def test_disabled_profiler_takes_no_timings(monkeypatch):
+    def clock():
+        raise AssertionError("timed while profiling was off")
+
+    for module in ('game.environment', 'agents.cognitive_ai_agent', 'agents.cooperative_agent'):
+        monkeypatch.setattr(f'{module}.perf_counter', clock)
+    assert profiler.active is None
+    env = small_env()
+    for _ in range(20):
+        env.step(1)
+    assert env.step_count == 20 and profiler.active is None
@@ -0,0 +1,144 @@
+# tests/test_renderer.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import random
+import numpy as np
+import pygame
+import pytest
+from core.config import CELL_SIZE, GRID_SIZE, MINIMAP_SIZE, WINDOW_WIDTH, WINDOW_HEIGHT
+from game.environment import Environment
+from game.headless import build_roster, human_autopilot
+from game.renderer import (BACKGROUND, FOOD_COLORS, FOOD_SIZES, OBSTACLE_COLOR, Camera, Renderer, SpriteAtlas,
+                           TextCache, default_font)
+
+
+@pytest.fixture(scope='module')
+def font():
+    pygame.init()
+    yield default_font()
+    pygame.quit()
+
+
+class PinnedCamera(Camera):
+    """Stays where the test puts it; a full redraw would otherwise recenter instead of scrolling"""
+
+    def center(self, cell):
+        pass
+
+
+def pixels(surface):
+    return pygame.surfarray.array3d(surface)
+
+
+def covered(rects, size):
+    mask = np.zeros(size, dtype=bool)
+    for r in rects:
+        r = pygame.Rect(r).clip(pygame.Rect((0, 0), size))
+        mask[r.left:r.right, r.top:r.bottom] = True
+    return mask
+
+
+@pytest.mark.parametrize('view', [None, 8])  # whole board, and a scrolling camera with the minimap
+def test_dirty_rect_frames_match_a_full_redraw(font, view):
+    # the window is as large as the viewport, as in main.py
+    size = (WINDOW_WIDTH, WINDOW_HEIGHT) if view is None else (view * CELL_SIZE, view * CELL_SIZE)
+    kwargs = {} if view is None else {'cols': view, 'rows': view}
+    screen, ref_screen = pygame.Surface(size), pygame.Surface(size)
+    frames = 0
+    for seed in range(2):
+        human, ai_list = build_roster(3)
+        env = Environment(human, ai_list, seed=seed, headless=True)
+        env.spawn_obstacles(4)
+        incremental, full = Renderer(font, **kwargs), Renderer(font, **kwargs)
+        cam = incremental.camera
+        full.camera = PinnedCamera(cam.cols, cam.rows)
+        rng = random.Random(seed)
+        level = 2
+        before = None
+        for tick in range(120):
+            human_autopilot(human, 'random', env, rng)
+            env.step(level)
+            for alpha in (0.5, 1.0):  # a sliding in-between frame, then the tick itself
+                dirty = incremental.draw(screen, env, level, alpha)
+                full.invalidate()
+                full.camera.x, full.camera.y = cam.x, cam.y
+                full.draw(ref_screen, env, level, alpha)
+                after = pixels(screen)
+                assert (after == pixels(ref_screen)).all(), (seed, tick, alpha)
+                if before is not None:
+                    changed = (after != before).any(axis=2)
+                    assert not (changed & ~covered(dirty, size)).any(), (seed, tick, alpha)
+                before = after
+                frames += 1
+            if not human.alive and not any(a.alive for a in ai_list):
+                break
+    assert frames > 100
+
+
+def test_minimap_shows_every_occupied_cell_and_live_head(font):
+    human, ai_list = build_roster(3)
+    env = Environment(human, ai_list, seed=4, headless=True)
+    env.spawn_obstacles(4)
+    renderer = Renderer(font, cols=8, rows=8)
+    screen = pygame.Surface((8 * CELL_SIZE, 8 * CELL_SIZE))
+    rng = random.Random(4)
+    k = -(-GRID_SIZE // MINIMAP_SIZE)
+    n = -(-GRID_SIZE // k)
+    for tick in range(60):
+        human_autopilot(human, 'random', env, rng)
+        env.step(2)
+        # the minimap as drawn from every segment, obstacle and food
+        ref = np.zeros((n, n, 3), dtype=np.uint8)
+        for c in [c for body in env.snake_cells.values() for c in body] + \
+                 [o.position for o in env.obstacle_agents] + [f.position for f in env.food_agents]:
+            ref[c[0] // k, c[1] // k] = OBSTACLE_COLOR
+        for i, s in enumerate([human] + ai_list):
+            if s.alive and len(s.body):
+                ref[s.body[0][0] // k, s.body[0][1] // k] = renderer.snake_look(i, s)[1]
+        surf, _ = renderer.build_minimap(env, [human] + ai_list, screen)
+        expected = pygame.transform.scale(pygame.surfarray.make_surface(ref), (MINIMAP_SIZE, MINIMAP_SIZE))
+        cam = renderer.camera
+        scale = MINIMAP_SIZE / (n * k)
+        pygame.draw.rect(expected, (255, 255, 255), (cam.x * scale, cam.y * scale, cam.cols * scale, cam.rows * scale), 1)
+        assert (pixels(surf) == pixels(expected)).all(), tick
+
+
+def reference_tile(look):
+    """A cell drawn the way the pre-atlas draw() did it"""
+    tile = pygame.Surface((CELL_SIZE, CELL_SIZE))
+    tile.fill(BACKGROUND)
+    if look is not None and look[0] == 'food':
+        pygame.draw.circle(tile, look[1], tile.get_rect().center, look[2]//2)
+    elif look is not None:
+        tile.fill(look[1])
+    return tile
+
+
+def test_atlas_tiles_match_direct_drawing(font):
+    looks = [('food', color, size) for color in FOOD_COLORS.values() for size in FOOD_SIZES] + [('rect', OBSTACLE_COLOR)]
+    atlas = SpriteAtlas(looks)
+    custom = ('rect', (10, 200, 30))   # not known up front: added on first use
+    screen = pygame.Surface((CELL_SIZE, CELL_SIZE))
+    for convert in (False, True):
+        if convert:
+            atlas.convert(screen)
+        for look in [None] + looks + [custom]:
+            area = atlas.area(look)   # may grow the atlas, so before .surface
+            screen.blit(atlas.surface, (0, 0), area)
+            assert (pixels(screen) == pixels(reference_tile(look))).all(), (look, convert)
+    assert len(atlas.rects) == len(looks) + 2
+
+
+def test_text_cache_reuses_surfaces_until_the_limit(font):
+    cache = TextCache(limit=3)
+    first = cache.render(font, "AI1: 4", (0, 0, 200))
+    assert cache.render(font, "AI1: 4", (0, 0, 200)) is first
+    assert cache.render(font, "AI1: 4", (255, 255, 255)) is not first
+    assert (pixels(first) == pixels(font.render("AI1: 4", True, (0, 0, 200)))).all()
+    cache.render(font, "AI1: 5", (0, 0, 200))
+    cache.render(font, "AI1: 6", (0, 0, 200))   # over the limit: starts over
+    assert len(cache.surfaces) == 1
+    assert cache.render(font, "AI1: 4", (0, 0, 200)) is not first
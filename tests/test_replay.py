@@ -0,0 +1,70 @@
+# tests/test_replay.py
+import random
+import pytest
+from game import replay
+from game.headless import run_episode
+from game.replay import Recorder, Replayer, load_recording
+
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch, env_state):
+    """A seeded headless game saved to disk, and the env state before every recorded step"""
+    truth = {}
+    record = Recorder.record
+
+    def spy(self, env):
+        truth[env.step_count] = env_state(env, human_direction=False)
+        record(self, env)
+
+    monkeypatch.setattr(replay.Recorder, 'record', spy)
+    rec = Recorder(11, 3, 'Medium')
+    result = run_episode(11, until_all_dead=True, max_steps=600, recorder=rec)
+    path = tmp_path / 'session.json'
+    rec.save(str(path))
+    assert result['steps'] > 100
+    return load_recording(str(path)), truth
+
+
+def test_replay_reproduces_every_step(recorded, env_state):
+    rec, truth = recorded
+    rp = Replayer(rec, keyframe_every=50)
+    for step in range(1, max(truth) + 1):
+        rp.tick()
+        assert env_state(rp.env, human_direction=False) == truth[step], step
+
+
+def test_seek_through_keyframes_matches_the_recording(recorded, env_state):
+    rec, truth = recorded
+    rp = Replayer(rec, keyframe_every=50)
+    rp.build_keyframes()
+    assert len(rp.keyframes) > 2
+    rng = random.Random(0)
+    # random jumps in both directions, plus keyframe boundaries and the ends
+    steps = [rng.randrange(max(truth) + 1) for _ in range(30)] + [0, 49, 50, 51, max(truth)]
+    for step in steps:
+        env = rp.seek(step)
+        assert env_state(env, human_direction=False) == truth[step], step
+
+
+def test_closing_the_window_mid_game_saves_the_recording(tmp_path, monkeypatch):
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    monkeypatch.setenv('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    import main
+    monkeypatch.chdir(tmp_path)
+
+    def start_menu(screen):
+        pygame.time.set_timer(pygame.QUIT, 700, 1)  # the window is closed a few ticks into the game
+        return 'Medium', 1
+
+    monkeypatch.setattr(main, 'start_menu', start_menu)
+    monkeypatch.setattr(main, 'EVENT_LOG_PATH', str(tmp_path / 'log.csv'))  # the writer closes at exit, after chdir is undone
+    with pytest.raises(SystemExit):
+        main.main()
+    saved = list((tmp_path / 'replays').glob('session-*.json'))
+    assert len(saved) == 1
+    rec = load_recording(str(saved[0]))
+    assert rec['num_ai'] == 1 and rec['steps'] > 0
+    rp = Replayer(rec)
+    rp.build_keyframes()
+    assert rp.env.step_count == rec['steps']
@@ -0,0 +1,83 @@
+# tests/test_risk_field.py
+import random
+from types import SimpleNamespace
+import pytest
+from agents.cognitive_ai_agent import CognitiveAIAgent, RISK_RADIUS
+from core.config import GRID_SIZE
+from game import headless
+from game.environment import Environment, RISK_FIELD_MIN_CELLS, RISK_FIELD_MAX_SNAKES
+from game.risk_field import RiskField, FAR
+from game.snake_body import SnakeBody
+from game.spatial_hash import SpatialHash
+
+
+def wander(rng, length):
+    """Random walk that may cross itself and other snakes, like bodies sharing a cell for a tick"""
+    body = [(rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE))]
+    while len(body) < length:
+        x, y = body[-1]
+        dx, dy = rng.choice(((0, 1), (0, -1), (1, 0), (-1, 0)))
+        body.append((min(max(x + dx, 0), GRID_SIZE - 1), min(max(y + dy, 0), GRID_SIZE - 1)))
+    return body
+
+
+def linear(cell, snakes, me, obstacles):
+    """Nearest obstacle, other body segment and other head, scanning every one"""
+    d = lambda c: abs(cell[0] - c[0]) + abs(cell[1] - c[1])
+    others = [s for s in snakes if s is not me and s.body]
+    return (min([d(o) for o in obstacles] + [FAR]), min([d(c) for s in others for c in s.body] + [FAR]),
+            min([d(s.body[0]) for s in others] + [FAR]))
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_field_and_window_distances_match_the_linear_scan(seed):
+    rng = random.Random(seed)
+    snakes = []
+    for k in range(rng.randrange(1, 6)):
+        s = CognitiveAIAgent(k, (0, 0))
+        s.body = SnakeBody(wander(rng, rng.randrange(1, 60)) if rng.random() < 0.9 else [])
+        snakes.append(s)
+    if len(snakes) > 1 and snakes[0].body and snakes[1].body:
+        snakes[1].body.push_head(snakes[0].body[0])  # two snakes on one cell: the owner tie two_best has to split
+    obstacles = [(rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE)) for _ in range(rng.randrange(8))]
+
+    field = RiskField(snakes, obstacles)
+    spatial = SpatialHash()
+    for o in obstacles:
+        spatial.add('obstacle', o)
+    for s in snakes:
+        for c in s.body:
+            spatial.add('snake', c, s)
+    envs = [SimpleNamespace(risk_field=field, shared_dangers=set()), SimpleNamespace(spatial=spatial, shared_dangers=set()),
+            SimpleNamespace(shared_dangers=set())]
+
+    for me in snakes:
+        others = [s for s in snakes if s is not me]
+        for x in range(GRID_SIZE):
+            for y in range(GRID_SIZE):
+                cell = (x, y)
+                truth = linear(cell, snakes, me, obstacles)
+                assert (field.obstacle_dist(cell), field.snake_dist(cell, me), field.head_dist(cell, me)) == truth
+                # the window is a square, so past RISK_RADIUS it may or may not see things: all risk_score needs is "far"
+                for w, d in zip(me.nearby_dists(cell, spatial, RISK_RADIUS), truth):
+                    assert w == d if d <= RISK_RADIUS else w > RISK_RADIUS
+                risks = {me.risk_score(cell, others, obstacles, env) for env in envs}
+                assert len(risks) == 1, (cell, risks)
+
+
+def field_for(num_ai, cells):
+    """Environment.build_fields' choice for num_ai AIs and `cells` snake cells in all"""
+    human, ai_list = headless.build_roster(num_ai)
+    env = Environment(human, ai_list, seed=0, headless=True)
+    extra = cells - (num_ai + 1)
+    ai_list[0].body = SnakeBody([ai_list[0].body[0]] + [(i % GRID_SIZE, i // GRID_SIZE) for i in range(extra)])
+    env.rebuild_occupancy()
+    env.build_fields()
+    return env.risk_field
+
+
+def test_environment_switches_to_the_field_at_the_thresholds():
+    assert field_for(3, RISK_FIELD_MIN_CELLS - 1) is None
+    assert field_for(3, RISK_FIELD_MIN_CELLS) is not None
+    assert field_for(RISK_FIELD_MAX_SNAKES - 1, RISK_FIELD_MIN_CELLS) is not None
+    assert field_for(RISK_FIELD_MAX_SNAKES, RISK_FIELD_MIN_CELLS) is None  # one snake too many with the human
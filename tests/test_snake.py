@@ -0,0 +1,64 @@
+# tests/test_snake.py
+import pytest
+from agents.human_agent import HumanAgent
+from core.config import GRID_SIZE, INPUT_QUEUE_SIZE
+
+
+def test_snake_grows_on_food_and_keeps_its_length_otherwise():
+    snake = HumanAgent(0, (5, 5))
+    food, types = [(6, 5)], {(6, 5): 'normal'}
+    snake.step(food, types, set())
+    assert snake.score == 1 and list(snake.body) == [(6, 5), (5, 5)] and food == []
+    snake.step(food, types, set())
+    assert list(snake.body) == [(7, 5), (6, 5)]
+
+
+def test_snake_ignores_reversals():
+    snake = HumanAgent(0, (5, 5))
+    snake.turn('LEFT')
+    assert snake.direction == 'RIGHT'
+    snake.turn('UP')
+    assert snake.direction == 'UP'
+
+
+def test_turns_pressed_within_one_tick_apply_on_consecutive_ticks():
+    snake = HumanAgent(0, (5, 5))
+    assert snake.queue_turn('UP', now=0.0) and snake.queue_turn('LEFT', now=0.01)
+    assert snake.apply_turn(now=0.1) == 'UP' and snake.direction == 'UP'
+    snake.step([], {}, set())
+    assert snake.apply_turn(now=0.3) == 'LEFT' and snake.direction == 'LEFT'
+    assert snake.input_latency == pytest.approx(0.29)
+    snake.step([], {}, set())
+    assert list(snake.body) == [(4, 4)] and snake.apply_turn() is None
+
+
+def test_queued_turns_are_checked_against_the_last_queued_direction():
+    snake = HumanAgent(0, (5, 5))  # heading RIGHT
+    assert snake.queue_turn('UP')
+    assert not snake.queue_turn('DOWN')  # reverses the queued UP
+    assert snake.queue_turn('LEFT')      # reverses RIGHT, but the snake will be heading UP by then
+    assert [d for _, d in snake.pending] == ['UP', 'LEFT']
+
+
+def test_repeated_turns_are_dropped():
+    snake = HumanAgent(0, (5, 5))
+    assert not snake.queue_turn('RIGHT')
+    assert snake.queue_turn('UP') and not snake.queue_turn('UP')
+    assert [d for _, d in snake.pending] == ['UP']
+
+
+def test_turns_beyond_the_queue_size_are_discarded():
+    snake = HumanAgent(0, (5, 5))
+    turns = ['UP', 'LEFT', 'DOWN', 'RIGHT', 'UP', 'LEFT']
+    accepted = [snake.queue_turn(d) for d in turns]
+    assert accepted == [True] * INPUT_QUEUE_SIZE + [False] * (len(turns) - INPUT_QUEUE_SIZE)
+    assert [d for _, d in snake.pending] == turns[:INPUT_QUEUE_SIZE]
+
+
+def test_snake_dies_on_walls_and_obstacles():
+    snake = HumanAgent(0, (GRID_SIZE - 1, 5))
+    snake.step([], {}, set())
+    assert not snake.alive and snake.death_cause == 'wall'
+    snake = HumanAgent(0, (5, 5))
+    snake.step([], {}, {(6, 5)})
+    assert not snake.alive and snake.death_cause == 'obstacle'
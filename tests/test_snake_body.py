@@ -0,0 +1,42 @@
+# tests/test_snake_body.py
+import random
+from game.snake_body import SnakeBody
+
+
+def test_snake_body_keeps_order_and_membership():
+    body = SnakeBody([(3, 1), (2, 1), (1, 1)])
+    body.push_head((4, 1))
+    assert body.pop_tail() == (1, 1)
+    assert list(body) == [(4, 1), (3, 1), (2, 1)] and body == [(4, 1), (3, 1), (2, 1)]
+    assert body[0] == (4, 1) and body[-1] == (2, 1) and len(body) == 3
+    assert (1, 1) not in body and (3, 1) in body
+
+
+def test_snake_body_counts_crossed_cells():
+    body = SnakeBody([(1, 1), (1, 2), (1, 1)])
+    assert body.count((1, 1)) == 2
+    body.pop_tail()
+    assert (1, 1) in body and body.count((1, 1)) == 1
+    body.clear()
+    assert len(body) == 0 and (1, 1) not in body
+
+
+def test_snake_body_matches_a_plain_list_under_random_moves():
+    rng = random.Random(2)
+    body, ref = SnakeBody([(0, 0)]), [(0, 0)]
+    for _ in range(3000):
+        op = rng.random()
+        cell = (rng.randrange(4), rng.randrange(4))  # a small board, so cells are often crossed twice
+        if op < 0.4:
+            body.push_head(cell)
+            ref.insert(0, cell)
+        elif op < 0.5:
+            body.push_tail(cell)
+            ref.append(cell)
+        elif ref:
+            assert body.pop_tail() == ref.pop()
+        assert body == ref and len(body) == len(ref)
+        if ref:
+            assert body[0] == ref[0] and body[-1] == ref[-1]
+        for c in [(x, y) for x in range(4) for y in range(4)]:
+            assert (c in body) == (c in ref) and body.count(c) == ref.count(c)
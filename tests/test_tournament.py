@@ -0,0 +1,28 @@
+# tests/test_tournament.py
+import io
+from game.tournament import random_personalities, run_tournament
+
+
+def played(path):
+    with open(path, encoding='utf-8') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def test_resume_only_reuses_results_played_with_the_same_settings(tmp_path):
+    out = str(tmp_path / 'matches.jsonl')
+    players = random_personalities(3, seed=1)
+
+    def run(**settings):
+        kwargs = dict(games=1, seed=0, max_steps=40, difficulty='Medium') | settings
+        return run_tournament(players, 'round-robin', workers=1, out_path=out, log=io.StringIO(), **kwargs)
+
+    first = run()
+    assert played(out) == 3
+    assert run() == first and played(out) == 3  # resumed, nothing replayed
+    for changed in ({'seed': 1}, {'games': 2}, {'max_steps': 60}, {'difficulty': 'Hard'}):
+        before = played(out)
+        run(**changed)
+        assert played(out) == before + 3, changed
+    players['p0'] = dict(players['p0'], fear=0.0)
+    run()
+    assert played(out) == 15 + 2  # only p0's matches changed
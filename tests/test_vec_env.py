@@ -0,0 +1,104 @@
+# tests/test_vec_env.py
+from collections import Counter
+import numpy as np
+from agents.food_and_obstacle_agents import BonusAgent
+from agents.mcts_agent import MCTSAgent, Node
+from game.environment import Environment
+from game.headless import build_roster
+from game.vec_env import VecEnvironment, BONUS, DIRECTIONS, DEATH_CAUSES
+
+
+def solo_board(auto_reset):
+    env = VecEnvironment(1, 1, seed=0, start_positions=[(0, 5)], auto_reset=auto_reset)
+    left = DIRECTIONS.index('LEFT')
+    return env, env.step(np.array([[left]]))
+
+
+def test_auto_reset_revives_a_finished_board():
+    env, (rewards, dones, info) = solo_board(auto_reset=True)
+    assert dones[0] and DEATH_CAUSES[info['death_cause'][0, 0]] == 'wall'
+    assert env.alive[0, 0]
+
+
+def test_without_auto_reset_a_finished_board_stays_finished():
+    env, (rewards, dones, info) = solo_board(auto_reset=False)
+    assert dones[0] and DEATH_CAUSES[info['death_cause'][0, 0]] == 'wall'
+    assert not env.alive[0, 0]
+    _, dones, _ = env.step(np.array([[0]]))
+    assert dones[0] and not env.alive[0, 0]
+
+
+def test_mcts_scores_a_losing_move_below_a_safe_one():
+    human, _ = build_roster(1, with_human=False)
+    agent = MCTSAgent(1, (0, 5), rollouts=256, batch=64, seed=3)  # alone on the board, next to the left wall
+    env = Environment(human, [agent], seed=3, headless=True)
+    model = agent.load_model(env)
+    state = model.get_state()
+    root = Node()
+    for _ in range(4):
+        agent.run_batch(model, state, root, (0, 1, 2, 3))  # every move at the root, the wall included
+    value = {DIRECTIONS[a]: root.children[a].total / root.children[a].visits for a in range(4)}
+    assert value['LEFT'] < min(value['UP'], value['DOWN'], value['RIGHT'])
+    assert value['LEFT'] <= -agent.death_penalty / 2
+
+
+def bonus_lifetimes(vec):
+    kind, pos, life = vec.food_kind[0], vec.food_pos[0], vec.food_life[0]
+    return {tuple(map(int, pos[k])): int(life[k]) for k in range(len(kind)) if kind[k] == BONUS}
+
+
+def test_step_follows_the_environment_rules():
+    """One board stepped from the live game's position after every tick makes the same moves, kills and scores"""
+    human, ai_list = build_roster(3, with_human=False)
+    env = Environment(human, ai_list, seed=7, headless=True)
+    env.spawn_for_level(3)  # obstacles, and more food than the cap
+    env.food_agents[0] = BonusAgent(env.food_agents[0].position)
+    env.food_agents[0].type, env.food_agents[0].lifetime = 'bonus', 5   # expires within the run
+    vec = VecEnvironment(1, len(ai_list), len(env.obstacle_agents), seed=7, max_steps=2**30,
+                         start_positions=[(0, 0)] * len(ai_list), auto_reset=False)
+    moves = {}
+    for ai in ai_list:
+        ai.decide = lambda *args, ai=ai: moves[ai]   # both sides make the moves the vectorized policy picks
+    seen = Counter()
+    for _ in range(300):
+        food = {f.position: f.type for f in env.food_agents}
+        obstacles = [o.position for o in env.obstacle_agents]
+        vec.load([(list(a.body), a.alive, a.score) for a in ai_list],
+                 [(f.position, f.type, getattr(f, 'lifetime', None)) for f in env.food_agents], obstacles,
+                 env.step_count, env.obstacle_move_counter)
+        actions = vec.greedy_safe_actions(0.2)
+        for s, ai in enumerate(ai_list):
+            moves[ai] = DIRECTIONS[actions[0, s]]
+        was_alive = [a.alive for a in ai_list]
+        rewards, _, _ = vec.step(actions)
+        env.step(1)
+
+        for s, ai in enumerate(ai_list):
+            assert vec.body(0, s) == list(ai.body)
+            assert vec.alive[0, s] == ai.alive and vec.scores[0, s] == ai.score
+            if was_alive[s] and not ai.alive:
+                assert DEATH_CAUSES[vec.death_cause[0, s]] == ai.death_cause
+                seen['death'] += 1
+        seen['eat'] += int((rewards != 0).sum())
+
+        # spawns are random on both sides: what is left of the old food must match, and so must the count
+        env_food = {f.position: f.type for f in env.food_agents}
+        vec_food = vec.food(0)
+        assert len(vec_food) == len(env_food) == max(len(food) - len(set(food) - set(env_food)), 3)
+        assert set(food) - set(vec_food) == set(food) - set(env_food)
+        kept = set(food) & set(env_food)
+        lifetimes = bonus_lifetimes(vec)
+        for f in env.food_agents:
+            if f.position in kept and f.type == 'bonus':
+                assert lifetimes[f.position] == f.lifetime
+        seen['expired'] += sum(1 for p in set(food) - set(env_food) if food[p] == 'bonus' and
+                               all(a.body[0] != p for a in ai_list if a.body))
+
+        # obstacles drift on the same ticks, one cell at most
+        for (ox, oy), new_vec, o in zip(obstacles, vec.obstacles[0].tolist(), env.obstacle_agents):
+            if env.obstacle_move_counter:
+                assert tuple(new_vec) == o.position == (ox, oy)
+            else:
+                assert max(abs(new_vec[0] - ox), abs(new_vec[1] - oy), abs(o.position[0] - ox), abs(o.position[1] - oy)) <= 1
+                seen['drift'] += 1
+    assert seen['eat'] and seen['death'] and seen['expired'] and seen['drift'], seen